@@ -1,11 +1,16 @@
 import requests
 import zipfile
 import io
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 import os
+import sys
 from pathlib import Path
 
+# The NSE trading calendar is shared with NewCSVsaver.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "NewCSVsaver"))
+from trading_calendar import get_calendar
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -38,55 +43,14 @@ def download_today_bhavcopy():
     dirs = create_session_directory()
     logging.info(f"Created new session directory: {dirs['base_path']}")
 
-    from datetime import datetime, timedelta
-
-    # Example list of NSE holidays (YYYY-MM-DD format)
-    NSE_HOLIDAYS = [
-        "2025-02-26",  # Mahashivratri (Wednesday)
-        "2025-03-14",  # Holi (Friday)
-        "2025-03-31",  # Id-Ul-Fitr (Ramadan Eid) (Monday)
-        "2025-04-10",  # Shri Mahavir Jayanti (Thursday)
-        "2025-04-14",  # Dr. Baba Saheb Ambedkar Jayanti (Monday)
-        "2025-04-18",  # Good Friday (Friday)
-        "2025-05-01",  # Maharashtra Day (Thursday)
-        "2025-08-15",  # Independence Day / Parsi New Year (Friday)
-        "2025-08-27",  # Shri Ganesh Chaturthi (Wednesday)
-        "2025-10-02",  # Mahatma Gandhi Jayanti/Dussehra (Thursday)
-        "2025-10-21",  # Diwali Laxmi Pujan (Tuesday)
-        "2025-10-22",  # Balipratipada (Wednesday)
-        "2025-11-05",  # Prakash Gurpurb Sri Guru Nanak Dev (Wednesday)
-        "2025-12-25"  # Christmas (Thursday)
-    ]
-
-    def get_previous_trading_day(current_date=None):
-        if current_date is None:
-            current_date = datetime.now().date()
-
-        previous_day = current_date - timedelta(days=1)
-
-        while True:
-            # Skip weekends (5=Saturday, 6=Sunday)
-            if previous_day.weekday() >= 5:
-                previous_day -= timedelta(days=1)
-                continue
-
-            # Skip holidays (check if date is in holiday list)
-            if previous_day.strftime("%Y-%m-%d") in NSE_HOLIDAYS:
-                previous_day -= timedelta(days=1)
-                continue
-
-            break  # Found the last trading day
-
-        return previous_day
-
-    last_trading_day = get_previous_trading_day()
+    last_trading_day = get_calendar().previous_trading_day(datetime.now().date())
     print("Last trading day:", last_trading_day)
 
 
 
 
-    # Extract day, month, and year
-    D = last_trading_day.day
+    # Extract day, month, and year (the archive name uses a zero-padded day, e.g. PR040625.zip)
+    D = last_trading_day.strftime("%d")
     year_short = last_trading_day.strftime("%y")
     month = last_trading_day.strftime("%m")
 
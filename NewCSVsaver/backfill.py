@@ -0,0 +1,330 @@
+import argparse
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from download_cache import DEFAULT_CACHE_DIR, DownloadCache, link_or_copy
+from download_extract import ARCHIVE_BASE_URL, DOWNLOAD_HEADERS, get_archive_name
+from trading_calendar import get_calendar
+
+# ------------------------ Defaults ------------------------
+DEFAULT_WORKERS = 4
+DEFAULT_RATE = 2.0          # requests per second per host
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 1.0       # seconds, doubled on every retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MISSING_GRACE_DAYS = 7      # a 404 for a more recent day may just be a late upload
+
+
+# ------------------------ Trading Calendar ------------------------
+def trading_days(start_date, end_date):
+    """All trading days between start_date and end_date, inclusive."""
+    return get_calendar().trading_days(start_date, end_date)
+
+
+# ------------------------ Rate Limiting ------------------------
+class HostRateLimiter:
+    """
+    Spaces requests to the same host at least 1/rate seconds apart,
+    shared by every worker thread.
+    """
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+# ------------------------ Checkpoint ------------------------
+class Checkpoint:
+    """
+    JSON file recording which archives were downloaded, loaded or found
+    missing, so an interrupted backfill resumes where it stopped.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.state = {"downloaded": {}, "loaded": [], "missing": []}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.state.update(json.load(f))
+
+    def is_done(self, day):
+        key = day.isoformat()
+        return key in self.state["downloaded"] or key in self.state["missing"]
+
+    def mark_downloaded(self, day, file_path):
+        with self._lock:
+            self.state["downloaded"][day.isoformat()] = str(file_path)
+            self._save()
+
+    def mark_missing(self, day):
+        with self._lock:
+            self.state["missing"].append(day.isoformat())
+            self._save()
+
+    def clear_missing(self):
+        """Forgets every day recorded as missing so the next run fetches them again."""
+        with self._lock:
+            cleared = len(self.state["missing"])
+            self.state["missing"] = []
+            self._save()
+        return cleared
+
+    def mark_loaded(self, day):
+        with self._lock:
+            self.state["loaded"].append(day.isoformat())
+            self._save()
+
+    def _save(self):
+        # Write to a temp file first so a crash never leaves a truncated checkpoint.
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+# ------------------------ Fetching ------------------------
+def create_http_session(pool_size):
+    """requests.Session with a connection pool large enough for every worker."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DOWNLOAD_HEADERS)
+    return session
+
+
+def fetch_archive(session, url, limiter, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+    """
+    Downloads one archive. Returns the 200 response (its bytes plus the
+    ETag/Last-Modified headers the download cache keeps), or None when the
+    server says it does not exist (404: usually a holiday missing from the
+    calendar or an archive not published yet).
+    Connection errors and 429/5xx responses are retried with exponential backoff.
+    """
+    archive_name = url.rsplit("/", 1)[-1]
+    attempt = 0
+    while True:
+        limiter.wait(url)
+        try:
+            with metrics.span("download", file=archive_name):
+                response = session.get(url, timeout=30)
+            if response.status_code == 200:
+                metrics.count("download_bytes", len(response.content), file=archive_name)
+                return response
+            if response.status_code == 404:
+                return None
+            if response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+            error = f"HTTP {response.status_code}"
+        except requests.exceptions.ConnectionError as e:
+            error = str(e)
+        except requests.exceptions.Timeout as e:
+            error = str(e)
+
+        attempt += 1
+        if attempt > retries:
+            raise RuntimeError(f"Giving up on {url} after {retries} retries: {error}")
+        metrics.count("retries", file=archive_name)
+        delay = backoff * (2 ** (attempt - 1)) * (1 + random.random() * 0.25)
+        logging.warning(f"Retry {attempt}/{retries} for {url} in {delay:.1f}s ({error})")
+        time.sleep(delay)
+
+
+def _download_day(session, limiter, base_url, out_dir, day, retries, backoff, cache=None):
+    archive_name = get_archive_name(day)
+    file_path = out_dir / archive_name
+    if cache is not None:
+        cached_path = cache.get(archive_name)
+        if cached_path is not None:
+            cache.record_hit(archive_name)
+            return link_or_copy(cached_path, file_path)
+
+    response = fetch_archive(session, f"{base_url}/{archive_name}", limiter, retries, backoff)
+    if response is None:
+        return None
+    content = response.content
+    if cache is not None:
+        cache.record_miss(len(content))
+        cached_path = cache.put(archive_name, content,
+                                response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return link_or_copy(cached_path, file_path)
+
+    tmp_path = file_path.with_suffix(".part")
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, file_path)
+    return file_path
+
+
+# ------------------------ Loading ------------------------
+def load_archive(zip_file, db_config_path):
+    """
+    Streams an archive's members into the database with process_archive and
+    returns its per-table stats.
+    """
+    from processor import process_archive
+
+    return process_archive(zip_file, db_config_path, mode="upsert")
+
+
+# ------------------------ Backfill ------------------------
+def run_backfill(start_date, end_date, out_dir="bhavcopy_backfill", workers=DEFAULT_WORKERS,
+                 rate=DEFAULT_RATE, checkpoint_path=None, base_url=ARCHIVE_BASE_URL,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, db_config_path=None, cache_dir=None,
+                 retry_missing=False, missing_grace_days=MISSING_GRACE_DAYS):
+    """
+    Downloads every trading-day archive between start_date and end_date.
+
+    Downloads run on a bounded thread pool sharing one pooled HTTP session
+    and a per-host rate limit. Progress goes to a checkpoint file after every
+    archive, so rerunning the same command skips finished days. When
+    db_config_path is given, each archive is also loaded into the database
+    (serially, from the calling thread) as soon as it arrives. With
+    cache_dir, archives already in that download cache are not fetched again.
+
+    A day the server has no archive for (404) is only recorded as missing
+    once it is more than missing_grace_days old; a more recent one may just
+    not be published yet and is tried again on the next run. retry_missing
+    clears the recorded missing days first.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = Checkpoint(checkpoint_path or out_dir / "backfill_checkpoint.json")
+    if retry_missing:
+        logging.info(f"Retrying {checkpoint.clear_missing()} days recorded as missing")
+    grace_cutoff = date.today() - timedelta(days=missing_grace_days)
+
+    days = trading_days(start_date, end_date)
+    pending = [day for day in days if not checkpoint.is_done(day)]
+    logging.info(f"Backfill {start_date} -> {end_date}: {len(days)} trading days, "
+                 f"{len(days) - len(pending)} already done, {len(pending)} to fetch")
+
+    summary = {"downloaded": 0, "missing": 0, "failed": 0, "loaded": 0, "skipped": len(days) - len(pending)}
+    limiter = HostRateLimiter(rate)
+    cache = DownloadCache(cache_dir) if cache_dir else None
+    started = time.perf_counter()
+
+    to_load = []
+    if db_config_path:
+        # Archives fetched by an earlier run but never loaded.
+        to_load = [_parse_date(day) for day in sorted(checkpoint.state["downloaded"])
+                   if day not in checkpoint.state["loaded"]]
+
+    with create_http_session(workers) as session, ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_download_day, session, limiter, base_url, out_dir, day, retries, backoff, cache): day
+            for day in pending
+        }
+        for future in as_completed(futures):
+            day = futures[future]
+            try:
+                file_path = future.result()
+            except Exception as e:
+                summary["failed"] += 1
+                logging.error(f"Failed to download archive for {day}: {e}")
+                continue
+
+            if file_path is None:
+                summary["missing"] += 1
+                if day < grace_cutoff:
+                    checkpoint.mark_missing(day)
+                    logging.info(f"No archive published for {day}")
+                else:
+                    logging.info(f"No archive published for {day} yet; it will be tried again")
+                continue
+
+            summary["downloaded"] += 1
+            checkpoint.mark_downloaded(day, file_path)
+            if db_config_path:
+                to_load.append(day)
+                summary["loaded"] += _load_pending(to_load, checkpoint, db_config_path)
+
+    if db_config_path:
+        summary["loaded"] += _load_pending(to_load, checkpoint, db_config_path)
+
+    elapsed = time.perf_counter() - started
+    summary["seconds"] = round(elapsed, 3)
+    summary["archives_per_minute"] = round(summary["downloaded"] * 60 / elapsed, 1) if elapsed > 0 else None
+    logging.info(f"Backfill finished: {summary}")
+    if cache is not None:
+        cache.log_summary()
+    return summary
+
+
+def _load_pending(to_load, checkpoint, db_config_path):
+    from processor import failed_chunks
+
+    loaded = 0
+    while to_load:
+        day = to_load.pop(0)
+        file_path = checkpoint.state["downloaded"][day.isoformat()]
+        try:
+            table_stats = load_archive(file_path, db_config_path)
+        except Exception as e:
+            logging.error(f"Failed to load {file_path}: {e}")
+            continue
+        failed = failed_chunks(table_stats)
+        if failed:
+            # Not marked loaded, so the next run loads the (upserted) archive again.
+            logging.error(f"{failed} chunks of {file_path} failed to load; it will be loaded again")
+            continue
+        checkpoint.mark_loaded(day)
+        loaded += 1
+    return loaded
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Download (and optionally load) historical bhavcopy archives.")
+    arg_parser.add_argument("start", type=_parse_date, help="First date, YYYY-MM-DD")
+    arg_parser.add_argument("end", type=_parse_date, help="Last date, YYYY-MM-DD")
+    arg_parser.add_argument("--out", default="bhavcopy_backfill", help="Directory for downloaded archives")
+    arg_parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    arg_parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Max requests per second per host")
+    arg_parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES)
+    arg_parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <out>/backfill_checkpoint.json)")
+    arg_parser.add_argument("--base-url", default=ARCHIVE_BASE_URL)
+    arg_parser.add_argument("--load", metavar="DB_CONFIG", default=None,
+                            help="Also load each archive into the database described by this db_config.json")
+    arg_parser.add_argument("--cache", metavar="DIR", default=None,
+                            help=f"Reuse and fill this download cache (e.g. {DEFAULT_CACHE_DIR}, the daily download's)")
+    arg_parser.add_argument("--retry-missing", action="store_true",
+                            help="Fetch again the days an earlier run recorded as missing")
+    arg_parser.add_argument("--missing-grace-days", type=int, default=MISSING_GRACE_DAYS,
+                            help="Only record a 404 as missing for days older than this")
+    metrics.add_arguments(arg_parser)
+    args = arg_parser.parse_args()
+
+    metrics.start_run_from_args(args)
+    run_backfill(args.start, args.end, out_dir=args.out, workers=args.workers, rate=args.rate,
+                 checkpoint_path=args.checkpoint, base_url=args.base_url, retries=args.retries,
+                 db_config_path=args.load, cache_dir=args.cache, retry_missing=args.retry_missing,
+                 missing_grace_days=args.missing_grace_days)
+    metrics.export_from_args(args)
@@ -0,0 +1,255 @@
+"""
+Vectorized daily backtester over a symbol-by-date Panel (see panel.py).
+
+A strategy is a signal function ``signal(panel, **params)`` returning a
+position matrix the shape of the panel: the fraction of capital held in
+each symbol at each day's close. Positions are applied with a one-day lag
+(decided on day t's close, earning day t+1's close-to-close return), and
+the whole run is a handful of array operations over all symbols and days:
+
+    pnl[t]      = sum(position[t-1] * return[t]) - costs[t]
+    turnover[t] = sum(|position[t] - position[t-1]|)
+    costs[t]    = turnover priced at commission + slippage, plus an optional
+                  square-root market-impact term on each trade's share of
+                  the symbol's traded value
+
+Returns on days a symbol did not trade are zero; a position cannot change
+on such a day (the previous position is kept).
+
+sweep() runs a parameter grid across a process pool; the panel is sent to
+each worker once, not with every task.
+
+    python backtest.py --signal sma_crossover --grid fast=10,20 slow=50,100 --workers 4
+"""
+import argparse
+import itertools
+import logging
+from datetime import date
+
+import numpy as np
+
+from indicators import rolling_mean
+
+TRADING_DAYS_PER_YEAR = 252
+
+
+class Costs:
+    """
+    Per-trade costs, in basis points of traded value. ``impact_bps`` scales
+    sqrt(trade value / the symbol's traded value that day) and needs the
+    panel's "value" field and ``capital``.
+    """
+    def __init__(self, commission_bps=3.0, slippage_bps=5.0, impact_bps=0.0, capital=10_000_000.0):
+        self.commission_bps = commission_bps
+        self.slippage_bps = slippage_bps
+        self.impact_bps = impact_bps
+        self.capital = capital
+
+    def charge(self, trades, traded_value=None):
+        """Cost as a fraction of capital per symbol and day for ``trades`` (|change in weight|)."""
+        rate = (self.commission_bps + self.slippage_bps) / 10_000
+        costs = trades * rate
+        if self.impact_bps and traded_value is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                participation = trades * self.capital / traded_value
+            participation = np.where(np.isfinite(participation), participation, 0.0)
+            costs = costs + trades * self.impact_bps / 10_000 * np.sqrt(participation)
+        return costs
+
+
+class BacktestResult:
+    def __init__(self, dates, pnl, gross, costs, turnover, exposure, symbol_pnl):
+        self.dates = dates
+        self.pnl = pnl                  # net daily return on capital
+        self.gross = gross              # before costs
+        self.costs = costs
+        self.turnover = turnover
+        self.exposure = exposure        # sum of |position| per day
+        self.symbol_pnl = symbol_pnl    # net contribution of each symbol over the run
+        self.equity = np.cumprod(1.0 + pnl)
+        self.drawdown = self.equity / np.maximum.accumulate(self.equity) - 1.0 if len(pnl) else pnl
+
+    def stats(self):
+        days = len(self.pnl)
+        if not days:
+            return {"days": 0}
+        years = days / TRADING_DAYS_PER_YEAR
+        volatility = float(np.std(self.pnl) * np.sqrt(TRADING_DAYS_PER_YEAR))
+        total_return = float(self.equity[-1] - 1.0)
+        return {
+            "days": days,
+            "total_return": total_return,
+            "annual_return": float((1.0 + total_return) ** (1.0 / years) - 1.0) if total_return > -1 else -1.0,
+            "annual_volatility": volatility,
+            "sharpe": float(np.mean(self.pnl) * TRADING_DAYS_PER_YEAR / volatility) if volatility else 0.0,
+            "max_drawdown": float(self.drawdown.min()),
+            "average_turnover": float(self.turnover.mean()),
+            "total_costs": float(self.costs.sum()),
+            "average_exposure": float(self.exposure.mean()),
+        }
+
+
+def returns_matrix(close):
+    """Close-to-close returns (symbols x days); zero on and after days without a close."""
+    close = np.asarray(close, dtype=float)
+    returns = np.zeros(close.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[:, 1:] = close[:, 1:] / close[:, :-1] - 1.0
+    returns[~np.isfinite(returns)] = 0.0
+    return returns
+
+
+def run_positions(panel, positions, costs=None):
+    """Backtests a ready position matrix (symbols x days) against the panel's closes."""
+    costs = costs or Costs()
+    close = panel["close"]
+    positions = np.nan_to_num(np.asarray(positions, dtype=float), nan=0.0)
+    if positions.shape != close.shape:
+        raise ValueError(f"Positions have shape {positions.shape}, the panel {close.shape}")
+
+    # No trading on days without a close: carry the previous position.
+    untraded = np.isnan(close)
+    if untraded.any():
+        held = np.where(untraded, np.nan, positions)
+        held[:, 0] = np.where(untraded[:, 0], 0.0, held[:, 0])
+        positions = _forward_fill(held)
+
+    held = np.zeros(positions.shape)
+    held[:, 1:] = positions[:, :-1]
+    gross_by_symbol = held * returns_matrix(close)
+
+    trades = np.abs(np.diff(positions, axis=1, prepend=0.0))
+    traded_value = panel["value"] if "value" in panel else None
+    cost_by_symbol = costs.charge(trades, traded_value)
+
+    gross = gross_by_symbol.sum(axis=0)
+    cost = cost_by_symbol.sum(axis=0)
+    return BacktestResult(panel.dates, gross - cost, gross, cost, trades.sum(axis=0),
+                          np.abs(positions).sum(axis=0), (gross_by_symbol - cost_by_symbol).sum(axis=1))
+
+
+def run_backtest(panel, signal, params=None, costs=None):
+    """Backtests ``signal(panel, **params)``."""
+    return run_positions(panel, signal(panel, **(params or {})), costs)
+
+
+def _forward_fill(values):
+    """Fills NaNs along the date axis with the last value before them."""
+    index = np.where(np.isnan(values), 0, np.arange(values.shape[1]))
+    np.maximum.accumulate(index, axis=1, out=index)
+    filled = values[np.arange(values.shape[0])[:, None], index]
+    return np.nan_to_num(filled, nan=0.0)
+
+
+# -----------------------
+# Signals
+# -----------------------
+def equal_weight(selected, gross=1.0):
+    """Splits ``gross`` equally across the selected symbols of each day (a boolean matrix)."""
+    selected = np.asarray(selected, dtype=bool)
+    counts = selected.sum(axis=0, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(selected, gross / counts, 0.0)
+
+
+def sma_crossover(panel, fast=20, slow=50):
+    """Long, equal-weighted, every symbol whose fast SMA is above its slow SMA."""
+    close = panel["close"]
+    with np.errstate(invalid="ignore"):
+        return equal_weight(rolling_mean(close, fast) > rolling_mean(close, slow))
+
+
+def momentum(panel, lookback=60, top=0.1):
+    """Long, equal-weighted, the best ``top`` fraction of symbols by ``lookback``-day return."""
+    close = panel["close"]
+    past = np.full(close.shape, np.nan)
+    past[:, lookback:] = close[:, :-lookback]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = close / past - 1.0
+    change = np.where(np.isfinite(change), change, -np.inf)
+    ranks = change.argsort(axis=0).argsort(axis=0)
+    eligible = np.isfinite(change).sum(axis=0, keepdims=True)
+    return equal_weight((ranks >= close.shape[0] - np.floor(eligible * top)) & np.isfinite(change))
+
+
+SIGNALS = {
+    "sma_crossover": sma_crossover,
+    "momentum": momentum,
+}
+
+
+# -----------------------
+# Parameter Sweeps
+# -----------------------
+# Worker state for sweep(): the panel and settings, set up once per process.
+_sweep_state = {}
+
+
+def parameter_grid(grid):
+    """Every combination of a {param: [values]} grid as a list of param dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def sweep(panel, signal, grid, costs=None, workers=1):
+    """
+    Backtests ``signal`` for every combination in ``grid``. Returns
+    [(params, stats)] best Sharpe first. With ``workers`` > 1 the runs are
+    spread over a process pool; ``signal`` must then be a module-level function.
+    """
+    combinations = parameter_grid(grid) if isinstance(grid, dict) else list(grid)
+    if workers and workers > 1 and len(combinations) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(panel, signal, costs)) as pool:
+            stats = list(pool.map(_run_in_worker, combinations))
+    else:
+        stats = [run_backtest(panel, signal, params, costs).stats() for params in combinations]
+
+    results = list(zip(combinations, stats))
+    results.sort(key=lambda item: item[1].get("sharpe", float("-inf")), reverse=True)
+    return results
+
+
+def _init_sweep_worker(panel, signal, costs):
+    _sweep_state.update(panel=panel, signal=signal, costs=costs)
+
+
+def _run_in_worker(params):
+    return run_backtest(_sweep_state["panel"], _sweep_state["signal"], params, _sweep_state["costs"]).stats()
+
+
+def _parse_grid(items):
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        grid[name] = [float(value) if "." in value else int(value) for value in values.split(",")]
+    return grid
+
+
+if __name__ == "__main__":
+    from db_adapter import SQLAlchemyAdapter
+    from panel import PANEL_MODELS, load_panel
+    from processor import get_model_mapping
+
+    arg_parser = argparse.ArgumentParser(description="Backtest a signal over stored bhavcopy history.")
+    arg_parser.add_argument("--signal", choices=list(SIGNALS), default="sma_crossover")
+    arg_parser.add_argument("--grid", nargs="*", default=[], metavar="PARAM=V1,V2",
+                            help="Parameter values to sweep, e.g. fast=10,20 slow=50,100")
+    arg_parser.add_argument("--model", choices=PANEL_MODELS, default="PdRecord")
+    arg_parser.add_argument("--start", type=date.fromisoformat, default=None, help="First date, YYYY-MM-DD")
+    arg_parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last date, YYYY-MM-DD")
+    arg_parser.add_argument("--commission-bps", type=float, default=3.0)
+    arg_parser.add_argument("--slippage-bps", type=float, default=5.0)
+    arg_parser.add_argument("--workers", type=int, default=1)
+    arg_parser.add_argument("--db-config", default="db_config.json")
+    args = arg_parser.parse_args()
+
+    panel = load_panel(SQLAlchemyAdapter.from_config(args.db_config), get_model_mapping()[args.model],
+                       args.start, args.end)
+    logging.info(f"Loaded {len(panel.symbols)} symbols x {panel.length} days")
+    costs = Costs(args.commission_bps, args.slippage_bps)
+    for params, stats in sweep(panel, SIGNALS[args.signal], _parse_grid(args.grid) or [{}], costs, args.workers):
+        print(f"{params}: " + ", ".join(f"{name}={value:.4f}" if isinstance(value, float) else f"{name}={value}"
+                                       for name, value in stats.items()))
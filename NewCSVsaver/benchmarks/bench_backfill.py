@@ -0,0 +1,78 @@
+"""
+Backfill throughput against a local stand-in for the NSE archive server.
+
+Serves a small generated PR zip for every /PRddmmyy.zip path (with an
+optional per-request latency to mimic the real server) and reports
+archives/minute for a range of worker counts.
+
+    python benchmarks/bench_backfill.py --start 2024-01-01 --end 2024-12-31 --latency 0.05
+"""
+import argparse
+import io
+import logging
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backfill import run_backfill  # noqa: E402
+
+
+def _make_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("Pd010124.csv", "MKT,SERIES,SYMBOL,SECURITY,CLOSE_PRICE\n" + "N,EQ,ABC,ABC LTD,100.5\n" * 2000)
+    return buffer.getvalue()
+
+
+def start_server(latency):
+    payload = _make_archive()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            if not self.path.rsplit("/", 1)[-1].startswith("PR"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--start", default="2024-01-01")
+    arg_parser.add_argument("--end", default="2024-12-31")
+    arg_parser.add_argument("--latency", type=float, default=0.05, help="Seconds of simulated server latency")
+    arg_parser.add_argument("--workers", default="1,4,8,16")
+    args = arg_parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    start = datetime.strptime(args.start, "%Y-%m-%d").date()
+    end = datetime.strptime(args.end, "%Y-%m-%d").date()
+    server = start_server(args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/archives"
+
+    print(f"{'workers':>8} {'archives':>9} {'seconds':>8} {'archives/min':>13}")
+    for workers in [int(w) for w in args.workers.split(",")]:
+        with tempfile.TemporaryDirectory() as out_dir:
+            summary = run_backfill(start, end, out_dir=out_dir, workers=workers, rate=0, base_url=base_url)
+        print(f"{workers:>8} {summary['downloaded']:>9} {summary['seconds']:>8.2f} {summary['archives_per_minute']:>13,.0f}")
+
+    server.shutdown()
@@ -0,0 +1,49 @@
+"""
+Backtester throughput on a synthetic panel.
+
+    single   one sma_crossover backtest (symbol-days per second)
+    sweep    a 12-combination grid, serially and across a process pool
+
+    python benchmarks/bench_backtest.py --symbols 2000 --days 2500 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from backtest import run_backtest, sma_crossover, sweep  # noqa: E402
+from bench_indicators import synthetic_fields  # noqa: E402
+from panel import Panel  # noqa: E402
+
+GRID = {"fast": [5, 10, 20, 40], "slow": [50, 100, 200]}
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--symbols", type=int, default=2000)
+    arg_parser.add_argument("--days", type=int, default=2500)
+    arg_parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = arg_parser.parse_args()
+
+    dates = np.datetime64("2015-01-01") + np.arange(args.days)
+    panel = Panel([f"SYM{i:05d}" for i in range(args.symbols)], dates, synthetic_fields(args.symbols, args.days))
+
+    started = time.perf_counter()
+    run_backtest(panel, sma_crossover)
+    single = time.perf_counter() - started
+    print(f"single backtest: {single:.2f}s ({args.symbols * args.days / single:,.0f} symbol-days/sec)")
+
+    runs = len(GRID["fast"]) * len(GRID["slow"])
+    for workers in sorted({1, args.workers}):
+        started = time.perf_counter()
+        best_params, best_stats = sweep(panel, sma_crossover, GRID, workers=workers)[0]
+        elapsed = time.perf_counter() - started
+        print(f"sweep of {runs} with {workers} worker(s): {elapsed:.2f}s, "
+              f"best {best_params} (sharpe {best_stats['sharpe']:.2f})")
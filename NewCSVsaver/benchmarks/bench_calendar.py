@@ -0,0 +1,97 @@
+"""
+Trading-calendar lookups over a 20-year range.
+
+    before  the old day-by-day walk with "%Y-%m-%d" string membership tests
+    after   trading_calendar.TradingCalendar (bisection over precomputed days)
+
+    python benchmarks/bench_calendar.py --years 20 --queries 20000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from trading_calendar import TradingCalendar  # noqa: E402
+
+
+def synthetic_holidays(first_year, last_year, seed=0):
+    """About 15 weekday holidays a year, like the real NSE lists."""
+    rng = random.Random(seed)
+    holidays = []
+    for year in range(first_year, last_year + 1):
+        days = [date(year, 1, 1) + timedelta(days=i) for i in range(365)]
+        holidays += rng.sample([d for d in days if d.weekday() < 5], 15)
+    return sorted(holidays)
+
+
+class OldCalendar:
+    """The previous implementation: a holiday string list and a day-by-day walk."""
+    def __init__(self, holidays):
+        self.holidays = [d.strftime("%Y-%m-%d") for d in holidays]
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day.strftime("%Y-%m-%d") not in self.holidays
+
+    def previous_trading_day(self, day):
+        previous_day = day - timedelta(days=1)
+        while not self.is_trading_day(previous_day):
+            previous_day -= timedelta(days=1)
+        return previous_day
+
+    def nth_trading_day_back(self, n, day):
+        for _ in range(n):
+            day = self.previous_trading_day(day)
+        return day
+
+    def trading_days(self, start, end):
+        days = []
+        while start <= end:
+            if self.is_trading_day(start):
+                days.append(start)
+            start += timedelta(days=1)
+        return days
+
+
+def timed(func, args_list):
+    started = time.perf_counter()
+    results = [func(*args) for args in args_list]
+    return results, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--years", type=int, default=20)
+    arg_parser.add_argument("--queries", type=int, default=20_000)
+    args = arg_parser.parse_args()
+
+    last_year = 2025
+    first_year = last_year - args.years + 1
+    holidays = synthetic_holidays(first_year, last_year)
+
+    started = time.perf_counter()
+    new = TradingCalendar(holidays, first_year - 1, last_year + 1, covered_years=range(first_year - 1, last_year + 2))
+    print(f"built calendar ({len(new._days)} trading days) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    old = OldCalendar(holidays)
+
+    rng = random.Random(1)
+    span = (date(last_year, 12, 31) - date(first_year, 1, 1)).days
+    days = [date(first_year, 1, 1) + timedelta(days=rng.randrange(30, span)) for _ in range(args.queries)]
+    cases = [
+        ("previous_trading_day", [(d,) for d in days]),
+        ("nth_trading_day_back(20)", [(20, d) for d in days]),
+        ("trading_days(full range)", [(date(first_year, 1, 1), date(last_year, 12, 31))] * 5),
+    ]
+
+    print(f"{'query':>26} {'calls':>6} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+    for name, args_list in cases:
+        method = name.split("(")[0]
+        before, before_s = timed(getattr(old, method), args_list)
+        after, after_s = timed(getattr(new, method), args_list)
+        assert before == after, f"{name}: results differ"
+        print(f"{name:>26} {len(args_list):>6} {before_s * 1000:>10.1f} {after_s * 1000:>9.1f} "
+              f"{before_s / after_s:>7.0f}x")
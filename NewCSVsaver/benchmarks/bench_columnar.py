@@ -0,0 +1,92 @@
+"""
+Single-symbol history reads: SQLite (lookup index) vs the columnar archive.
+
+Builds ``--years`` of synthetic Pd days with ``--symbols`` rows each, loads
+them into both stores and times reading the whole history of one symbol.
+
+    python benchmarks/bench_columnar.py --years 10 --symbols 500
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from columnar import ColumnarStore  # noqa: E402
+from db_adapter import SQLAlchemyAdapter  # noqa: E402
+from models import PdRecord  # noqa: E402
+from partitioning import select_date_range  # noqa: E402
+from processor import directory_sources, process_files  # noqa: E402
+from synthetic import file_name, write_csv  # noqa: E402
+
+
+def weekdays(years):
+    day = date(2025, 6, 4) - timedelta(days=365 * years)
+    while day <= date(2025, 6, 4):
+        if day.weekday() < 5:
+            yield day
+        day += timedelta(days=1)
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--years", type=int, default=10)
+    arg_parser.add_argument("--symbols", type=int, default=500)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_dir = os.path.join(tmp_dir, "files")
+        os.mkdir(csv_dir)
+        days = list(weekdays(args.years))
+        for i, day in enumerate(days):
+            with open(os.path.join(csv_dir, file_name("Pd", day)), "w", newline="") as f:
+                write_csv(f, "Pd", args.symbols, seed=i, trade_date=day)
+
+        db_config_path = os.path.join(tmp_dir, "db_config.json")
+        with open(db_config_path, "w") as f:
+            json.dump({"db_type": "sqlite", "sqlite": {"db_path": os.path.join(tmp_dir, "bench.db")}}, f)
+        started = time.perf_counter()
+        process_files(csv_dir, db_config_path)
+        print(f"loaded {len(days)} days x {args.symbols} rows into SQLite in {time.perf_counter() - started:.1f}s")
+
+        store = ColumnarStore(os.path.join(tmp_dir, "history"))
+        started = time.perf_counter()
+        store.add_sources(directory_sources(csv_dir))
+        for year in store.open_years("Pd"):
+            store.compact("Pd", year)
+        print(f"archived and compacted in {time.perf_counter() - started:.1f}s")
+
+        adapter = SQLAlchemyAdapter.from_config(db_config_path)
+        symbol = "SYM00042"
+
+        def read_db():
+            return len(select_date_range(adapter.engine, PdRecord, days[0], days[-1], adapter.partitioning,
+                                         symbol=symbol))
+
+        def read_columnar():
+            return len(store.read_range("Pd", symbol, columns=["bhav_date", "close_price"])["bhav_date"])
+
+        print(f"{'store':>9} {'rows':>6} {'ms':>8}")
+        for name, func in [("sqlite", read_db), ("columnar", read_columnar)]:
+            rows, seconds = best_time(func, args.repeat)
+            print(f"{name:>9} {rows:>6} {seconds * 1000:>8.2f}")
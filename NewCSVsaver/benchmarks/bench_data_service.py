@@ -0,0 +1,84 @@
+"""
+Load test of the data service: queries/sec with many concurrent clients.
+
+A DataService serves a synthetic symbols x days panel from this process;
+each client process keeps one connection open and alternates
+
+    snapshot   --snapshot-symbols symbols on the latest day
+    range      --range-symbols symbols over the last --range-days days
+
+for --seconds. Reports the combined queries/sec and per-query latency
+percentiles at each concurrency level.
+
+    python benchmarks/bench_data_service.py --clients 1 4 16 --seconds 5
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from bench_indicators import synthetic_fields  # noqa: E402
+from data_service import DataClient, DataService  # noqa: E402
+from panel import Panel  # noqa: E402
+
+
+def run_client(path, symbols, args, seed):
+    rng = np.random.default_rng(seed)
+    latencies = []
+    deadline = time.perf_counter() + args.seconds
+    with DataClient(path) as client:
+        dates = client.range(symbols[:1])[1]
+        start = dates[max(0, len(dates) - args.range_days)].astype(object)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if len(latencies) % 2:
+                client.range(list(rng.choice(symbols, args.range_symbols, replace=False)), start=start)
+            else:
+                client.snapshot(list(rng.choice(symbols, args.snapshot_symbols, replace=False)))
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--symbols", type=int, default=2000)
+    arg_parser.add_argument("--days", type=int, default=250)
+    arg_parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    arg_parser.add_argument("--seconds", type=float, default=5.0)
+    arg_parser.add_argument("--snapshot-symbols", type=int, default=500)
+    arg_parser.add_argument("--range-symbols", type=int, default=20)
+    arg_parser.add_argument("--range-days", type=int, default=60)
+    args = arg_parser.parse_args()
+
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+    dates = np.datetime64("2024-06-01") + np.arange(args.days)
+    panel = Panel(symbols, dates, synthetic_fields(args.symbols, args.days))
+    service = DataService(models=["PdRecord"], panels={"PdRecord": panel})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.sock")
+        server = service.server(path)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        for clients in args.clients:
+            with multiprocessing.Pool(clients) as pool:
+                started = time.perf_counter()
+                results = pool.starmap(run_client, [(path, symbols, args, seed) for seed in range(clients)])
+                elapsed = time.perf_counter() - started
+            latencies = np.concatenate([np.array(result) for result in results]) * 1000
+            p50, p99 = np.percentile(latencies, [50, 99])
+            print(f"{clients:>3} clients: {len(latencies) / elapsed:,.0f} queries/sec, "
+                  f"p50 {p50:.2f} ms, p99 {p99:.2f} ms")
+        server.shutdown()
+        server.server_close()
+        print(f"{service.counters['requests']} requests, {service.counters['bytes_sent'] / 1e6:.1f} MB sent")
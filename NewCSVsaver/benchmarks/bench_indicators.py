@@ -0,0 +1,71 @@
+"""
+Indicator engine cost on a synthetic symbol-by-date panel.
+
+    compute   every default indicator over the full history
+    recompute what a new trading day costs without incremental state
+              (compute again over history + 1 day)
+    update    the same day through IndicatorEngine.update()
+
+    python benchmarks/bench_indicators.py --symbols 2000 --days 2500
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+from indicators import IndicatorEngine  # noqa: E402
+from panel import Panel  # noqa: E402
+
+
+def synthetic_fields(symbols, days, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (symbols, days)), axis=1))
+    volume = rng.integers(100, 1_000_000, (symbols, days)).astype(float)
+    fields = {
+        "close": close,
+        "high": close * (1 + rng.random((symbols, days)) * 0.02),
+        "low": close * (1 - rng.random((symbols, days)) * 0.02),
+        "volume": volume,
+        "value": volume * close,
+    }
+    # About 2% of symbol-days did not trade.
+    gaps = rng.random((symbols, days)) < 0.02
+    for values in fields.values():
+        values[gaps] = np.nan
+    return fields
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--symbols", type=int, default=2000)
+    arg_parser.add_argument("--days", type=int, default=2500)
+    args = arg_parser.parse_args()
+
+    fields = synthetic_fields(args.symbols, args.days + 1)
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+    dates = np.datetime64("2015-01-01") + np.arange(args.days + 1)
+    history = Panel(symbols, dates[:-1], {name: values[:, :-1] for name, values in fields.items()})
+
+    engine = IndicatorEngine()
+    started = time.perf_counter()
+    engine.compute(history)
+    compute = time.perf_counter() - started
+
+    started = time.perf_counter()
+    IndicatorEngine().compute(Panel(symbols, dates, fields))
+    recompute = time.perf_counter() - started
+
+    history.append_day(dates[-1], symbols, {name: values[:, -1] for name, values in fields.items()})
+    started = time.perf_counter()
+    engine.update(history)
+    update = time.perf_counter() - started
+
+    print(f"{args.symbols} symbols x {args.days} days, {len(engine.indicators)} indicators")
+    print(f"{'compute':>10} {compute * 1000:>10.1f} ms")
+    print(f"{'recompute':>10} {recompute * 1000:>10.1f} ms")
+    print(f"{'update':>10} {update * 1000:>10.1f} ms  ({recompute / update:,.0f}x faster than recompute)")
@@ -0,0 +1,205 @@
+"""
+End-to-end ingest benchmark: download -> unzip -> parse -> transform -> insert.
+
+A synthetic PR{ddmmyy}.zip with one file for every prefix in
+FILE_TYPE_CONFIG is served over HTTP from a local server, then each
+backend runs in its own subprocess (so peak RSS is per backend),
+downloads it and loads it through process_archive(), the code path
+main.py uses, and reports:
+
+    stages       seconds spent in each metrics span the pipeline records
+                 (see metrics.STAGES): downloading, opening the ZIP
+                 members, splitting CSV rows (parse), building column
+                 dicts (transform), inserting (insert, including the
+                 symbol dictionary encoding) and committing
+    end_to_end   wall-clock rows/sec of the process_archive() call
+    peak_rss_mb  ru_maxrss of the backend's process
+
+SQLite always runs. For MySQL pass a db_config.json pointing at a local
+server, e.g. one started with
+
+    docker run -d -p 3306:3306 -e MYSQL_ROOT_PASSWORD=bench -e MYSQL_DATABASE=bhav mysql:8
+
+The benchmark empties the bhavcopy tables of that database.
+
+Results are written as JSON (default benchmarks/results/ingest-<timestamp>.json);
+``--compare`` prints the rows/sec change against an earlier result file.
+
+    python benchmarks/bench_ingest.py --rows 50000
+    python benchmarks/bench_ingest.py --rows 50000 --mysql-config mysql_bench.json --compare results/old.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+import metrics  # noqa: E402
+
+STAGES = list(metrics.STAGES)
+TRADE_DATE = date(2025, 6, 4)
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory):
+    """Starts a local HTTP server for ``directory``; returns (server, base URL)."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def empty_tables(db_adapter):
+    from models import Base, SchemaVersion
+
+    tables = [table for table in Base.metadata.sorted_tables if table is not SchemaVersion.__table__]
+    with db_adapter.engine.begin() as connection:
+        for table in reversed(tables):
+            connection.execute(table.delete())
+
+
+def run_backend(backend, url, db_config_path, mode):
+    import logging
+    import requests
+    from processor import _open_adapter, process_archive
+
+    logging.getLogger().setLevel(logging.WARNING)
+    db_adapter = _open_adapter(db_config_path)
+    empty_tables(db_adapter)
+
+    run = metrics.start_run()
+    with metrics.span("download", file=url.rsplit("/", 1)[-1]):
+        response = requests.get(url, timeout=30)
+    response.raise_for_status()
+
+    started = time.perf_counter()
+    table_stats = process_archive(response.content, db_config_path, mode=mode)
+    end_to_end = time.perf_counter() - started
+    rows = sum(count for count, *_ in table_stats.values())
+
+    totals = run.stage_totals()
+    stages = {stage: totals.get(stage, [0, 0.0])[1] for stage in STAGES}
+    staged_seconds = sum(stages.values())
+
+    return {
+        "backend": backend,
+        "mode": mode,
+        "rows": rows,
+        "stages": {stage: round(seconds, 4) for stage, seconds in stages.items()},
+        "rows_per_sec": round(rows / staged_seconds) if staged_seconds else None,
+        "end_to_end_rows": rows,
+        "end_to_end_seconds": round(end_to_end, 4),
+        "end_to_end_rows_per_sec": round(rows / end_to_end) if end_to_end else None,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, previous_path):
+    with open(previous_path) as f:
+        previous = {result["backend"]: result for result in json.load(f)["results"]}
+    print(f"\nrows/sec vs {previous_path}:")
+    for result in results:
+        before = previous.get(result["backend"])
+        if not before or not before.get("end_to_end_rows_per_sec"):
+            print(f"  {result['backend']:>7}  no earlier result")
+            continue
+        change = (result["end_to_end_rows_per_sec"] / before["end_to_end_rows_per_sec"] - 1) * 100
+        print(f"  {result['backend']:>7}  {before['end_to_end_rows_per_sec']:>9,} -> "
+              f"{result['end_to_end_rows_per_sec']:>9,}  ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=50_000, help="Rows per file in the synthetic archive")
+    arg_parser.add_argument("--mode", choices=["bulk", "upsert", "orm"], default="bulk")
+    arg_parser.add_argument("--mysql-config", help="db_config.json of a local MySQL server to benchmark as well")
+    arg_parser.add_argument("--output", help="JSON result file (default: benchmarks/results/ingest-<timestamp>.json)")
+    arg_parser.add_argument("--compare", help="Earlier JSON result file to compare rows/sec against")
+    arg_parser.add_argument("--backend", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--url", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--db-config", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.backend:
+        print(json.dumps(run_backend(args.backend, args.url, args.db_config, args.mode)))
+        sys.exit(0)
+
+    from synthetic import PREFIXES, make_archive
+
+    run_started = datetime.now()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        archive_name = f"PR{TRADE_DATE.strftime('%d%m%y')}.zip"
+        with open(os.path.join(tmp_dir, archive_name), "wb") as f:
+            archive_bytes = f.write(make_archive(args.rows, trade_date=TRADE_DATE))
+        server, base_url = serve_directory(tmp_dir)
+
+        sqlite_config = os.path.join(tmp_dir, "sqlite_config.json")
+        with open(sqlite_config, "w") as f:
+            json.dump({"db_type": "sqlite", "sqlite": {"db_path": os.path.join(tmp_dir, "bench.db")}}, f)
+        backends = [("sqlite", sqlite_config)]
+        if args.mysql_config:
+            backends.append(("mysql", os.path.abspath(args.mysql_config)))
+
+        print(f"{'backend':>7} {'rows':>9} " + " ".join(f"{stage:>9}" for stage in STAGES)
+              + f" {'rows/s':>9} {'e2e rows/s':>11} {'peak RSS MB':>12}")
+        try:
+            for backend, db_config_path in backends:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--backend", backend, "--url", f"{base_url}/{archive_name}",
+                     "--db-config", db_config_path, "--mode", args.mode],
+                    cwd=tmp_dir, check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                results.append(result)
+                print(f"{backend:>7} {result['rows']:>9} "
+                      + " ".join(f"{result['stages'][stage]:>9.3f}" for stage in STAGES)
+                      + f" {result['rows_per_sec']:>9,} {result['end_to_end_rows_per_sec']:>11,}"
+                      + f" {result['peak_rss_mb']:>12.1f}")
+        finally:
+            server.shutdown()
+
+    report = {
+        "benchmark": "ingest",
+        "started": run_started.isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows_per_file": args.rows,
+        "files": len(PREFIXES),
+        "archive_bytes": archive_bytes,
+        "results": results,
+    }
+    output_path = args.output or HERE / "results" / f"ingest-{run_started.strftime('%Y%m%d-%H%M%S')}.json"
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output_path}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
@@ -0,0 +1,90 @@
+"""
+Peak memory of whole-file parsing vs chunked parsing on a synthetic Pd file.
+
+    whole    CsvParser.parse(): the full converted row list
+    chunked  CsvParser.iter_chunks(), one chunk alive at a time
+    load     process_files() into SQLite with per-chunk commits
+
+Each variant runs in its own subprocess; peak RSS comes from ru_maxrss.
+
+    python benchmarks/bench_memory.py --rows 5000000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+VARIANTS = ["whole", "chunked", "load"]
+
+
+def run_variant(variant, csv_dir, work_dir):
+    import logging
+    from processor import CsvParser, FILE_TYPE_CONFIG, match_file, process_files
+
+    logging.getLogger().setLevel(logging.WARNING)
+    file_name = os.listdir(csv_dir)[0]
+    file_path = os.path.join(csv_dir, file_name)
+    file_def = match_file(file_name, FILE_TYPE_CONFIG)
+    parser = CsvParser()
+
+    started = time.perf_counter()
+    rows = 0
+    if variant == "whole":
+        rows = len(parser.parse(file_path, file_def))
+    elif variant == "chunked":
+        for chunk in parser.iter_chunks(file_path, file_def, 2000):
+            rows += len(chunk)
+    else:
+        db_config_path = os.path.join(work_dir, "db_config.json")
+        with open(db_config_path, "w") as f:
+            json.dump({"db_type": "sqlite", "sqlite": {"db_path": os.path.join(work_dir, "bench.db")}}, f)
+        stats = process_files(csv_dir, db_config_path)
+        rows = sum(count for count, *_ in stats.values())
+    elapsed = time.perf_counter() - started
+
+    return {
+        "variant": variant,
+        "rows": rows,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=5_000_000)
+    arg_parser.add_argument("--variants", default=",".join(VARIANTS))
+    arg_parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    arg_parser.add_argument("--csv-dir", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.csv_dir, args.work_dir)))
+        sys.exit(0)
+
+    from synthetic import file_name, write_csv
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_dir = os.path.join(tmp_dir, "files")
+        os.mkdir(csv_dir)
+        with open(os.path.join(csv_dir, file_name("Pd")), "w", newline="") as f:
+            write_csv(f, "Pd", args.rows)
+
+        print(f"{'variant':>8} {'rows':>9} {'seconds':>8} {'peak RSS MB':>12}")
+        for variant in args.variants.split(","):
+            output = subprocess.run(
+                [sys.executable, __file__, "--variant", variant, "--csv-dir", csv_dir, "--work-dir", tmp_dir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{variant:>8} {result['rows']:>9} {result['seconds']:>8.2f} {result['peak_rss_mb']:>12.1f}")
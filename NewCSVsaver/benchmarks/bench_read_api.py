@@ -0,0 +1,66 @@
+"""
+ReadAPI latency on a SQLite database of synthetic Pr and MCAP files.
+
+    cold     latest_close for --keys securities with an empty cache
+    warm     the same call answered from the cache
+    direct   the same batched query with the cache bypassed
+
+    python benchmarks/bench_read_api.py --symbols 2000 --days 20 --keys 500
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from db_adapter import SQLAlchemyAdapter  # noqa: E402
+from processor import process_archive  # noqa: E402
+from read_api import ReadAPI  # noqa: E402
+from synthetic import make_archive  # noqa: E402
+
+
+def timed(call, repeat=1):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--symbols", type=int, default=2000)
+    arg_parser.add_argument("--days", type=int, default=20)
+    arg_parser.add_argument("--keys", type=int, default=500)
+    arg_parser.add_argument("--partitioned", action="store_true")
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "db_config.json")
+        with open(config_path, "w") as f:
+            json.dump({"db_type": "sqlite", "sqlite": {"db_path": os.path.join(tmp, "bench.db")},
+                       "partitioning": {"enabled": args.partitioned, "granularity": "month"}}, f)
+        first_day = date(2025, 5, 1)
+        for day in range(args.days):
+            process_archive(make_archive(args.symbols, prefixes=["Pr", "MCAP"], seed=day,
+                                         trade_date=first_day + timedelta(days=day)), config_path)
+
+        db_adapter = SQLAlchemyAdapter.from_config(config_path)
+        api = ReadAPI(db_adapter)
+        uncached = ReadAPI(db_adapter, max_entries=0)
+        # Pr files are keyed by security name (see synthetic.make_row).
+        securities = [f"SYM{i:05d} LIMITED" for i in range(args.keys)]
+        print(f"cold:   {timed(lambda: api.latest_close(securities)):.2f} ms for {args.keys} keys")
+        print(f"warm:   {timed(lambda: api.latest_close(securities), 100):.3f} ms")
+        print(f"direct: {timed(lambda: uncached.latest_close(securities), 10):.2f} ms")
+        stats = api.stats()
+        latency = stats["latency_ms"]["latest_close"]
+        print(f"hit rate {stats['hit_rate']:.1%}, p50 {latency['p50']:.3f} ms, p99 {latency['p99']:.3f} ms")
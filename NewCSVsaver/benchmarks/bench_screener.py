@@ -0,0 +1,66 @@
+"""
+Screener update and query cost on synthetic prices.
+
+    update   folding one day into ScreenerState (ms per day)
+    rescan   the same statistics recomputed from a full symbols x 252-day window
+    screen   one sorted, filtered screen answered from the state
+    save     writing and reloading the .npz state
+
+    python benchmarks/bench_screener.py --symbols 2000 --days 500
+"""
+import argparse
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from bench_indicators import synthetic_fields  # noqa: E402
+from screener import YEAR_WINDOW, ScreenerState  # noqa: E402
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--symbols", type=int, default=2000)
+    arg_parser.add_argument("--days", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    fields = synthetic_fields(args.symbols, args.days)
+    symbols = [f"SYM{i:05d}" for i in range(args.symbols)]
+    state = ScreenerState()
+
+    started = time.perf_counter()
+    for day in range(args.days):
+        state.update_day(date(2015, 1, 1) + timedelta(days=day), symbols, fields["close"][:, day],
+                         fields["high"][:, day], fields["low"][:, day], fields["volume"][:, day])
+    update = (time.perf_counter() - started) / args.days
+    print(f"update: {update * 1000:.2f} ms/day ({args.symbols / update:,.0f} symbols/sec)")
+
+    started = time.perf_counter()
+    window = slice(args.days - YEAR_WINDOW, args.days)
+    np.fmax.reduce(fields["high"][:, window], axis=1)
+    np.fmin.reduce(fields["low"][:, window], axis=1)
+    volumes = fields["volume"][:, args.days - 21:args.days - 1]
+    (fields["volume"][:, -1] - np.nanmean(volumes, axis=1)) / np.nanstd(volumes, axis=1)
+    print(f"rescan: {(time.perf_counter() - started) * 1000:.2f} ms/day")
+
+    started = time.perf_counter()
+    for _ in range(100):
+        state.screen("return_20", 50, minimum={"volume_z": 1.0}, maximum={"from_year_high": -0.05})
+    print(f"screen: {(time.perf_counter() - started) * 10:.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/state.npz"
+        started = time.perf_counter()
+        state.save(path)
+        saved = time.perf_counter() - started
+        started = time.perf_counter()
+        ScreenerState.load(path)
+        print(f"save: {saved * 1000:.1f} ms, load: {(time.perf_counter() - started) * 1000:.1f} ms "
+              f"({Path(path).stat().st_size / 1e6:.1f} MB)")
@@ -0,0 +1,89 @@
+"""
+Memory and start-up cost of sharing one panel between worker processes.
+
+A synthetic symbols x days panel is published once; each of --workers
+processes then gets the close/volume history either by
+
+    attach   SharedPanel.attach (read-only, no copy)
+    copy     attaching and copying the fields, as a private load would
+
+and computes a 20-day moving average over every symbol. Each worker
+reports how long it took to get the data and the private (unshared)
+memory it added for it, from /proc/self/smaps_rollup (Linux).
+
+    python benchmarks/bench_shared_panel.py --symbols 2000 --days 2500 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from bench_indicators import synthetic_fields  # noqa: E402
+from indicators import rolling_mean  # noqa: E402
+from panel import Panel  # noqa: E402
+from shared_panel import SharedPanel  # noqa: E402
+
+
+def private_mb():
+    private = 0
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                private += int(line.split()[1])
+    return private / 1024
+
+
+def run_worker(name, variant):
+    before = private_mb()
+    started = time.perf_counter()
+    shared = SharedPanel.attach(name)
+    close, volume = shared["close"], shared["volume"]
+    if variant == "copy":
+        close, volume = close.copy(), volume.copy()
+    ready = time.perf_counter() - started
+    # Touch every page so shared pages are mapped in before measuring.
+    checksum = float(close.sum() + volume.sum())
+    private = private_mb() - before
+    average = rolling_mean(close, 20)
+    result = (ready, private, checksum + float(np.nansum(average[:, -1])))
+    del close, volume, average
+    shared.close()
+    return result
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--symbols", type=int, default=2000)
+    arg_parser.add_argument("--days", type=int, default=2500)
+    arg_parser.add_argument("--workers", type=int, default=4)
+    args = arg_parser.parse_args()
+
+    dates = np.datetime64("2015-01-01") + np.arange(args.days)
+    fields = synthetic_fields(args.symbols, args.days)
+    panel = Panel([f"SYM{i:05d}" for i in range(args.symbols)], dates,
+                  {name: fields[name] for name in ("close", "volume")})
+    name = f"bench_panel_{os.getpid()}"
+
+    started = time.perf_counter()
+    shared = SharedPanel.publish(panel, name)
+    print(f"publish: {time.perf_counter() - started:.2f}s "
+          f"({2 * args.symbols * args.days * 8 / 1e6:.0f} MB of close/volume)")
+    try:
+        for variant in ("attach", "copy"):
+            with multiprocessing.Pool(args.workers) as pool:
+                results = pool.starmap(run_worker, [(name, variant)] * args.workers)
+            ready = max(result[0] for result in results)
+            private = sum(result[1] for result in results)
+            print(f"{variant:>6}: data ready in {ready * 1000:.1f} ms, "
+                  f"{private:.0f} MB private across {args.workers} workers")
+    finally:
+        shared.close()
+        shared.unlink()
@@ -0,0 +1,113 @@
+"""
+Start-up latency of the entry points, cold vs warm.
+
+For main.py and the Lambda handler this reports, each in a fresh
+interpreter:
+
+    import   time to import the entry module (heaviest imports listed from -X importtime)
+    cold     first load of a small archive (engine, schema check, models)
+    warm     the same call again in the same process (cached adapter)
+
+The download is replaced by a synthetic archive and the Lambda's object
+store by LocalObjectStore, so no network or AWS account is needed.
+
+    python benchmarks/bench_startup.py --rows 100
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+PACKAGE_DIR = HERE.parent
+LAMBDA_FILE = PACKAGE_DIR.parent / "LambdaBhavcopy"
+
+ENTRY_POINTS = ["main", "lambda"]
+
+# Runs inside the measured interpreter: import the entry point, then time two calls.
+CHILD = r"""
+import importlib.machinery, importlib.util, json, logging, sys, time
+sys.path[:0] = [{package!r}, {benchmarks!r}]
+entry, rows = {entry!r}, {rows!r}
+
+started = time.perf_counter()
+if entry == "main":
+    import main
+    from processor import process_archive
+else:
+    loader = importlib.machinery.SourceFileLoader("lambda_bhavcopy", {lambda_file!r})
+    spec = importlib.util.spec_from_loader("lambda_bhavcopy", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+imported = time.perf_counter() - started
+logging.getLogger().setLevel(logging.WARNING)
+
+from synthetic import make_archive
+content = make_archive(rows)
+if entry == "main":
+    call = lambda: process_archive(content, mode="upsert")
+else:
+    import requests
+    from object_store import LocalObjectStore
+
+    class Response:
+        status_code = 200
+    Response.content = content
+    requests.get = lambda *args, **kwargs: Response()
+    store = LocalObjectStore("store")
+    call = lambda: module.lambda_handler({{}}, None, store=store)
+
+timings = []
+for _ in range(2):
+    started = time.perf_counter()
+    call()
+    timings.append(time.perf_counter() - started)
+print(json.dumps({{"import": imported, "cold": timings[0], "warm": timings[1]}}))
+"""
+
+
+def heaviest_imports(stderr, count=5):
+    """The top-level imports with the largest cumulative time, from -X importtime output."""
+    top = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented by two more spaces per level.
+        if cumulative.strip().isdigit() and len(name) - len(name.lstrip()) == 1:
+            top.append((int(cumulative), name.strip()))
+    return sorted(top, reverse=True)[:count]
+
+
+def run_entry(entry, rows, work_dir):
+    with open(os.path.join(work_dir, "db_config.json"), "w") as f:
+        json.dump({"db_type": "sqlite", "sqlite": {"db_path": os.path.join(work_dir, "bench.db")}}, f)
+    code = CHILD.format(package=str(PACKAGE_DIR), benchmarks=str(HERE), entry=entry, rows=rows,
+                        lambda_file=str(LAMBDA_FILE))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=work_dir, check=True, capture_output=True, text=True)
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return timings, heaviest_imports(result.stderr)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=100, help="Rows per file in the synthetic archive")
+    args = arg_parser.parse_args()
+
+    print(f"{'entry':>7} {'import ms':>10} {'cold ms':>8} {'warm ms':>8}")
+    details = []
+    for entry in ENTRY_POINTS:
+        with tempfile.TemporaryDirectory() as work_dir:
+            timings, top = run_entry(entry, args.rows, work_dir)
+        print(f"{entry:>7} {timings['import'] * 1000:>10.1f} {timings['cold'] * 1000:>8.1f} "
+              f"{timings['warm'] * 1000:>8.1f}")
+        details.append((entry, top))
+
+    for entry, top in details:
+        print(f"\nheaviest imports during the {entry} run (-X importtime, cumulative ms):")
+        for cumulative, name in top:
+            print(f"  {cumulative / 1000:>8.1f}  {name}")
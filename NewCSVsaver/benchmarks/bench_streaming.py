@@ -0,0 +1,91 @@
+"""
+Peak RSS and wall-clock: extract-to-disk vs streaming straight from the ZIP.
+
+Each variant runs in its own subprocess so peak RSS is not shared:
+
+    extract  ZipFile.extractall() into a directory, then process_files()
+    stream   process_archive() on the archive path (memory-mapped)
+    bytes    process_archive() on the downloaded bytes (the Lambda case)
+
+    python benchmarks/bench_streaming.py --rows 200000
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+VARIANTS = ["extract", "stream", "bytes"]
+
+
+def run_variant(variant, zip_path, work_dir):
+    import logging
+    from processor import process_archive, process_files
+
+    logging.getLogger().setLevel(logging.WARNING)
+    db_config_path = os.path.join(work_dir, "db_config.json")
+    with open(db_config_path, "w") as f:
+        json.dump({"db_type": "sqlite", "sqlite": {"db_path": os.path.join(work_dir, f"{variant}.db")}}, f)
+
+    started = time.perf_counter()
+    if variant == "extract":
+        extract_path = os.path.join(work_dir, "extracted_files")
+        with zipfile.ZipFile(zip_path) as z:
+            z.extractall(extract_path)
+        stats = process_files(extract_path, db_config_path)
+    elif variant == "stream":
+        stats = process_archive(zip_path, db_config_path)
+    else:
+        with open(zip_path, "rb") as f:
+            content = f.read()
+        stats = process_archive(content, db_config_path)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "variant": variant,
+        "rows": sum(rows for rows, *_ in stats.values()),
+        "seconds": round(elapsed, 3),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=200_000, help="Rows per Pd/Pr/MCAP file")
+    arg_parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    arg_parser.add_argument("--zip", help=argparse.SUPPRESS)
+    arg_parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.zip, args.work_dir)))
+        sys.exit(0)
+
+    from synthetic import make_archive
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        zip_path = os.path.join(tmp_dir, "PR040625.zip")
+        with open(zip_path, "wb") as f:
+            f.write(make_archive({"Pd": args.rows, "Pr": args.rows, "MCAP": args.rows},
+                                 prefixes=["Pd", "Pr", "MCAP"]))
+
+        print(f"{'variant':>8} {'rows':>9} {'seconds':>8} {'peak RSS MB':>12}")
+        for variant in VARIANTS:
+            work_dir = os.path.join(tmp_dir, variant)
+            os.mkdir(work_dir)
+            output = subprocess.run(
+                [sys.executable, __file__, "--variant", variant, "--zip", zip_path, "--work-dir", work_dir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{variant:>8} {result['rows']:>9} {result['seconds']:>8.2f} {result['peak_rss_mb']:>12.1f}")
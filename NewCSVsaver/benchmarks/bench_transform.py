@@ -0,0 +1,61 @@
+"""
+Rows/sec of the row transform for each of the 11 bhavcopy file types.
+
+    before  csv.DictReader + process_row_keys (per-row header normalisation)
+    after   CsvParser.iter_chunks: csv.reader + a RowPlan compiled once per file
+
+    python benchmarks/bench_transform.py --rows 100000
+"""
+import argparse
+import csv
+import io
+import logging
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from processor import FILE_TYPE_CONFIG, CsvParser, process_row_keys  # noqa: E402
+from synthetic import make_csv  # noqa: E402
+
+
+def run_before(text, file_def):
+    rows = 0
+    for row in csv.DictReader(io.StringIO(text, newline=""), delimiter=file_def["delimiter"]):
+        process_row_keys(row, file_def)
+        rows += 1
+    return rows
+
+
+def run_after(text, file_def):
+    rows = 0
+    for chunk in CsvParser().iter_chunks(io.StringIO(text, newline=""), file_def, 2000):
+        rows += len(chunk)
+    return rows
+
+
+def best_rate(func, text, file_def, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = func(text, file_def)
+        best = min(best, time.perf_counter() - started)
+    return rows / best
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    print(f"{'prefix':>9} {'before rows/s':>14} {'after rows/s':>13} {'speedup':>8}")
+    for file_def in FILE_TYPE_CONFIG:
+        text = make_csv(file_def["prefix"], args.rows)
+        before = best_rate(run_before, text, file_def, args.repeat)
+        after = best_rate(run_after, text, file_def, args.repeat)
+        print(f"{file_def['prefix']:>9} {before:>14,.0f} {after:>13,.0f} {after / before:>7.2f}x")
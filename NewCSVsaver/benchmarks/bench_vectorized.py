@@ -0,0 +1,79 @@
+"""
+Checks that the numpy/arrow parser backends produce exactly the rows
+CsvParser produces for every file type, then reports rows/sec per backend.
+
+    python benchmarks/bench_vectorized.py --rows 200000
+"""
+import argparse
+import io
+import logging
+import math
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+from processor import FILE_TYPE_CONFIG, get_parser  # noqa: E402
+from synthetic import make_csv  # noqa: E402
+
+BACKENDS = ["csv", "numpy", "arrow"]
+
+
+def read_rows(backend, text, file_def):
+    # Every backend gets the same text stream, as ZIP members are handed to them.
+    rows = []
+    for chunk in get_parser(backend).iter_chunks(io.StringIO(text, newline=""), file_def, 5000):
+        rows.extend(chunk)
+    return rows
+
+
+def same_rows(expected, actual):
+    if len(expected) != len(actual):
+        return False
+    for left, right in zip(expected, actual):
+        if left.keys() != right.keys():
+            return False
+        for key, value in left.items():
+            other = right[key]
+            if isinstance(value, float) and isinstance(other, float):
+                if not (value == other or (math.isnan(value) and math.isnan(other))):
+                    return False
+            elif value != other or type(value) is not type(other):
+                return False
+    return True
+
+
+def rate(backend, text, file_def):
+    started = time.perf_counter()
+    rows = 0
+    source = io.BytesIO(text.encode()) if backend == "arrow" else io.StringIO(text, newline="")
+    for chunk in get_parser(backend).iter_chunks(source, file_def, 5000):
+        if hasattr(chunk, "column_lists"):
+            chunk.column_lists()
+        rows += len(chunk)
+    return rows / (time.perf_counter() - started)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--check-rows", type=int, default=2_000)
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    print(f"{'prefix':>9} {'same rows':>10} " + " ".join(f"{b + ' rows/s':>14}" for b in BACKENDS))
+    failed = False
+    for file_def in FILE_TYPE_CONFIG:
+        sample = make_csv(file_def["prefix"], args.check_rows)
+        expected = read_rows("csv", sample, file_def)
+        same = all(same_rows(expected, read_rows(backend, sample, file_def)) for backend in BACKENDS[1:])
+        failed |= not same
+
+        text = make_csv(file_def["prefix"], args.rows)
+        rates = [rate(backend, text, file_def) for backend in BACKENDS]
+        print(f"{file_def['prefix']:>9} {'yes' if same else 'NO':>10} " + " ".join(f"{r:>14,.0f}" for r in rates))
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,128 @@
+"""
+Synthetic bhavcopy files for benchmarks.
+
+Every prefix in processor.FILE_TYPE_CONFIG has a generator producing rows
+with the real NSE header layout, so the generated files exercise the same
+header normalisation and column mapping as the downloaded ones.
+"""
+import csv
+import io
+import random
+import zipfile
+from datetime import date
+
+HEADERS = {
+    "Bc": ["SERIES", "SYMBOL", "SECURITY", "RECORD_DT", "BC_STRT_DT", "BC_END_DT", "EX_DT",
+           "ND_STRT_DT", "ND_END_DT", "PURPOSE"],
+    "bh": ["SYMBOL", "SERIES", "SECURITY", "HIGH/LOW", "INDEX_FLAG"],
+    "corpbond": ["MARKET", "SERIES", "SYMBOL", "SECURITY", "PREV_CL_PR", "OPEN_PRICE", "HIGH_PRICE",
+                 "LOW_PRICE", "CLOSE_PRICE", "NET_TRDVAL", "NET_TRDQTY", "CORP_IND", "TRADES",
+                 "HI_52_WK", "LO_52_WK"],
+    "etf": ["MARKET", "SERIES", "SYMBOL", "SECURITY", "PREVIOUS CLOSE PRICE", "OPEN PRICE", "HIGH PRICE",
+            "LOW PRICE", "CLOSE PRICE", "NET TRADED VALUE", "NET TRADED QTY", "TRADES", "52 WEEK HIGH",
+            "52 WEEK LOW", "UNDERLYING"],
+    "Gl": ["GAIN_LOSS", "SECURITY", "CLOSE_PRIC", "PREV_CL_PR", "PERCENT_CG"],
+    "HL": ["SECURITY", "NEW", "PREVIOUS", "NEW_STATUS"],
+    "MCAP": ["Trade Date", "Symbol", "Series", "Security Name", "Category", "Last Trade Date",
+             "Face Value(Rs.)", "Issue Size", "Close Price/Paid up value(Rs.)", "Market Cap(Rs.)"],
+    "Pd": ["MKT", "SERIES", "SYMBOL", "SECURITY", "PREV_CL_PR", "OPEN_PRICE", "HIGH_PRICE", "LOW_PRICE",
+           "CLOSE_PRICE", "NET_TRDVAL", "NET_TRDQTY", "IND_SEC", "CORP_IND", "TRADES", "HI_52_WK", "LO_52_WK"],
+    "Pr": ["MKT", "SECURITY", "PREV_CL_PR", "OPEN_PRICE", "HIGH_PRICE", "LOW_PRICE", "CLOSE_PRICE",
+           "NET_TRDVAL", "NET_TRDQTY", "IND_SEC", "CORP_IND", "TRADES", "HI_52_WK", "LO_52_WK"],
+    "sme": ["MARKET", "SERIES", "SYMBOL", "SECURITY", "PREV_CL_PR", "OPEN_PRICE", "HIGH_PRICE", "LOW_PRICE",
+            "CLOSE_PRICE", "NET_TRDVAL", "NET_TRDQTY", "CORP_IND", "HI_52_WK", "LO_52_WK"],
+    "Tt": ["SECURITY", "PREV_CL_PR", "CLOSE_PRIC", "NET_TRDQTY", "NET_TRDVAL"],
+}
+
+PREFIXES = list(HEADERS)
+
+PURPOSES = ["DIVIDEND - RS 5 PER SHARE", "INTERIM DIVIDEND - RS 2.50 PER SHARE", "BONUS 1:1",
+            "FACE VALUE SPLIT (SUB-DIVISION) - FROM RS 10/- PER SHARE TO RE 1/- PER SHARE",
+            "ANNUAL GENERAL MEETING"]
+
+
+def _symbol(i):
+    return f"SYM{i:05d}"
+
+
+def _ohlc(rng, i):
+    prev = round(10 + (i * 7919 % 5000) + rng.random() * 5, 2)
+    close = round(prev * (1 + rng.uniform(-0.05, 0.05)), 2)
+    high = round(max(prev, close) * (1 + rng.random() * 0.02), 2)
+    low = round(min(prev, close) * (1 - rng.random() * 0.02), 2)
+    qty = rng.randint(100, 5_000_000)
+    return prev, round((prev + close) / 2, 2), high, low, close, round(qty * close, 2), qty
+
+
+def make_row(prefix, i, rng, trade_date=date(2025, 6, 4)):
+    """One synthetic row (as a list of strings) for the given file prefix."""
+    symbol = _symbol(i)
+    security = f"{symbol} LIMITED"
+    prev, open_, high, low, close, value, qty = _ohlc(rng, i)
+    trades = rng.randint(1, 50_000)
+    if prefix == "Bc":
+        dt = trade_date.strftime("%d-%b-%Y").upper()
+        return ["EQ", symbol, security, dt, "", "", dt, "", "", rng.choice(PURPOSES)]
+    if prefix == "bh":
+        return [symbol, "EQ", security, rng.choice(["H", "L"]), rng.choice(["Y", "N"])]
+    if prefix in ("corpbond", "Pd"):
+        row = ["N", "EQ", symbol, security, prev, open_, high, low, close, value, qty]
+        if prefix == "Pd":
+            row.append("N")
+        return row + [" ", trades, round(high * 1.3, 2), round(low * 0.7, 2)]
+    if prefix == "etf":
+        return ["N", "EQ", symbol, security, prev, open_, high, low, close, value, qty, trades,
+                round(high * 1.3, 2), round(low * 0.7, 2), "NIFTY 50"]
+    if prefix == "Gl":
+        change = round((close - prev) / prev * 100, 2)
+        return ["G" if change >= 0 else "L", security, close, prev, change]
+    if prefix == "HL":
+        return [security, close, prev, rng.choice(["H", "L"])]
+    if prefix == "MCAP":
+        dt = trade_date.strftime("%d %b %Y")
+        issue_size = rng.randint(1_000_000, 10_000_000_000)
+        return [dt, symbol, "EQ", security, "Listed", dt, 10, issue_size, close, round(issue_size * close, 2)]
+    if prefix == "Pr":
+        return ["N", security, prev, open_, high, low, close, value, qty, "N", " ", trades,
+                round(high * 1.3, 2), round(low * 0.7, 2)]
+    if prefix == "sme":
+        return ["N", "SM", symbol, security, prev, open_, high, low, close, value, qty, " ",
+                round(high * 1.3, 2), round(low * 0.7, 2)]
+    if prefix == "Tt":
+        return [security, prev, close, qty, value]
+    raise ValueError(f"Unknown prefix: {prefix}")
+
+
+def file_name(prefix, trade_date=date(2025, 6, 4)):
+    """File name as it appears inside the archive (MCAP uses a 4-digit year)."""
+    if prefix == "MCAP":
+        return f"MCAP{trade_date.strftime('%d%m%Y')}.csv"
+    return f"{prefix}{trade_date.strftime('%d%m%y')}.csv"
+
+
+def write_csv(stream, prefix, rows, seed=0, trade_date=date(2025, 6, 4)):
+    """Writes ``rows`` synthetic rows with the prefix's header to a text stream."""
+    rng = random.Random(seed)
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(HEADERS[prefix])
+    for i in range(rows):
+        writer.writerow(make_row(prefix, i, rng, trade_date))
+
+
+def make_csv(prefix, rows, seed=0, trade_date=date(2025, 6, 4)):
+    buffer = io.StringIO()
+    write_csv(buffer, prefix, rows, seed, trade_date)
+    return buffer.getvalue()
+
+
+def make_archive(rows, prefixes=PREFIXES, trade_date=date(2025, 6, 4), seed=0):
+    """
+    Returns the bytes of a PR{ddmmyy}.zip-style archive holding one file per
+    prefix. ``rows`` is either a row count for every file or a {prefix: rows} dict.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as z:
+        for prefix in prefixes:
+            count = rows[prefix] if isinstance(rows, dict) else rows
+            z.writestr(file_name(prefix, trade_date), make_csv(prefix, count, seed, trade_date))
+    return buffer.getvalue()
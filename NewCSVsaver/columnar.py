@@ -0,0 +1,322 @@
+"""
+Local columnar archive of bhavcopy history, for backtests that read years
+of prices at once.
+
+Parsed files are written as Arrow IPC files, one dataset per
+FILE_TYPE_CONFIG prefix, partitioned by date:
+
+    <root>/Pr/2025/2025-06-04.arrow     one file per trading day
+    <root>/Pr/2024.arrow                a compacted year (see compact)
+
+Every file is sorted by the model's lookup key (symbol or security) and
+bhav_date and read back through a memory map. A single-instrument query
+binary-searches the key column, so it only touches the pages of the rows
+it returns; compacting finished years keeps a 10-year read at ten file
+opens.
+
+Requires pyarrow (`pip install pyarrow`).
+
+    python columnar.py add PR040625.zip --root history
+    python columnar.py compact --root history --year 2024
+"""
+import argparse
+import logging
+import os
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import Date, Float, Integer
+
+from models import encoded_id_column, get_batch_size, get_encoded_columns, get_lookup_key
+from processor import (
+    FILE_TYPE_CONFIG, MODEL_MAPPING, archive_sources, directory_sources, _iter_source_chunks, _resolve_file,
+)
+
+FILE_SUFFIX = ".arrow"
+
+
+# -----------------------
+# Schemas
+# -----------------------
+def schema_for(model_class):
+    """
+    Arrow schema with the model's columns, without the surrogate id. The
+    archive keeps identifier text where the tables store symbol dictionary
+    ids, e.g. symbol instead of symbol_id.
+    """
+    text_columns = {encoded_id_column(column): column for column in get_encoded_columns(model_class)}
+    fields = []
+    for column in model_class.__table__.columns:
+        if column.name == "id":
+            continue
+        if column.name in text_columns:
+            fields.append(pa.field(text_columns[column.name], pa.string()))
+            continue
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, Date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type))
+    return pa.schema(fields)
+
+
+def model_for_prefix(prefix):
+    for file_def in FILE_TYPE_CONFIG:
+        if file_def["prefix"] == prefix:
+            return MODEL_MAPPING[file_def["model"]]
+    raise ValueError(f"Unknown bhavcopy prefix: {prefix}")
+
+
+# -----------------------
+# Store
+# -----------------------
+class ColumnarStore:
+    """
+    Date-partitioned Arrow IPC datasets under ``root``. Writing a day again
+    replaces that day's file, so re-archiving is idempotent.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    # --- Writing ---
+    def add_sources(self, sources, chunk_size=None):
+        """
+        Parses (file_name, source spec) pairs as processor does and writes
+        each file as one day. Returns {prefix: rows written}.
+        """
+        written = {}
+        for file_name, spec in sources:
+            target = _resolve_file(file_name)
+            if target is None:
+                continue
+            file_def, model_class = target
+            if file_def["bhav_date"] is None:
+                logging.warning(f"Skipping {file_name}: no trade date in the file name")
+                continue
+            try:
+                chunks = _iter_source_chunks(spec, file_def, chunk_size or get_batch_size(model_class))
+                rows = self.write_day(file_def["prefix"], model_class, file_def["bhav_date"], chunks)
+            except Exception as e:
+                logging.error(f"Error archiving {file_name}: {e}")
+                continue
+            written[file_def["prefix"]] = written.get(file_def["prefix"], 0) + rows
+            logging.info(f"Archived {rows} rows of {file_name}")
+        return written
+
+    def write_day(self, prefix, model_class, day, chunks):
+        """Writes one day's parsed chunks (row dicts or ColumnBatch) for a dataset."""
+        schema = schema_for(model_class)
+        columns = {name: [] for name in schema.names}
+        for chunk in chunks:
+            if hasattr(chunk, "column_lists"):
+                lists = chunk.column_lists()
+                for name in columns:
+                    columns[name].extend(lists.get(name, [None] * len(chunk)))
+            else:
+                for row in chunk:
+                    for name, values in columns.items():
+                        values.append(row.get(name))
+
+        table = pa.table(columns, schema=schema)
+        table = table.sort_by([(get_lookup_key(model_class), "ascending"), ("bhav_date", "ascending")])
+        _write_table(table, self._day_path(prefix, day))
+        return table.num_rows
+
+    def compact(self, prefix, year):
+        """
+        Merges a year's day files (and any earlier compacted file for that
+        year) into <prefix>/<year>.arrow, sorted by lookup key and date.
+        """
+        model_class = model_for_prefix(prefix)
+        day_files = self._day_files(prefix, year)
+        if not day_files:
+            return 0
+        table = pa.concat_tables([_read_table(path) for path in day_files])
+        year_path = self._year_path(prefix, year)
+        if os.path.exists(year_path):
+            # A day archived again after an earlier compaction replaces the old copy.
+            old = _read_table(year_path)
+            old = old.filter(pc.invert(pc.is_in(old["bhav_date"], value_set=pc.unique(table["bhav_date"]))))
+            table = pa.concat_tables([old, table])
+        table = table.sort_by([(get_lookup_key(model_class), "ascending"), ("bhav_date", "ascending")])
+        _write_table(table, year_path)
+        for path in day_files:
+            os.remove(path)
+        os.rmdir(os.path.dirname(day_files[0]))
+        logging.info(f"Compacted {len(day_files)} days of {prefix} {year} ({table.num_rows} rows)")
+        return table.num_rows
+
+    # --- Reading ---
+    def read_range(self, prefix, value=None, start=None, end=None, columns=None):
+        """
+        Rows of a dataset between start and end (inclusive, open when None),
+        for one instrument when ``value`` is given (matched on the lookup key).
+        Returns {column: ndarray} in (lookup key, bhav_date) order per file;
+        dates are datetime64[D], strings are object arrays, and null numbers
+        are NaN.
+        """
+        model_class = model_for_prefix(prefix)
+        lookup_key = get_lookup_key(model_class)
+        schema = schema_for(model_class)
+        wanted = list(columns) if columns else schema.names
+
+        parts = []
+        for path in self._files_between(prefix, start, end):
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+                if value is not None:
+                    table = _key_slice(table, lookup_key, value)
+                mask = None
+                if start is not None:
+                    mask = _and(mask, pc.greater_equal(table["bhav_date"], pa.scalar(start, pa.date32())))
+                if end is not None:
+                    mask = _and(mask, pc.less_equal(table["bhav_date"], pa.scalar(end, pa.date32())))
+                if mask is not None:
+                    table = table.filter(mask)
+                if table.num_rows:
+                    parts.append(table.select(wanted))
+
+        if not parts:
+            return {name: pa.array([], schema.field(name).type).to_numpy(zero_copy_only=False) for name in wanted}
+        table = pa.concat_tables(parts)
+        if value is not None:
+            table = table.sort_by("bhav_date")
+        return {name: table[name].to_numpy() for name in wanted}
+
+    def open_years(self, prefix):
+        """Years that still have uncompacted day files."""
+        dataset_dir = self._dataset_dir(prefix)
+        if not os.path.isdir(dataset_dir):
+            return []
+        return sorted(int(name) for name in os.listdir(dataset_dir)
+                      if name.isdigit() and self._day_files(prefix, int(name)))
+
+    def days(self, prefix):
+        """Trading days stored for a dataset, oldest first."""
+        stored = set()
+        for path in self._files_between(prefix, None, None):
+            with pa.memory_map(path, "r") as source:
+                stored.update(pc.unique(pa.ipc.open_file(source).read_all()["bhav_date"]).to_pylist())
+        return sorted(stored)
+
+    # --- Layout ---
+    def _dataset_dir(self, prefix):
+        return os.path.join(self.root, prefix)
+
+    def _day_path(self, prefix, day):
+        return os.path.join(self._dataset_dir(prefix), str(day.year), f"{day.isoformat()}{FILE_SUFFIX}")
+
+    def _year_path(self, prefix, year):
+        return os.path.join(self._dataset_dir(prefix), f"{year}{FILE_SUFFIX}")
+
+    def _day_files(self, prefix, year):
+        year_dir = os.path.join(self._dataset_dir(prefix), str(year))
+        if not os.path.isdir(year_dir):
+            return []
+        return sorted(os.path.join(year_dir, name) for name in os.listdir(year_dir) if name.endswith(FILE_SUFFIX))
+
+    def _files_between(self, prefix, start, end):
+        """Year and day files that can hold rows between start and end."""
+        dataset_dir = self._dataset_dir(prefix)
+        if not os.path.isdir(dataset_dir):
+            return []
+        years = set()
+        for name in os.listdir(dataset_dir):
+            year = name[:-len(FILE_SUFFIX)] if name.endswith(FILE_SUFFIX) else name
+            if year.isdigit():
+                years.add(int(year))
+
+        files = []
+        for year in sorted(years):
+            if (start and year < start.year) or (end and year > end.year):
+                continue
+            if os.path.exists(self._year_path(prefix, year)):
+                files.append(self._year_path(prefix, year))
+            for path in self._day_files(prefix, year):
+                day = date.fromisoformat(os.path.basename(path)[:-len(FILE_SUFFIX)])
+                if (start is None or day >= start) and (end is None or day <= end):
+                    files.append(path)
+        return files
+
+
+def _key_slice(table, key, value):
+    """
+    The rows of a key-sorted table whose ``key`` equals ``value``, found by
+    binary search so only the pages of those rows are read.
+    """
+    column = table[key].combine_chunks()
+
+    def bisect(right):
+        lo, hi = 0, len(column)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = column[mid].as_py()
+            # Nulls sort last.
+            if current is not None and (current < value or (right and current == value)):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    start = bisect(right=False)
+    return table.slice(start, bisect(right=True) - start)
+
+
+def _and(mask, other):
+    return other if mask is None else pc.and_(mask, other)
+
+
+def _write_table(table, path):
+    """Writes an uncompressed IPC file (so reads can map it) via a temp file and rename."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        # One record batch per file keeps the sorted key column contiguous for _key_slice.
+        writer.write_table(table.combine_chunks(), max_chunksize=max(table.num_rows, 1))
+    os.replace(tmp_path, path)
+
+
+def _read_table(path):
+    with pa.memory_map(path, "r") as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+# -----------------------
+# Entry Points
+# -----------------------
+def archive_files(directory, root, chunk_size=None):
+    """Archives every recognised bhavcopy file in a directory."""
+    return ColumnarStore(root).add_sources(directory_sources(directory), chunk_size)
+
+
+def archive_zip(zip_source, root, chunk_size=None):
+    """Archives a bhavcopy ZIP (bytes or path) without extracting it."""
+    return ColumnarStore(root).add_sources(archive_sources(zip_source), chunk_size)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Columnar bhavcopy archive.")
+    arg_parser.add_argument("command", choices=["add", "compact"])
+    arg_parser.add_argument("paths", nargs="*", help="ZIP archives or extracted directories to add")
+    arg_parser.add_argument("--root", default="bhavcopy_history", help="Archive root directory")
+    arg_parser.add_argument("--year", type=int, help="Year to compact (default: every year before this one)")
+    args = arg_parser.parse_args()
+
+    if args.command == "add":
+        for path in args.paths:
+            if os.path.isdir(path):
+                archive_files(path, args.root)
+            else:
+                archive_zip(path, args.root)
+    else:
+        store = ColumnarStore(args.root)
+        for file_def in FILE_TYPE_CONFIG:
+            years = store.open_years(file_def["prefix"])
+            years = [args.year] if args.year else [y for y in years if y < date.today().year]
+            for year in years:
+                store.compact(file_def["prefix"], year)
@@ -0,0 +1,323 @@
+"""
+Corporate-action adjustments built from the Bc (book closure) records.
+
+The price tables store prices as traded, so a split, bonus or dividend
+shows up as a false gap. parse_purpose() turns the ``purpose`` text of a
+Bc record into structured actions:
+
+    "BONUS 1:1"                                   bonus, factor 1/2
+    "FACE VALUE SPLIT (SUB-DIVISION) - FROM RS 10/- PER SHARE TO RE 1/- PER SHARE"
+                                                  split, factor 1/10
+    "CONSOLIDATION OF SHARES FROM RE 1 TO RS 10"  consolidation, factor 10
+    "INTERIM DIVIDEND - RS 2.50 PER SHARE"        dividend of 2.50
+
+Prices before an action's ex-date are multiplied by its factor (volumes
+divided by it); a dividend's factor is 1 - dividend / the last close
+before the ex-date, applied only when asked for. Rights issues and
+meetings are recognised but not adjusted.
+
+CorporateActions keeps every symbol's actions sorted by ex-date, so the
+cumulative factor for any day is one binary search. Adjusted OHLC series
+are cached per symbol; when a newly loaded Bc file changes a symbol's
+actions, only that symbol's cached series are dropped (see watch()).
+"""
+import logging
+import re
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime
+
+import numpy as np
+
+Action = namedtuple("Action", ["symbol", "ex_date", "kind", "value"])
+
+PRICE_FIELDS = ("open", "high", "low", "close", "prev_close")
+VOLUME_FIELDS = ("volume",)
+DEFAULT_CACHE_ENTRIES = 1024
+
+_AMOUNT = r"R[SE]\.?\s*(\d+(?:\.\d+)?)"
+DIVIDEND_PATTERN = re.compile(r"(?:INTERIM|FINAL|SPECIAL)?\s*DIV(?:IDEND)?\s*[-:]?\s*" + _AMOUNT)
+BONUS_PATTERN = re.compile(r"BONUS\s*(\d+)\s*:\s*(\d+)")
+FACE_VALUE_PATTERN = re.compile(r"(SPLIT|SUB-?DIVISION|CONSOLIDATION).*?FROM\s*" + _AMOUNT + r".*?TO\s*" + _AMOUNT)
+RIGHTS_PATTERN = re.compile(r"RIGHTS\s*(\d+)\s*:\s*(\d+)")
+
+BC_DATE_FORMATS = ("%d-%b-%Y", "%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%d %b %Y", "%d-%b-%y")
+
+
+# -----------------------
+# Parsing
+# -----------------------
+def parse_purpose(purpose):
+    """
+    [(kind, value)] for the actions described by a Bc purpose text. value
+    is the price factor for bonus/split/consolidation, the amount per share
+    for a dividend and the entitlement ratio for rights.
+    """
+    text = (purpose or "").upper()
+    actions = []
+
+    match = FACE_VALUE_PATTERN.search(text)
+    if match:
+        kind = "consolidation" if match.group(1) == "CONSOLIDATION" else "split"
+        old, new = float(match.group(2)), float(match.group(3))
+        if old > 0 and new > 0 and old != new:
+            actions.append((kind, new / old))
+
+    for new_shares, held in BONUS_PATTERN.findall(text):
+        new_shares, held = int(new_shares), int(held)
+        if new_shares and held:
+            actions.append(("bonus", held / (held + new_shares)))
+
+    dividend = sum(float(amount) for amount in DIVIDEND_PATTERN.findall(text))
+    if dividend > 0:
+        actions.append(("dividend", dividend))
+
+    for offered, held in RIGHTS_PATTERN.findall(text):
+        if int(offered) and int(held):
+            actions.append(("rights", int(offered) / int(held)))
+    return actions
+
+
+def parse_bc_date(value):
+    """A date from the Bc file's text columns (e.g. 04-JUN-2025), or None."""
+    if isinstance(value, date):
+        return value
+    value = (value or "").strip()
+    if not value:
+        return None
+    for date_format in BC_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.title(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+def actions_from_rows(rows):
+    """Actions for Bc rows (dicts of BcRecord columns); the ex-date falls back to the record date."""
+    actions = set()
+    for row in rows:
+        ex_date = parse_bc_date(row.get("ex_dt")) or parse_bc_date(row.get("record_dt")) \
+            or parse_bc_date(row.get("bc_strt_dt"))
+        symbol = row.get("symbol")
+        if ex_date is None or not symbol:
+            continue
+        for kind, value in parse_purpose(row.get("purpose")):
+            actions.add(Action(symbol, ex_date, kind, round(value, 10)))
+    return actions
+
+
+# -----------------------
+# Factors
+# -----------------------
+def action_factors(actions, dates=None, close=None, dividends=False):
+    """
+    (ex-dates as datetime64[D], factors) for one symbol's actions sorted by
+    ex-date. Dividend factors need the symbol's closes (``close`` on
+    ``dates``) and are 1 unless ``dividends`` is set.
+    """
+    ex_dates = []
+    factors = []
+    for action in sorted(actions, key=lambda action: action.ex_date):
+        factor = 1.0
+        if action.kind in ("split", "consolidation", "bonus"):
+            factor = action.value
+        elif action.kind == "dividend" and dividends and close is not None:
+            factor = _dividend_factor(action, dates, close)
+        if factor != 1.0:
+            ex_dates.append(np.datetime64(action.ex_date, "D"))
+            factors.append(factor)
+    return np.array(ex_dates, dtype="datetime64[D]"), np.array(factors, dtype=float)
+
+
+def _dividend_factor(action, dates, close):
+    before = np.searchsorted(dates, np.datetime64(action.ex_date, "D")) - 1
+    while before >= 0 and np.isnan(close[before]):
+        before -= 1
+    if before < 0 or close[before] <= action.value:
+        return 1.0
+    return 1.0 - action.value / close[before]
+
+
+def cumulative_factors(ex_dates, factors, dates):
+    """
+    Factor for each of ``dates``: the product of the factors of every
+    action whose ex-date is after that date.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if not len(factors):
+        return np.ones(len(dates))
+    # from_action[k] = product of factors[k:], with 1.0 once past the last action.
+    from_action = np.append(np.cumprod(factors[::-1])[::-1], 1.0)
+    return from_action[np.searchsorted(ex_dates, dates, side="right")]
+
+
+def adjust_fields(values, factors):
+    """Adjusted copies of the price and volume fields in {field: array}; other fields are copied as is."""
+    adjusted = {}
+    for field, array in values.items():
+        if field in PRICE_FIELDS:
+            adjusted[field] = array * factors
+        elif field in VOLUME_FIELDS:
+            adjusted[field] = array / factors
+        else:
+            adjusted[field] = np.array(array, copy=True)
+    return adjusted
+
+
+# -----------------------
+# Action Store
+# -----------------------
+class CorporateActions:
+    """
+    Every symbol's corporate actions from the bc_records table, plus an
+    LRU cache of adjusted series. Securities (the Pr files' key) map to
+    their symbol through the Bc records too.
+    """
+    def __init__(self, db_adapter, max_cache_entries=DEFAULT_CACHE_ENTRIES):
+        self.db_adapter = db_adapter
+        self.max_cache_entries = max_cache_entries
+        self.actions = {}           # {symbol: set(Action)}
+        self.securities = {}        # {security: symbol}
+        self._cache = OrderedDict()     # {(symbol, key, table, start, end, dividends): {field: array}}
+        self.stats = {"hits": 0, "misses": 0, "invalidated": 0}
+
+    # --- Loading ---
+    def load(self, start=None, end=None):
+        """Reads the Bc records between start and end; returns the symbols whose actions changed."""
+        return self._merge(self._read_rows(start or date.min, end or date.max))
+
+    def refresh(self, days):
+        """Reads the Bc records of newly loaded trading days; invalidates only symbols that changed."""
+        if not days:
+            return set()
+        changed = self._merge(self._read_rows(min(days), max(days)))
+        if changed:
+            logging.info(f"Corporate actions changed for {len(changed)} symbols: {', '.join(sorted(changed)[:10])}")
+        return changed
+
+    def watch(self):
+        """
+        Refreshes after every processor run that loads a Bc file, and drops
+        the cached series a run loading their price table may have changed.
+        """
+        from processor import add_load_listener
+
+        add_load_listener(self._on_load)
+
+    def _on_load(self, table_stats, days):
+        from models import BcRecord
+
+        if BcRecord.__tablename__ in table_stats:
+            self.refresh(days)
+        self._invalidate_loaded(table_stats, days)
+
+    def _read_rows(self, start, end):
+        from models import BcRecord
+        from partitioning import select_date_range
+
+        return select_date_range(self.db_adapter.engine, BcRecord, start, end, self.db_adapter.partitioning)
+
+    def _merge(self, rows):
+        for row in rows:
+            if row.get("security") and row.get("symbol"):
+                self.securities[row["security"]] = row["symbol"]
+        changed = set()
+        for action in actions_from_rows(rows):
+            known = self.actions.setdefault(action.symbol, set())
+            if action not in known:
+                known.add(action)
+                changed.add(action.symbol)
+        for symbol in changed:
+            self.invalidate(symbol)
+        return changed
+
+    # --- Lookups ---
+    def symbol_for(self, key):
+        """The symbol of a symbol or security name."""
+        return key if key in self.actions else self.securities.get(key, key)
+
+    def actions_for(self, key):
+        return sorted(self.actions.get(self.symbol_for(key), ()), key=lambda action: action.ex_date)
+
+    def factors(self, key, dates, close=None, dividends=False):
+        """Cumulative adjustment factor of one symbol on each of ``dates``."""
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        ex_dates, factors = action_factors(self.actions_for(key), dates, close, dividends)
+        return cumulative_factors(ex_dates, factors, dates)
+
+    def adjust_panel(self, panel, dividends=False):
+        """
+        A copy of ``panel`` with adjusted prices and volumes. Only symbols
+        with actions are touched; the rest keep factor 1.
+        """
+        from panel import Panel
+
+        factor_matrix = np.ones(panel.shape)
+        close = panel["close"] if "close" in panel else None
+        for row, key in enumerate(panel.symbols):
+            if self.symbol_for(key) in self.actions:
+                factor_matrix[row] = self.factors(key, panel.dates, None if close is None else close[row], dividends)
+        adjusted = adjust_fields({field: panel[field] for field in panel.fields}, factor_matrix)
+        return Panel(panel.symbols, panel.dates, adjusted)
+
+    def adjusted_ohlc(self, key, model_class=None, start=None, end=None, dividends=False):
+        """
+        Adjusted daily series of one symbol (or security) from the price
+        table: {"dates": datetime64 array, field: array}. Cached until the
+        symbol's actions change, or (with watch) until days in the range are
+        loaded again. An open or future ``end`` is cut to the latest stored
+        day, so a series read before a new day arrived is not served after.
+        """
+        from models import PdRecord
+        from partitioning import latest_date
+
+        model_class = model_class or PdRecord
+        latest = latest_date(self.db_adapter.engine, model_class, self.db_adapter.partitioning)
+        if latest is not None and (end is None or end > latest):
+            end = latest
+        cache_key = (self.symbol_for(key), key, model_class.__tablename__, start, end, dividends)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            self._cache.move_to_end(cache_key)
+            self.stats["hits"] += 1
+            return cached
+
+        self.stats["misses"] += 1
+        dates, values = self._read_series(key, model_class, start, end)
+        series = adjust_fields(values, self.factors(key, dates, values.get("close"), dividends))
+        series["dates"] = dates
+        self._cache[cache_key] = series
+        if len(self._cache) > self.max_cache_entries:
+            self._cache.popitem(last=False)
+        return series
+
+    def invalidate(self, symbol):
+        """Drops the cached series of one symbol."""
+        stale = [cache_key for cache_key in self._cache if cache_key[0] == symbol]
+        for cache_key in stale:
+            del self._cache[cache_key]
+        self.stats["invalidated"] += len(stale)
+
+    def _invalidate_loaded(self, table_stats, days):
+        """Drops the cached series of loaded tables whose range covers a loaded day."""
+        stale = [cache_key for cache_key in self._cache
+                 if cache_key[2] in table_stats
+                 and (not days or any((cache_key[3] or date.min) <= day <= (cache_key[4] or date.max)
+                                      for day in days))]
+        for cache_key in stale:
+            del self._cache[cache_key]
+        self.stats["invalidated"] += len(stale)
+
+    def _read_series(self, key, model_class, start, end):
+        from models import get_lookup_key
+        from panel import default_filters, field_columns
+        from partitioning import select_date_range
+
+        filters = default_filters(model_class)
+        filters[get_lookup_key(model_class)] = key
+        rows = select_date_range(self.db_adapter.engine, model_class, start or date.min, end or date.max,
+                                 self.db_adapter.partitioning, **filters)
+        dates = np.array([row["bhav_date"] for row in rows], dtype="datetime64[D]")
+        values = {field: np.array([row[column] for row in rows], dtype=float)
+                  for field, column in field_columns(model_class).items()}
+        return dates, values
@@ -0,0 +1,399 @@
+"""
+Local data daemon: the recent window of the price tables, served over a
+Unix domain socket.
+
+One process holds the last ``window`` trading days of pd_records and
+pr_records as Panels (see panel.py) and answers queries from strategy
+processes, so they share one engine and one copy of the data:
+
+    python data_service.py --socket /tmp/bhavcopy_data.sock --window 250
+
+    with DataClient("/tmp/bhavcopy_data.sock") as client:
+        symbols, dates, values = client.range(["RELIANCE", "TCS"], start=date(2025, 6, 1))
+        symbols, day, values = client.snapshot()    # every symbol on the latest day
+
+Framing, in both directions: a 4-byte big-endian header length, a JSON
+header, then the raw bytes of the NumPy arrays the header lists under
+"arrays" (name, dtype, shape), back to back. Arrays are sent with one
+sendmsg over their buffers and received straight into preallocated
+arrays with recv_into, so nothing is serialized or copied on either side
+of the socket.
+
+The daemon polls the database for newly stored days (and registers a
+load listener when it runs in the ingesting process) and appends them;
+once a panel holds twice the window it is cut back to the last ``window`` days.
+"""
+import argparse
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import tempfile
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "bhavcopy_data.sock")
+DEFAULT_MODELS = ("PdRecord", "PrRecord")
+DEFAULT_FIELDS = ("open", "high", "low", "close", "volume", "value")
+DEFAULT_WINDOW = 250
+DEFAULT_POLL_SECONDS = 60.0
+
+HEADER_LENGTH = struct.Struct("!I")
+
+
+class DataServiceError(Exception):
+    """An error reported by the data service for one request."""
+
+
+# -----------------------
+# Framing
+# -----------------------
+def send_frame(sock, header, arrays=()):
+    """Sends a JSON header and the buffers of ``arrays`` [(name, ndarray)] as one frame."""
+    arrays = [(name, np.ascontiguousarray(array)) for name, array in arrays]
+    header = dict(header, arrays=[{"name": name, "dtype": array.dtype.str, "shape": array.shape}
+                                  for name, array in arrays])
+    encoded = json.dumps(header, default=str).encode()
+    buffers = [HEADER_LENGTH.pack(len(encoded)), encoded]
+    buffers += [_raw(array) for _, array in arrays if array.nbytes]
+    _send_buffers(sock, buffers)
+
+
+def _send_buffers(sock, buffers):
+    while buffers:
+        sent = sock.sendmsg(buffers)
+        while buffers and sent >= len(buffers[0]):
+            sent -= len(buffers[0])
+            buffers.pop(0)
+        if sent:
+            buffers[0] = buffers[0][sent:]
+
+
+def recv_frame(sock):
+    """(header, {name: ndarray}) of the next frame, or (None, None) when the peer closed."""
+    prefix = bytearray(HEADER_LENGTH.size)
+    if not _recv_into(sock, memoryview(prefix), allow_eof=True):
+        return None, None
+    encoded = bytearray(HEADER_LENGTH.unpack(prefix)[0])
+    _recv_into(sock, memoryview(encoded))
+    header = json.loads(encoded)
+    arrays = {}
+    for spec in header.pop("arrays", []):
+        array = np.empty(spec["shape"], dtype=np.dtype(spec["dtype"]))
+        if array.nbytes:
+            _recv_into(sock, _raw(array))
+        arrays[spec["name"]] = array
+    return header, arrays
+
+
+def _raw(array):
+    """Writable byte view of a contiguous array (datetime64 has no buffer interface of its own)."""
+    return memoryview(array.reshape(-1).view(np.uint8))
+
+
+def _recv_into(sock, view, allow_eof=False):
+    received = 0
+    while received < len(view):
+        count = sock.recv_into(view[received:])
+        if not count:
+            if allow_eof and not received:
+                return False
+            raise ConnectionError("Connection closed in the middle of a frame")
+        received += count
+    return True
+
+
+# -----------------------
+# Service
+# -----------------------
+class DataService:
+    """
+    The recent window of each model as a Panel, updated as days are stored.
+    ``panels`` ({model name: Panel}) serves ready-made panels without a database.
+    """
+    def __init__(self, db_adapter=None, models=DEFAULT_MODELS, window=DEFAULT_WINDOW, fields=DEFAULT_FIELDS,
+                 panels=None):
+        self.db_adapter = db_adapter
+        self.models = list(models)
+        self.window = window
+        self.fields = list(fields)
+        self.panels = dict(panels or {})
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "errors": 0, "bytes_sent": 0}
+
+    # --- Loading ---
+    def load(self):
+        """Loads the last ``window`` stored days of every model."""
+        for model_name, model_class in self._model_classes().items():
+            self._load_model(model_name, model_class)
+
+    def _load_model(self, model_name, model_class):
+        from panel import load_panel
+        from partitioning import recent_dates
+
+        days = recent_dates(self.db_adapter.engine, model_class, self.window, self.db_adapter.partitioning)
+        if not days:
+            return
+        panel = load_panel(self.db_adapter, model_class, days[0], days[-1], self.fields)
+        with self._lock:
+            self.panels[model_name] = panel
+        logging.info(f"Serving {model_name}: {len(panel.symbols)} instruments x {panel.length} days")
+
+    def refresh(self):
+        """
+        Appends the days stored since the last load or refresh; returns how
+        many were added. When more than ``window`` days arrived (e.g. a
+        backfill after a long outage) the model is loaded again instead, as
+        appending the last ``window`` of them would leave a gap.
+        """
+        from panel import load_day
+        from partitioning import recent_dates
+
+        added = 0
+        for model_name, model_class in self._model_classes().items():
+            panel = self.panels.get(model_name)
+            if panel is None or not panel.length:
+                self._load_model(model_name, model_class)
+                continue
+            last_day = panel.dates[-1].astype(object)
+            recent = recent_dates(self.db_adapter.engine, model_class, self.window, self.db_adapter.partitioning)
+            if recent and recent[0] > last_day:
+                self._load_model(model_name, model_class)
+                added += len(recent)
+                continue
+            days = [day for day in recent if day > last_day]
+            for day in days:
+                keys, values = load_day(self.db_adapter, model_class, day, self.fields)
+                with self._lock:
+                    panel.append_day(day, keys, values)
+                added += 1
+            if panel.length > 2 * self.window:
+                trimmed = _last_days(panel, self.window)
+                with self._lock:
+                    self.panels[model_name] = trimmed
+        if added:
+            logging.info(f"Data service appended {added} days")
+        return added
+
+    def watch(self):
+        """Refreshes after every processor run in this process."""
+        from processor import add_load_listener
+
+        add_load_listener(self._on_load)
+
+    def _on_load(self, table_stats, days):
+        self.refresh()
+
+    def poll(self, interval=DEFAULT_POLL_SECONDS):
+        """Refreshes every ``interval`` seconds in a daemon thread."""
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.error(f"Data service refresh failed: {e}")
+
+        thread = threading.Thread(target=run, name="data-service-poll", daemon=True)
+        thread.start()
+        return thread
+
+    def _model_classes(self):
+        from processor import get_model_mapping
+
+        return {name: get_model_mapping()[name] for name in self.models}
+
+    # --- Queries ---
+    def handle(self, request):
+        """(reply header, [(name, ndarray)]) for one request header."""
+        op = request.get("op")
+        if op == "info":
+            return {"status": "ok", "models": self.info()}, []
+        if op not in ("range", "snapshot", "symbols"):
+            raise ValueError(f"Unknown op: {op}")
+
+        model_name = request.get("model", self.models[0] if self.models else None)
+        with self._lock:
+            panel = self.panels.get(model_name)
+            if panel is None:
+                raise ValueError(f"No data loaded for {model_name}")
+            if op == "symbols":
+                return {"status": "ok", "symbols": list(panel.symbols)}, []
+
+            symbols, rows, missing = _select_rows(panel, request.get("symbols"))
+            fields = request.get("fields") or panel.fields
+            unknown = [field for field in fields if field not in panel]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+            dates = panel.dates
+            if op == "range":
+                start = np.datetime64(request["start"], "D") if request.get("start") else dates[0]
+                end = np.datetime64(request["end"], "D") if request.get("end") else dates[-1]
+                columns = slice(np.searchsorted(dates, start), np.searchsorted(dates, end, side="right"))
+                arrays = [("dates", dates[columns].copy())]
+                arrays += [(field, _take(panel[field], rows, columns)) for field in fields]
+                reply = {"status": "ok", "symbols": symbols, "missing": missing}
+            else:
+                as_of = np.datetime64(request["date"], "D") if request.get("date") else dates[-1]
+                column = np.searchsorted(dates, as_of, side="right") - 1
+                if column < 0:
+                    raise ValueError(f"No data on or before {as_of}")
+                arrays = [(field, _take(panel[field], rows, column)) for field in fields]
+                reply = {"status": "ok", "symbols": symbols, "missing": missing, "date": str(dates[column])}
+        return reply, arrays
+
+    def info(self):
+        with self._lock:
+            return {name: {"symbols": len(panel.symbols), "days": panel.length, "fields": panel.fields,
+                           "first": str(panel.dates[0]) if panel.length else None,
+                           "last": str(panel.dates[-1]) if panel.length else None}
+                    for name, panel in self.panels.items()}
+
+    # --- Serving ---
+    def serve(self, path=DEFAULT_SOCKET):
+        """Serves requests on a Unix socket until interrupted, one thread per connection."""
+        server = self.server(path)
+        logging.info(f"Data service listening on {path}")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.unlink(path)
+
+    def server(self, path=DEFAULT_SOCKET):
+        """A bound (not yet serving) socket server for this service."""
+        if os.path.exists(path):
+            os.unlink(path)     # left over from a previous run
+        server = _Server(path, _Handler)
+        server.service = self
+        return server
+
+
+def _select_rows(panel, symbols):
+    """(symbols found, their row numbers or None for all, symbols not in the panel)."""
+    if symbols is None:
+        return list(panel.symbols), None, []
+    found = [symbol for symbol in symbols if symbol in panel.symbol_index]
+    missing = [symbol for symbol in symbols if symbol not in panel.symbol_index]
+    return found, panel.rows(found), missing
+
+
+def _take(block, rows, columns):
+    return block[:, columns] if rows is None else block[rows, columns]
+
+
+def _last_days(panel, days):
+    from panel import Panel
+
+    return Panel(panel.symbols, panel.dates[-days:], {field: panel[field][:, -days:] for field in panel.fields},
+                 capacity=2 * days)
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        service = self.server.service
+        while True:
+            try:
+                request, _ = recv_frame(self.request)
+            except (ConnectionError, ValueError) as e:
+                logging.warning(f"Dropping data service client: {e}")
+                return
+            if request is None:
+                return
+            try:
+                reply, arrays = service.handle(request)
+            except Exception as e:
+                service.counters["errors"] += 1
+                reply, arrays = {"status": "error", "error": str(e)}, []
+            service.counters["requests"] += 1
+            try:
+                send_frame(self.request, reply, arrays)
+            except OSError:
+                return
+            service.counters["bytes_sent"] += sum(array.nbytes for _, array in arrays)
+
+
+# -----------------------
+# Client
+# -----------------------
+class DataClient:
+    """
+    A connection to a DataService. Not thread-safe: use one client per
+    thread or process.
+    """
+    def __init__(self, path=DEFAULT_SOCKET, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+
+    def request(self, op, **params):
+        """(reply header, {name: ndarray}); raises DataServiceError for a failed request."""
+        send_frame(self.sock, dict(params, op=op))
+        reply, arrays = recv_frame(self.sock)
+        if reply is None:
+            raise ConnectionError("Data service closed the connection")
+        if reply.get("status") != "ok":
+            raise DataServiceError(reply.get("error", "unknown error"))
+        return reply, arrays
+
+    def range(self, symbols=None, start=None, end=None, fields=None, model="PdRecord"):
+        """
+        (symbols, dates, {field: symbols x dates array}) between start and
+        end; symbols the service does not hold are left out.
+        """
+        reply, arrays = self.request("range", model=model, symbols=symbols, fields=fields,
+                                     start=_iso(start), end=_iso(end))
+        dates = arrays.pop("dates")
+        return reply["symbols"], dates, arrays
+
+    def snapshot(self, symbols=None, day=None, fields=None, model="PdRecord"):
+        """(symbols, day, {field: array}) on ``day`` or the last day before it (default: the latest)."""
+        reply, arrays = self.request("snapshot", model=model, symbols=symbols, fields=fields, date=_iso(day))
+        return reply["symbols"], date.fromisoformat(reply["date"]), arrays
+
+    def symbols(self, model="PdRecord"):
+        return self.request("symbols", model=model)[0]["symbols"]
+
+    def info(self):
+        return self.request("info")[0]["models"]
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _iso(day):
+    return day.isoformat() if isinstance(day, date) else day
+
+
+if __name__ == "__main__":
+    from db_adapter import SQLAlchemyAdapter
+
+    arg_parser = argparse.ArgumentParser(description="Serve the recent bhavcopy window over a Unix socket.")
+    arg_parser.add_argument("--socket", default=DEFAULT_SOCKET)
+    arg_parser.add_argument("--models", nargs="+", default=list(DEFAULT_MODELS))
+    arg_parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Trading days to keep in memory")
+    arg_parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS,
+                            help="Seconds between checks for newly stored days")
+    arg_parser.add_argument("--db-config", default="db_config.json")
+    args = arg_parser.parse_args()
+
+    service = DataService(SQLAlchemyAdapter.from_config(args.db_config), args.models, args.window)
+    service.load()
+    service.poll(args.poll)
+    service.serve(args.socket)
@@ -1,7 +1,11 @@
 import json
-from sqlalchemy import create_engine
+import logging
+from functools import partial
+from sqlalchemy import create_engine, event, exc, func, inspect, select, text, tuple_
 from sqlalchemy.orm import sessionmaker
 
+from partitioning import PartitionConfig, table_for
+
 def get_connection_string(config_path="db_config.json"):
     """
     Reads the database configuration and builds the SQLAlchemy connection string.
@@ -33,16 +37,232 @@ def get_connection_string(config_path="db_config.json"):
     else:
         raise ValueError(f"Unsupported db_type: {db_type}")
 
+def get_partition_config(config_path="db_config.json"):
+    """
+    Reads the optional "partitioning" section of the database configuration.
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    return PartitionConfig.from_dict(config.get("partitioning"))
+
+def get_engine_options(config_path="db_config.json"):
+    """
+    Reads the create_engine tuning from the database configuration: the
+    "engine" section (pool_size, max_overflow, pool_recycle, pool_pre_ping,
+    insertmanyvalues_page_size, or any other create_engine keyword such as
+    fast_executemany for mssql+pyodbc) plus the Oracle "arraysize".
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    options = dict(config.get("engine", {}))
+    if config.get("db_type") == "oracle" and "arraysize" in config["oracle"]:
+        options["arraysize"] = config["oracle"]["arraysize"]
+    return options
+
+def get_sqlite_pragmas(config_path="db_config.json"):
+    """
+    Reads the PRAGMAs run on every new SQLite connection ("sqlite" -> "pragmas").
+    """
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    if config.get("db_type") != "sqlite":
+        return {}
+    return config["sqlite"].get("pragmas", {})
+
 class SQLAlchemyAdapter:
     """
     SQLAlchemy adapter for managing connection and bulk inserts.
     """
-    def __init__(self, connection_string):
-        self.engine = create_engine(connection_string)
+    def __init__(self, connection_string, partitioning=None, engine_options=None, sqlite_pragmas=None):
+        # The session hands its connection back to the engine's pool after
+        # every commit, so one adapter serves many chunks and invocations.
+        self.engine = create_engine(connection_string, **(engine_options or {}))
+        if sqlite_pragmas and self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", partial(_apply_pragmas, sqlite_pragmas))
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
+        self.partitioning = partitioning or PartitionConfig()
+        self._symbols = None
+
+    @property
+    def symbols(self):
+        """The symbol dictionary cache (see symbol_dictionary.py), loaded on first use."""
+        if self._symbols is None:
+            from symbol_dictionary import dictionary_for
+            self._symbols = dictionary_for(self.engine)
+        return self._symbols
+
+    @classmethod
+    def from_config(cls, config_path="db_config.json"):
+        """
+        Adapter for the database described by a db_config.json, with its
+        partitioning, engine and SQLite settings.
+        """
+        return cls(get_connection_string(config_path), get_partition_config(config_path),
+                   get_engine_options(config_path), get_sqlite_pragmas(config_path))
+
+    def table_for(self, model_class, bhav_date):
+        """
+        The table rows for ``bhav_date`` go to: the model's own table, or its
+        date bucket table on SQLite when partitioning is enabled.
+        """
+        return table_for(self.engine, model_class, bhav_date, self.partitioning)
+
+    def ensure_schema(self, metadata, version_table, version, migrations=None):
+        """
+        Creates the tables unless ``version_table`` already records
+        ``version``. Returns True when create_all ran. Checking the marker is
+        one query, where create_all inspects every table.
+
+        ``migrations`` maps a version to a step ``step(adapter)`` altering
+        existing tables (see migrations.py); the steps above the stored
+        version run after create_all. The marker is only written once every
+        table has all of its model's columns.
+        """
+        try:
+            with self.engine.connect() as conn:
+                stored = conn.execute(select(func.max(version_table.c.version))).scalar()
+        except exc.DBAPIError:
+            stored = None   # No marker table yet.
+        if stored is not None and stored >= version:
+            return False
+
+        metadata.create_all(self.engine)
+        # Without a marker the tables may predate it, so every step runs.
+        for step_version, step in sorted((migrations or {}).items()):
+            if (stored or 0) < step_version <= version:
+                logging.info(f"Migrating database schema to version {step_version}")
+                step(self)
+
+        missing = _missing_columns(self.engine, metadata)
+        if missing:
+            raise RuntimeError(f"Database schema is older than version {version}; "
+                               f"missing columns: {', '.join(missing)}")
+        with self.engine.begin() as conn:
+            conn.execute(version_table.delete())
+            conn.execute(version_table.insert(), {"version": version})
+        logging.info(f"Created database schema version {version}")
+        return True
 
     def bulk_insert(self, model_class, objects):
         self.session.bulk_save_objects(objects)
         self.session.commit()
         print(f"Inserted {len(objects)} rows into {model_class.__tablename__}")
+
+    def bulk_insert_rows(self, model_class, rows, batch_size=1000, table=None):
+        """
+        Inserts plain row dicts with executemany-style Core INSERTs, one batch at a time.
+
+        No ORM objects are built. Each batch goes to the driver as a single
+        executemany call, which SQLAlchemy turns into the dialect's fast path
+        (sqlite3 executemany, multi-row VALUES on MySQL, array binding on Oracle).
+        The caller owns the transaction and must commit or roll back.
+        ``table`` overrides the model's table (e.g. a date bucket table).
+        """
+        table = model_class.__table__ if table is None else table
+        stmt = table.insert()
+        inserted = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            self.session.execute(stmt, batch)
+            inserted += len(batch)
+        return inserted
+
+    def bulk_insert_columns(self, model_class, columns, batch_size=1000, table=None):
+        """
+        Inserts column-oriented data ({column: list of values}, all the same
+        length) using the same executemany batches as bulk_insert_rows.
+        """
+        names = list(columns)
+        values = list(columns.values())
+        length = len(values[0]) if values else 0
+        stmt = (model_class.__table__ if table is None else table).insert()
+        inserted = 0
+        for start in range(0, length, batch_size):
+            batch = [dict(zip(names, row)) for row in zip(*(column[start:start + batch_size] for column in values))]
+            self.session.execute(stmt, batch)
+            inserted += len(batch)
+        return inserted
+
+    def upsert_rows(self, model_class, rows, key_columns, batch_size=1000, table=None):
+        """
+        Inserts rows, updating the existing row when one with the same natural
+        key is already stored. Uses the dialect's native upsert in executemany
+        batches: ON CONFLICT on SQLite/PostgreSQL, ON DUPLICATE KEY UPDATE on
+        MySQL and MERGE on Oracle. Other dialects fall back to deleting the
+        matching keys and inserting. The caller owns the transaction.
+        """
+        if not rows:
+            return 0
+        table = model_class.__table__ if table is None else table
+        columns = list(rows[0])
+        update_columns = [c for c in columns if c not in key_columns]
+        dialect = self.engine.dialect.name
+
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(key_columns),
+                set_={c: stmt.excluded[c] for c in update_columns},
+            )
+        elif dialect == "mysql":
+            from sqlalchemy.dialects.mysql import insert
+            stmt = insert(table)
+            stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_columns})
+        elif dialect == "oracle":
+            stmt = _oracle_merge(table, columns, key_columns, update_columns)
+        else:
+            logging.warning(f"No native upsert for {dialect}; replacing rows by natural key instead")
+            return self._replace_rows(table, rows, key_columns, batch_size)
+
+        for start in range(0, len(rows), batch_size):
+            self.session.execute(stmt, rows[start:start + batch_size])
+        return len(rows)
+
+    def _replace_rows(self, table, rows, key_columns, batch_size):
+        key_expr = tuple_(*(table.c[k] for k in key_columns))
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            keys = [tuple(row[k] for k in key_columns) for row in batch]
+            self.session.execute(table.delete().where(key_expr.in_(keys)))
+            self.session.execute(table.insert(), batch)
+        return len(rows)
+
+
+def _missing_columns(engine, metadata):
+    """"table.column" for every model column its existing table lacks."""
+    inspector = inspect(engine)
+    missing = []
+    for table in metadata.sorted_tables:
+        stored = {column["name"] for column in inspector.get_columns(table.name)}
+        missing += [f"{table.name}.{column.name}" for column in table.columns if column.name not in stored]
+    return missing
+
+
+def _apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+def _oracle_merge(table, columns, key_columns, update_columns):
+    """
+    MERGE statement for one row of bind parameters; executed with a list of
+    rows it becomes a single array-bound executemany on cx_Oracle. Key
+    columns are compared with DECODE so NULL (Oracle's '') matches NULL.
+    """
+    source = ", ".join(f":{c} AS {c}" for c in columns)
+    on = " AND ".join(f"DECODE(t.{k}, s.{k}, 1, 0) = 1" for k in key_columns)
+    update = ", ".join(f"t.{c} = s.{c}" for c in update_columns)
+    insert_columns = ", ".join(columns)
+    insert_values = ", ".join(f"s.{c}" for c in columns)
+    sql = f"MERGE INTO {table.name} t USING (SELECT {source} FROM dual) s ON ({on})"
+    if update:
+        sql += f" WHEN MATCHED THEN UPDATE SET {update}"
+    sql += f" WHEN NOT MATCHED THEN INSERT ({insert_columns}) VALUES ({insert_values})"
+    return text(sql)
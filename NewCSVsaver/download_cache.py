@@ -0,0 +1,213 @@
+"""
+Local cache of downloaded bhavcopy archives.
+
+Archives are stored once per content hash under
+``<root>/objects/<sha256[:2]>/<sha256>.zip`` and indexed by archive name
+(PR{ddmmyy}.zip, i.e. by trade date) in ``<root>/index.json`` together with
+the server's ETag/Last-Modified. A published archive does not change, so a
+cached one is used without touching the network; a refresh revalidates it
+with If-None-Match/If-Modified-Since and a 304 keeps the cached copy.
+
+The cache is capped at ``max_bytes``; the least recently used archives are
+evicted first. It lives in bhavcopy_cache/ next to this module unless the
+BHAVCOPY_CACHE_DIR environment variable names another directory.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import metrics
+
+DEFAULT_CACHE_DIR = os.environ.get("BHAVCOPY_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "bhavcopy_cache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class DownloadCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+        self.index = {}     # {archive_name: {"sha256", "size", "etag", "last_modified", "fetched_at", "last_used"}}
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evicted": 0, "bytes_saved": 0,
+                      "bytes_downloaded": 0}
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+
+    # --- Lookups ---
+    def get(self, archive_name):
+        """Path of the cached archive, or None. Counts as a use for LRU."""
+        with self._lock:
+            entry = self.index.get(archive_name)
+            if entry is None:
+                return None
+            path = self._object_path(entry["sha256"])
+            if not path.exists():
+                # Object removed behind our back; forget the entry.
+                del self.index[archive_name]
+                self._save()
+                return None
+            entry["last_used"] = time.time()
+            self._save()
+            return path
+
+    def conditional_headers(self, archive_name):
+        """If-None-Match/If-Modified-Since headers for revalidating a cached archive."""
+        entry = self.index.get(archive_name) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    # --- Updates ---
+    def put(self, archive_name, content, etag=None, last_modified=None):
+        """Stores an archive's bytes and returns the cached path."""
+        sha256 = hashlib.sha256(content).hexdigest()
+        path = self._object_path(sha256)
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(".part")
+                with open(tmp_path, "wb") as f:
+                    f.write(content)
+                os.replace(tmp_path, path)
+            previous = self.index.get(archive_name)
+            now = time.time()
+            self.index[archive_name] = {
+                "sha256": sha256, "size": len(content), "etag": etag, "last_modified": last_modified,
+                "fetched_at": now, "last_used": now,
+            }
+            if previous and previous["sha256"] != sha256:
+                # The archive was republished; drop the old copy unless another name shares it.
+                self._drop_unreferenced(previous["sha256"])
+            self._evict(keep=sha256)
+            self._save()
+        return path
+
+    def touch(self, archive_name):
+        """Records a successful revalidation (304) of a cached archive."""
+        with self._lock:
+            entry = self.index[archive_name]
+            entry["fetched_at"] = entry["last_used"] = time.time()
+            self._save()
+
+    # --- Fetching ---
+    def fetch(self, session, url, archive_name=None, refresh=False, timeout=30):
+        """
+        Returns the path of the archive at ``url``, from the cache when
+        possible, or None when the server does not have it (404). With
+        ``refresh`` a cached archive is revalidated with a conditional GET.
+        ``session`` is a requests.Session (or the requests module).
+        """
+        archive_name = archive_name or url.rsplit("/", 1)[-1]
+        cached = self.get(archive_name)
+        if cached is not None and not refresh:
+            self.record_hit(archive_name)
+            return cached
+
+        headers = self.conditional_headers(archive_name) if cached is not None else {}
+        with metrics.span("download", file=archive_name):
+            response = session.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            self.touch(archive_name)
+            with self._lock:
+                self.stats["revalidated"] += 1
+            self.record_hit(archive_name)
+            return cached
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+
+        self.record_miss(len(response.content))
+        metrics.count("download_bytes", len(response.content), file=archive_name)
+        return self.put(archive_name, response.content,
+                        response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def record_hit(self, archive_name):
+        metrics.count("cache_hits", file=archive_name)
+        with self._lock:
+            self.stats["hits"] += 1
+            self.stats["bytes_saved"] += self.index[archive_name]["size"]
+
+    def record_miss(self, downloaded_bytes):
+        with self._lock:
+            self.stats["misses"] += 1
+            self.stats["bytes_downloaded"] += downloaded_bytes
+
+    # --- Housekeeping ---
+    def total_bytes(self):
+        return sum(size for size in self._object_sizes().values())
+
+    def log_summary(self):
+        stats = self.stats
+        logging.info(f"Download cache: {stats['hits']} hits ({stats['revalidated']} revalidated), "
+                     f"{stats['misses']} misses, {stats['bytes_saved'] / 1024 ** 2:.1f} MB saved, "
+                     f"{stats['bytes_downloaded'] / 1024 ** 2:.1f} MB downloaded, {stats['evicted']} evicted")
+
+    def _object_path(self, sha256):
+        return self.root / "objects" / sha256[:2] / f"{sha256}.zip"
+
+    def _object_sizes(self):
+        return {entry["sha256"]: entry["size"] for entry in self.index.values()}
+
+    def _evict(self, keep=None):
+        """
+        Drops least recently used archives until the cache fits in max_bytes,
+        never the object ``keep`` that was just stored.
+        """
+        sizes = self._object_sizes()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        # Objects can be shared by several names; an object is as recent as its newest name.
+        last_used = {}
+        for entry in self.index.values():
+            last_used[entry["sha256"]] = max(last_used.get(entry["sha256"], 0), entry["last_used"])
+        for sha256 in sorted(last_used, key=last_used.get):
+            if total <= self.max_bytes:
+                break
+            if sha256 == keep:
+                continue
+            for name in [n for n, e in self.index.items() if e["sha256"] == sha256]:
+                del self.index[name]
+            self._drop_unreferenced(sha256)
+            total -= sizes[sha256]
+            self.stats["evicted"] += 1
+
+    def _drop_unreferenced(self, sha256):
+        if any(entry["sha256"] == sha256 for entry in self.index.values()):
+            return
+        try:
+            os.remove(self._object_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def _save(self):
+        # Write to a temp file first so a crash never leaves a truncated index.
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+
+def link_or_copy(source, target):
+    """Places a cached archive at ``target`` without copying when the filesystem allows it."""
+    target = Path(target)
+    if target.exists():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+    return target
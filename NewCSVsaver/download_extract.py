@@ -1,10 +1,12 @@
 import requests
 import zipfile
-import io
-from datetime import datetime, timedelta
+from datetime import datetime
 import logging
 from pathlib import Path
 
+from download_cache import DownloadCache, link_or_copy
+from trading_calendar import get_calendar
+
 # ------------------------ Logging Setup ------------------------
 logging.basicConfig(
     level=logging.INFO,
@@ -15,8 +17,31 @@ logging.basicConfig(
     ]
 )
 
+# ------------------------ Archive Location ------------------------
+ARCHIVE_BASE_URL = "https://nsearchives.nseindia.com/archives/equities/bhavcopy/pr"
+
+DOWNLOAD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0',
+    'Referer': 'https://www.nseindia.com/'
+}
+
+
+# ------------------------ Trading Calendar ------------------------
+def is_trading_day(day):
+    return get_calendar().is_trading_day(day)
+
+
+def get_previous_trading_day(current_date=None):
+    return get_calendar().previous_trading_day(current_date or datetime.now().date())
+
+
+def get_archive_name(trade_date):
+    """Archive file name for a trading day, e.g. PR040625.zip"""
+    return f"PR{trade_date.strftime('%d%m%y')}.zip"
+
+
 # ------------------------ Session Directory ------------------------
-def create_session_directory():
+def create_session_directory(with_extract_dir=True):
     """Create unique directory for each download session"""
     session_time = datetime.now().strftime("%Y%m%d_%H%M%S")
     base_path = Path(f"./bhavcopy_sessions/session_{session_time}")
@@ -24,7 +49,8 @@ def create_session_directory():
     extract_path = base_path / "extracted_files"
 
     zip_path.mkdir(parents=True, exist_ok=True)
-    extract_path.mkdir(parents=True, exist_ok=True)
+    if with_extract_dir:
+        extract_path.mkdir(parents=True, exist_ok=True)
 
     return {
         'base_path': base_path,
@@ -35,57 +61,52 @@ def create_session_directory():
 
 
 # ------------------------ Bhavcopy Download ------------------------
-def download_today_bhavcopy():
-    dirs = create_session_directory()
+def download_today_bhavcopy(extract=True, cache=None, refresh=False):
+    """
+    Downloads the previous trading day's archive into a new session directory.
+
+    With ``extract=False`` the archive is only saved (its path is returned as
+    ``dirs['zip_file']``) so it can be streamed with processor.process_archive
+    instead of being unpacked into ``extracted_files/``.
+
+    Archives come from the local download cache (see download_cache.py)
+    when already fetched; ``refresh=True`` revalidates the cached copy with
+    a conditional GET.
+    """
+    dirs = create_session_directory(extract)
     logging.info(f"Created new session directory: {dirs['base_path']}")
 
-    # NSE holidays (update as needed)
-    NSE_HOLIDAYS = [
-        "2025-02-26", "2025-03-14", "2025-03-31", "2025-04-10",
-        "2025-04-14", "2025-04-18", "2025-05-01", "2025-08-15",
-        "2025-08-27", "2025-10-02", "2025-10-21", "2025-10-22",
-        "2025-11-05", "2025-12-25"
-    ]
-
-    def get_previous_trading_day(current_date=None):
-        if current_date is None:
-            current_date = datetime.now().date()
-        previous_day = current_date - timedelta(days=1)
-        while previous_day.weekday() >= 5 or previous_day.strftime("%Y-%m-%d") in NSE_HOLIDAYS:
-            previous_day -= timedelta(days=1)
-        return previous_day
-
     last_trading_day = get_previous_trading_day()
     logging.info(f"Last trading day: {last_trading_day}")
 
-    day = last_trading_day.strftime('%d')
-    month = last_trading_day.strftime('%m')
-    year_short = last_trading_day.strftime('%y')
-
-    url = f"https://nsearchives.nseindia.com/archives/equities/bhavcopy/pr/PR{day}{month}{year_short}.zip"
-
-    headers = {
-        'User-Agent': 'Mozilla/5.0',
-        'Referer': 'https://www.nseindia.com/'
-    }
+    archive_name = get_archive_name(last_trading_day)
+    url = f"{ARCHIVE_BASE_URL}/{archive_name}"
 
+    cache = cache or DownloadCache()
     try:
         logging.info(f"Attempting to download: {url}")
-        response = requests.get(url, headers=headers, timeout=10)
-
-        if response.status_code == 200:
-            zip_filename = dirs['zip_path'] / f"PR{day}{month}{year_short}.zip"
-            with open(zip_filename, 'wb') as f:
-                f.write(response.content)
-            logging.info(f"Downloaded successfully to {zip_filename}")
-
-            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                z.extractall(dirs['extract_path'])
+        with requests.Session() as session:
+            session.headers.update(DOWNLOAD_HEADERS)
+            cached_path = cache.fetch(session, url, archive_name, refresh=refresh, timeout=10)
+        cache.log_summary()
+
+        if cached_path is not None:
+            # Hard-linked from the cache, so repeated runs do not copy the archive.
+            zip_filename = link_or_copy(cached_path, dirs['zip_path'] / archive_name)
+            logging.info(f"Archive available at {zip_filename}")
+            dirs['zip_file'] = zip_filename
+
+            with zipfile.ZipFile(zip_filename) as z:
+                if extract:
+                    z.extractall(dirs['extract_path'])
                 extracted_files = z.namelist()
 
-            logging.info(f"Extracted {len(extracted_files)} files to {dirs['extract_path']}")
-            for file in extracted_files:
-                logging.info(f"Extracted: {file}")
+            if extract:
+                logging.info(f"Extracted {len(extracted_files)} files to {dirs['extract_path']}")
+                for file in extracted_files:
+                    logging.info(f"Extracted: {file}")
+            else:
+                logging.info(f"Archive contains {len(extracted_files)} files (not extracted)")
 
             # Save session info into a text file
             session_info_file = dirs['base_path'] / "session_info.txt"
@@ -97,7 +118,7 @@ def download_today_bhavcopy():
 
             return dirs  # Return directory info for further processing
         else:
-            logging.error(f"File not found. Status: {response.status_code}")
+            logging.error(f"File not found: {url}")
     except Exception as e:
         logging.error(f"Error during download or extraction check your internet Connection try again: {e}")
 
@@ -0,0 +1,403 @@
+"""
+Technical indicators over a symbol-by-date Panel (see panel.py).
+
+Every indicator is computed for the whole universe at once: windowed ones
+(SMA, Bollinger bands, VWAP) with cumulative-sum rolling kernels along the
+date axis, recursive ones (EMA, RSI, ATR) with one vectorized step per
+trading day across all symbols. There are no per-symbol Python loops.
+
+NaN marks a day a symbol did not trade. A window that contains one yields
+NaN; the recursive indicators carry their state over it and are seeded
+with the first value (like pandas' ewm(adjust=False)), so their first few
+values are a warm-up.
+
+IndicatorEngine.compute() runs a set of indicators over a panel's full
+history and keeps each indicator's state. After Panel.append_day,
+IndicatorEngine.update() produces the new day's values from that state in
+O(symbols) instead of recomputing history:
+
+    engine = IndicatorEngine(DEFAULT_INDICATORS)
+    history = engine.compute(panel)       # {"sma_20": 2-D array, ...}
+    panel.append_day(day, keys, values)
+    latest = engine.update(panel)         # {"sma_20": 1-D array, ...}
+"""
+import argparse
+from datetime import date
+
+import numpy as np
+
+
+# -----------------------
+# Rolling Kernels
+# -----------------------
+def rolling_sum(values, window):
+    """
+    Sums of the last ``window`` values along the date axis; NaN until the
+    window is full and wherever it holds a NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    missing = np.isnan(values)
+    has_gaps = missing.any()
+    padded = np.zeros(values.shape[:-1] + (values.shape[-1] + 1,))
+    np.cumsum(np.where(missing, 0.0, values) if has_gaps else values, axis=-1, out=padded[..., 1:])
+
+    sums = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return sums
+    sums[..., window - 1:] = padded[..., window:] - padded[..., :-window]
+    if has_gaps:
+        gaps = np.zeros(padded.shape, dtype=np.int32)
+        np.cumsum(missing, axis=-1, out=gaps[..., 1:])
+        sums[..., window - 1:][(gaps[..., window:] - gaps[..., :-window]) > 0] = np.nan
+    return sums
+
+
+def rolling_mean(values, window):
+    return rolling_sum(values, window) / window
+
+
+def rolling_std(values, window):
+    """Population standard deviation over the window (as Bollinger bands use)."""
+    values = np.asarray(values, dtype=float)
+    mean = rolling_mean(values, window)
+    mean_sq = rolling_mean(values * values, window)
+    return np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+
+def _last_columns(values, window):
+    """The last ``window`` date columns, left-padded with NaN when the history is shorter."""
+    tail = values[:, -window:]
+    if tail.shape[1] < window:
+        tail = np.hstack([np.full((values.shape[0], window - tail.shape[1]), np.nan), tail])
+    return tail.copy()
+
+
+def _by_date(step, *arrays):
+    """
+    Applies ``step`` to each date column in order and stacks the results.
+    The columns are copied out date-major first, so every step reads
+    contiguous memory.
+    """
+    columns = [np.ascontiguousarray(np.asarray(array, dtype=float).T) for array in arrays]
+    out = np.empty(columns[0].shape)
+    for j in range(out.shape[0]):
+        out[j] = step(*(column[j] for column in columns))
+    return out.T
+
+
+def _pad_rows(state, rows, fill=np.nan):
+    """Extends per-symbol state to ``rows`` symbols (new symbols appended by Panel.append_day)."""
+    if state.shape[0] >= rows:
+        return state
+    extra = np.full((rows - state.shape[0],) + state.shape[1:], fill, dtype=state.dtype)
+    return np.concatenate([state, extra])
+
+
+class _Window:
+    """The last ``window`` columns of one or more fields, for incremental windowed indicators."""
+    def __init__(self, window):
+        self.window = window
+        self.buffers = {}
+
+    def prime(self, panel, fields):
+        for field in fields:
+            self.buffers[field] = _last_columns(panel[field], self.window)
+
+    def push(self, panel, fields):
+        for field in fields:
+            buffer = _pad_rows(self.buffers[field], len(panel.symbols))
+            buffer = np.roll(buffer, -1, axis=1)
+            buffer[:, -1] = panel[field][:, -1]
+            self.buffers[field] = buffer
+        return self.buffers
+
+
+class _Smoother:
+    """
+    Exponential smoothing with factor ``alpha`` applied one date column at
+    a time across all symbols. NaN inputs keep the previous state.
+    """
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.state = None
+
+    def step(self, values):
+        if self.state is None:
+            self.state = np.full(len(values), np.nan)
+        self.state = _pad_rows(self.state, len(values))
+        valid = ~np.isnan(values)
+        seed = valid & np.isnan(self.state)
+        updated = self.state + self.alpha * (values - self.state)
+        self.state = np.where(seed, values, np.where(valid, updated, self.state))
+        return np.where(valid, self.state, np.nan)
+
+    def run(self, values):
+        return _by_date(self.step, values)
+
+
+class _LastValid:
+    """The latest non-NaN value per symbol (the previous close across non-trading days)."""
+    def __init__(self):
+        self.state = None
+
+    def step(self, values):
+        if self.state is None:
+            self.state = np.full(len(values), np.nan)
+        previous = _pad_rows(self.state, len(values))
+        self.state = np.where(np.isnan(values), previous, values)
+        return previous
+
+    def run(self, values):
+        return _by_date(self.step, values)
+
+
+# -----------------------
+# Indicators
+# -----------------------
+class Indicator:
+    """
+    compute(panel) returns {output name: 2-D array} over the whole history
+    and keeps the state update(panel) needs to produce the panel's newest
+    day as {output name: 1-D array}.
+    """
+    fields = ()
+
+    def compute(self, panel):
+        raise NotImplementedError
+
+    def update(self, panel):
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    def __init__(self, window=20, field="close"):
+        self.window = window
+        self.field = field
+        self.fields = (field,)
+        self.name = f"sma_{window}" if field == "close" else f"sma_{field}_{window}"
+        self._buffer = _Window(window)
+
+    def compute(self, panel):
+        self._buffer.prime(panel, self.fields)
+        return {self.name: rolling_mean(panel[self.field], self.window)}
+
+    def update(self, panel):
+        window = self._buffer.push(panel, self.fields)[self.field]
+        return {self.name: rolling_mean(window, self.window)[:, -1]}
+
+
+class EMA(Indicator):
+    def __init__(self, window=20, field="close"):
+        self.window = window
+        self.field = field
+        self.fields = (field,)
+        self.name = f"ema_{window}" if field == "close" else f"ema_{field}_{window}"
+        self._smoother = None
+
+    def compute(self, panel):
+        self._smoother = _Smoother(2.0 / (self.window + 1))
+        return {self.name: self._smoother.run(panel[self.field])}
+
+    def update(self, panel):
+        return {self.name: self._smoother.step(panel[self.field][:, -1])}
+
+
+class RSI(Indicator):
+    """Wilder's relative strength index on close-to-close changes."""
+    fields = ("close",)
+
+    def __init__(self, window=14):
+        self.window = window
+        self.name = f"rsi_{window}"
+
+    def _reset(self):
+        self._previous = _LastValid()
+        self._gains = _Smoother(1.0 / self.window)
+        self._losses = _Smoother(1.0 / self.window)
+
+    def _rsi(self, close, previous):
+        change = close - previous
+        gain = self._gains.step(np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)))
+        loss = self._losses.step(np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+        return np.where((loss == 0) & ~np.isnan(gain), 100.0, rsi)
+
+    def compute(self, panel):
+        self._reset()
+        close = panel["close"]
+        return {self.name: _by_date(self._rsi, close, self._previous.run(close))}
+
+    def update(self, panel):
+        close = panel["close"][:, -1]
+        return {self.name: self._rsi(close, self._previous.step(close))}
+
+
+class ATR(Indicator):
+    """Wilder's average true range; the first day's true range is high - low."""
+    fields = ("high", "low", "close")
+
+    def __init__(self, window=14):
+        self.window = window
+        self.name = f"atr_{window}"
+
+    @staticmethod
+    def true_range(high, low, previous_close):
+        spread = high - low
+        with np.errstate(invalid="ignore"):
+            gaps = np.fmax(np.abs(high - previous_close), np.abs(low - previous_close))
+        # fmax ignores the NaN previous close of a symbol's first day.
+        return np.where(np.isnan(spread), np.nan, np.fmax(spread, gaps))
+
+    def compute(self, panel):
+        self._previous = _LastValid()
+        self._smoother = _Smoother(1.0 / self.window)
+        previous = self._previous.run(panel["close"])
+        true_range = self.true_range(panel["high"], panel["low"], previous)
+        return {self.name: self._smoother.run(true_range)}
+
+    def update(self, panel):
+        previous = self._previous.step(panel["close"][:, -1])
+        true_range = self.true_range(panel["high"][:, -1], panel["low"][:, -1], previous)
+        return {self.name: self._smoother.step(true_range)}
+
+
+class Bollinger(Indicator):
+    """Middle band (SMA) and upper/lower bands ``width`` standard deviations away."""
+    fields = ("close",)
+
+    def __init__(self, window=20, width=2.0):
+        self.window = window
+        self.width = width
+        self.name = f"bollinger_{window}"
+        self._buffer = _Window(window)
+
+    def _bands(self, close):
+        middle = rolling_mean(close, self.window)
+        spread = self.width * rolling_std(close, self.window)
+        return {f"{self.name}_middle": middle, f"{self.name}_upper": middle + spread,
+                f"{self.name}_lower": middle - spread}
+
+    def compute(self, panel):
+        self._buffer.prime(panel, self.fields)
+        return self._bands(panel["close"])
+
+    def update(self, panel):
+        window = self._buffer.push(panel, self.fields)["close"]
+        return {name: band[:, -1] for name, band in self._bands(window).items()}
+
+
+class VWAP(Indicator):
+    """
+    Volume-weighted average price over ``window`` days: traded value over
+    traded quantity. The bhavcopy has no intraday trades, so window=1 is
+    the day's average traded price.
+    """
+    fields = ("value", "volume")
+
+    def __init__(self, window=20):
+        self.window = window
+        self.name = f"vwap_{window}"
+        self._buffer = _Window(window)
+
+    def _vwap(self, value, volume):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = rolling_sum(value, self.window) / rolling_sum(volume, self.window)
+        return np.where(np.isinf(vwap), np.nan, vwap)
+
+    def compute(self, panel):
+        self._buffer.prime(panel, self.fields)
+        return {self.name: self._vwap(panel["value"], panel["volume"])}
+
+    def update(self, panel):
+        window = self._buffer.push(panel, self.fields)
+        return {self.name: self._vwap(window["value"], window["volume"])[:, -1]}
+
+
+INDICATORS = {
+    "sma": SMA,
+    "ema": EMA,
+    "rsi": RSI,
+    "atr": ATR,
+    "bollinger": Bollinger,
+    "vwap": VWAP,
+}
+
+DEFAULT_INDICATORS = [("sma", 20), ("sma", 50), ("ema", 12), ("ema", 26), ("rsi", 14), ("atr", 14),
+                      ("bollinger", 20, 2.0), ("vwap", 20)]
+
+
+def make_indicator(spec):
+    """An Indicator from a spec such as ("sma", 20) or ("bollinger", 20, 2.0); instances pass through."""
+    if isinstance(spec, Indicator):
+        return spec
+    name, *args = spec
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator: {name}")
+    return INDICATORS[name](*args)
+
+
+# -----------------------
+# Engine
+# -----------------------
+class IndicatorEngine:
+    def __init__(self, specs=DEFAULT_INDICATORS):
+        self.indicators = [make_indicator(spec) for spec in specs]
+        self.length = None
+
+    def compute(self, panel):
+        """Every indicator over the panel's full history: {output name: 2-D array}."""
+        results = {}
+        for indicator in self.indicators:
+            missing = [field for field in indicator.fields if field not in panel]
+            if missing:
+                raise ValueError(f"Panel has no {', '.join(missing)} for {type(indicator).__name__}")
+            results.update(indicator.compute(panel))
+        self.length = panel.length
+        return results
+
+    def update(self, panel):
+        """
+        Values for the day just appended to ``panel``: {output name: 1-D
+        array} aligned with panel.symbols. Call once per Panel.append_day.
+        """
+        if self.length is None:
+            raise RuntimeError("compute() must run before update()")
+        if panel.length != self.length + 1:
+            raise ValueError(f"Expected one new day after {self.length}, the panel has {panel.length}")
+        results = {}
+        for indicator in self.indicators:
+            results.update(indicator.update(panel))
+        self.length = panel.length
+        return results
+
+
+def latest_values(results, panel, symbol):
+    """The last value of every indicator for one symbol, from compute() or update() output."""
+    row = panel.symbol_index[symbol]
+    return {name: float(values[row] if values.ndim == 1 else values[row, -1]) for name, values in results.items()}
+
+
+if __name__ == "__main__":
+    from db_adapter import SQLAlchemyAdapter
+    from panel import PANEL_MODELS, load_panel
+    from processor import get_model_mapping
+
+    arg_parser = argparse.ArgumentParser(description="Print the latest indicator values for some symbols.")
+    arg_parser.add_argument("symbols", nargs="+")
+    arg_parser.add_argument("--model", choices=PANEL_MODELS, default="PdRecord")
+    arg_parser.add_argument("--start", type=date.fromisoformat, default=None, help="First date, YYYY-MM-DD")
+    arg_parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last date, YYYY-MM-DD")
+    arg_parser.add_argument("--db-config", default="db_config.json")
+    args = arg_parser.parse_args()
+
+    panel = load_panel(SQLAlchemyAdapter.from_config(args.db_config), get_model_mapping()[args.model],
+                       args.start, args.end)
+    results = IndicatorEngine().compute(panel)
+    print(f"{len(panel.symbols)} symbols x {panel.length} days")
+    for symbol in args.symbols:
+        if symbol not in panel.symbol_index:
+            print(f"{symbol}: not found")
+            continue
+        values = latest_values(results, panel, symbol)
+        print(symbol + ": " + ", ".join(f"{name}={value:.2f}" for name, value in values.items()))
@@ -1,19 +1,30 @@
 from pathlib import Path
+import argparse
 import logging
+import metrics
 from download_extract import download_today_bhavcopy
-from processor import process_files
+from processor import process_archive
 
 if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Download the last trading day's bhavcopy and load it.")
+    metrics.add_arguments(arg_parser)
+    args = arg_parser.parse_args()
+    metrics.start_run_from_args(args)
+
     # Ensure the bhavcopy_sessions folder exists
     Path("./bhavcopy_sessions").mkdir(exist_ok=True)
 
-    # Download and extract the ZIP file from NSE
-    dirs = download_today_bhavcopy()
+    # Download the ZIP file from NSE (kept on disk, not extracted)
+    dirs = download_today_bhavcopy(extract=False)
 
     if dirs is None:
         logging.error("Download failed. Exiting.")
+        metrics.export_from_args(args)
         exit(1)
 
-    # Process the files in the extracted folder using our DB configuration (via db_config.json)
-    extract_path = str(dirs["extract_path"])
-    process_files(extract_path)
+    # Stream the CSV members straight out of the archive using our DB configuration (via db_config.json).
+    # Upsert on the natural keys so running twice for the same day does not duplicate rows.
+    process_archive(dirs["zip_file"], mode="upsert")
+
+    # Per-stage timings and counters: log summary plus any --metrics-* sinks.
+    metrics.export_from_args(args)
@@ -0,0 +1,323 @@
+"""
+Timing spans and counters for the ingest pipeline.
+
+Stages (download, zip_open, parse, transform, insert, commit) are timed
+with ``span(stage, file=..., model=...)`` and summed per (stage, file,
+model); counters such as rows, bytes, rejected_rows and retries are summed
+per (name, file, model). The pipeline records into the run returned by
+current(); start_run() begins a new one.
+
+A run can be exported as a JSON report, a Prometheus textfile (for
+node_exporter's textfile collector) or StatsD packets over UDP.
+
+Stages can also be profiled without touching the code: with
+``profile={"insert": "cprofile"}`` the insert spans run under cProfile and
+the stats are dumped to <profile_dir>/insert.prof when the run is exported
+(open them with pstats or snakeviz); ``"tracemalloc"`` records the peak
+bytes allocated inside the stage instead. Profiling only covers spans in
+this process, not parallel workers.
+"""
+import contextlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+
+STAGES = ("download", "zip_open", "parse", "transform", "insert", "commit")
+PROFILERS = ("cprofile", "tracemalloc")
+
+
+class Metrics:
+    def __init__(self, profile=None, profile_dir="profiles"):
+        self.started = datetime.now()
+        self._started_at = time.perf_counter()
+        self.spans = {}         # {(stage, file, model): [calls, seconds, max_seconds]}
+        self.counters = {}      # {(name, file, model): value}
+        self.profile = dict(profile or {})
+        self.profile_dir = profile_dir
+        self.alloc_peaks = {}   # {stage: peak bytes allocated during one span}
+        self._profilers = {}    # {stage: cProfile.Profile}
+        self._profiling = False
+        self._lock = threading.Lock()
+
+        unknown = set(self.profile.values()) - set(PROFILERS)
+        if unknown:
+            raise ValueError(f"Unknown profiler: {', '.join(sorted(unknown))}")
+
+    # --- Recording ---
+    @contextlib.contextmanager
+    def span(self, stage, file=None, model=None):
+        """Times the block as one call of ``stage`` for the given file and model."""
+        profiler = self._start_profile(stage) if stage in self.profile else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiler is not None:
+                self._stop_profile(stage, profiler)
+            self.add_span(stage, elapsed, file, model)
+
+    def add_span(self, stage, seconds, file=None, model=None, calls=1):
+        with self._lock:
+            entry = self.spans.setdefault((stage, file, model), [0, 0.0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds / calls if calls else 0.0)
+
+    def count(self, name, value=1, file=None, model=None):
+        with self._lock:
+            key = (name, file, model)
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    # --- Profiling hooks ---
+    def _start_profile(self, stage):
+        # One profiled span at a time: nested or concurrent spans are only timed.
+        with self._lock:
+            if self._profiling:
+                return None
+            self._profiling = True
+
+        if self.profile[stage] == "cprofile":
+            import cProfile
+
+            profiler = self._profilers.setdefault(stage, cProfile.Profile())
+            profiler.enable()
+            return profiler
+
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return tracemalloc
+
+    def _stop_profile(self, stage, profiler):
+        if self.profile[stage] == "cprofile":
+            profiler.disable()
+        else:
+            _, peak = profiler.get_traced_memory()
+            self.alloc_peaks[stage] = max(self.alloc_peaks.get(stage, 0), peak)
+        with self._lock:
+            self._profiling = False
+
+    def dump_profiles(self):
+        """Writes the cProfile stats of every profiled stage; returns {stage: path}."""
+        paths = {}
+        if self._profilers:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        for stage, profiler in self._profilers.items():
+            path = os.path.join(self.profile_dir, f"{stage}.prof")
+            profiler.dump_stats(path)
+            paths[stage] = path
+        return paths
+
+    # --- Worker processes ---
+    def drain(self):
+        """Returns the recorded spans and counters as plain lists and clears them."""
+        with self._lock:
+            snapshot = {
+                "spans": [list(key) + values for key, values in self.spans.items()],
+                "counters": [list(key) + [value] for key, value in self.counters.items()],
+            }
+            self.spans = {}
+            self.counters = {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Adds a drain() snapshot from another process to this run."""
+        for stage, file, model, calls, seconds, max_seconds in snapshot["spans"]:
+            with self._lock:
+                entry = self.spans.setdefault((stage, file, model), [0, 0.0, 0.0])
+                entry[0] += calls
+                entry[1] += seconds
+                entry[2] = max(entry[2], max_seconds)
+        for name, file, model, value in snapshot["counters"]:
+            self.count(name, value, file, model)
+
+    # --- Summaries ---
+    def stage_totals(self):
+        """{stage: [calls, seconds]} summed over files and models."""
+        totals = {}
+        for (stage, _, _), (calls, seconds, _) in self.spans.items():
+            total = totals.setdefault(stage, [0, 0.0])
+            total[0] += calls
+            total[1] += seconds
+        return totals
+
+    def counter_totals(self):
+        totals = {}
+        for (name, _, _), value in self.counters.items():
+            totals[name] = totals.get(name, 0) + value
+        return totals
+
+    def report(self):
+        stage_order = {stage: i for i, stage in enumerate(STAGES)}
+        totals = sorted(self.stage_totals().items(), key=lambda item: stage_order.get(item[0], len(STAGES)))
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "seconds": round(time.perf_counter() - self._started_at, 3),
+            "stages": {stage: {"calls": calls, "seconds": round(seconds, 4)} for stage, (calls, seconds) in totals},
+            "counters": self.counter_totals(),
+            "spans": [
+                {"stage": stage, "file": file, "model": model, "calls": calls,
+                 "seconds": round(seconds, 4), "max_seconds": round(max_seconds, 4)}
+                for (stage, file, model), (calls, seconds, max_seconds) in sorted(self.spans.items(), key=_sort_key)
+            ],
+            "counters_by_file": [
+                {"name": name, "file": file, "model": model, "value": value}
+                for (name, file, model), value in sorted(self.counters.items(), key=_sort_key)
+            ],
+            "alloc_peak_bytes": dict(self.alloc_peaks),
+        }
+
+    def log_summary(self):
+        for stage, entry in self.report()["stages"].items():
+            logging.info(f"Stage {stage}: {entry['seconds']:.2f}s over {entry['calls']} calls")
+        for name, value in sorted(self.counter_totals().items()):
+            logging.info(f"Counter {name}: {value}")
+
+    # --- Sinks ---
+    def write_report(self, path):
+        report = self.report()
+        report["profiles"] = self.dump_profiles()
+        _write_atomic(path, json.dumps(report, indent=2, default=str))
+        logging.info(f"Metrics report written to {path}")
+        return report
+
+    def write_prometheus(self, path, prefix="bhavcopy"):
+        """Writes the run in the Prometheus text exposition format, for the textfile collector."""
+        lines = [
+            f"# HELP {prefix}_stage_seconds_total Seconds spent in each ingest stage.",
+            f"# TYPE {prefix}_stage_seconds_total counter",
+        ]
+        for (stage, file, model), (_, seconds, _) in sorted(self.spans.items(), key=_sort_key):
+            lines.append(f"{prefix}_stage_seconds_total{_labels(stage=stage, file=file, model=model)} {seconds:.6f}")
+        lines += [
+            f"# HELP {prefix}_stage_calls_total Timed calls of each ingest stage.",
+            f"# TYPE {prefix}_stage_calls_total counter",
+        ]
+        for (stage, file, model), (calls, _, _) in sorted(self.spans.items(), key=_sort_key):
+            lines.append(f"{prefix}_stage_calls_total{_labels(stage=stage, file=file, model=model)} {calls}")
+
+        by_name = {}
+        for (name, file, model), value in sorted(self.counters.items(), key=_sort_key):
+            by_name.setdefault(name, []).append(f"{prefix}_{name}_total{_labels(file=file, model=model)} {value}")
+        for name, samples in by_name.items():
+            lines += [f"# TYPE {prefix}_{name}_total counter"] + samples
+
+        lines += [
+            f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+            f"{prefix}_last_run_timestamp_seconds {self.started.timestamp():.0f}",
+        ]
+        # The collector may read the file at any moment, so replace it in one step.
+        _write_atomic(path, "\n".join(lines) + "\n")
+        logging.info(f"Prometheus metrics written to {path}")
+
+    def send_statsd(self, address, prefix="bhavcopy"):
+        """Sends per-stage timings (ms, per model) and counter totals to a StatsD server at "host:port"."""
+        host, _, port = address.rpartition(":")
+        per_model = {}
+        for (stage, _, model), (_, seconds, _) in self.spans.items():
+            key = f"{stage}.{model}" if model else stage
+            per_model[key] = per_model.get(key, 0.0) + seconds
+        packets = [f"{prefix}.stage.{key}:{seconds * 1000:.3f}|ms" for key, seconds in sorted(per_model.items())]
+        packets += [f"{prefix}.{name}:{value}|c" for name, value in sorted(self.counter_totals().items())]
+
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            for packet in packets:
+                sock.sendto(packet.encode("ascii"), (host or "127.0.0.1", int(port)))
+        logging.info(f"Sent {len(packets)} StatsD metrics to {address}")
+
+    def export(self, report_path=None, prometheus_path=None, statsd_address=None):
+        """Writes the run to every sink that is configured."""
+        if report_path:
+            self.write_report(report_path)
+        else:
+            self.dump_profiles()
+        if prometheus_path:
+            self.write_prometheus(prometheus_path)
+        if statsd_address:
+            self.send_statsd(statsd_address)
+
+
+def _sort_key(item):
+    return tuple("" if part is None else str(part) for part in item[0])
+
+
+def _labels(**labels):
+    parts = []
+    for name, value in labels.items():
+        if value is None:
+            continue
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# -----------------------
+# Current Run
+# -----------------------
+_current = Metrics()
+
+
+def current():
+    """The run the pipeline is recording into."""
+    return _current
+
+
+def start_run(profile=None, profile_dir="profiles"):
+    """Starts recording a new run and returns it."""
+    global _current
+    _current = Metrics(profile, profile_dir)
+    return _current
+
+
+def span(stage, file=None, model=None):
+    return _current.span(stage, file, model)
+
+
+def count(name, value=1, file=None, model=None):
+    _current.count(name, value, file, model)
+
+
+def add_arguments(arg_parser):
+    """Adds the --metrics-* and --profile options shared by the command-line entry points."""
+    arg_parser.add_argument("--metrics-report", metavar="PATH", help="Write a JSON run report")
+    arg_parser.add_argument("--metrics-prometheus", metavar="PATH",
+                            help="Write a Prometheus textfile (e.g. into node_exporter's textfile directory)")
+    arg_parser.add_argument("--metrics-statsd", metavar="HOST:PORT", help="Send the run's metrics to StatsD")
+    arg_parser.add_argument("--profile", metavar="STAGE=PROFILER,...", type=parse_profile, default={},
+                            help="Profile stages with cprofile or tracemalloc, e.g. insert=cprofile")
+    arg_parser.add_argument("--profile-dir", default="profiles", help="Where cProfile stats are written")
+
+
+def start_run_from_args(args):
+    return start_run(args.profile, args.profile_dir)
+
+
+def export_from_args(args):
+    run = current()
+    run.log_summary()
+    run.export(args.metrics_report, args.metrics_prometheus, args.metrics_statsd)
+
+
+def parse_profile(value):
+    """Parses "stage=profiler,..." (e.g. "insert=cprofile,parse=tracemalloc") from the command line."""
+    profile = {}
+    for item in filter(None, (part.strip() for part in (value or "").split(","))):
+        stage, _, profiler = item.partition("=")
+        profile[stage] = profiler or "cprofile"
+    return profile
@@ -0,0 +1,100 @@
+"""
+Schema migrations run by SQLAlchemyAdapter.ensure_schema.
+
+create_all only creates missing tables; it never changes one that already
+exists. MIGRATIONS maps a schema version to the step that brings an older
+database up to it. ensure_schema runs every step above the stored version,
+in order, after create_all and before recording the new version. Steps
+inspect the tables first, so running one on a database that is already
+up to date does nothing.
+"""
+import logging
+from datetime import date
+
+from sqlalchemy import MetaData, Table, inspect, text
+
+from models import Base, encoded_id_column, get_encoded_columns
+from partitioning import bucket_table
+
+
+def encode_identifiers(db_adapter):
+    """
+    Versions 1 and 2 -> 3: identifier text (symbol, series, security,
+    market) is replaced by symbol dictionary ids (see symbol_dictionary.py).
+
+    For every fact table, SQLite date buckets included, that still has a
+    text column: adds the missing ``<column>_id``, gives every stored name a
+    dictionary id and fills the ids in (version 2 left blank names NULL),
+    then drops the indexes on the text, the text columns themselves, and
+    creates the model's indexes on the ids.
+    """
+    engine = db_adapter.engine
+    inspector = inspect(engine)
+    table_names = inspector.get_table_names()
+    for model_class in _model_classes():
+        encoded = get_encoded_columns(model_class)
+        if not encoded:
+            continue
+        for name, target in _physical_tables(model_class, table_names):
+            columns = {column["name"] for column in inspector.get_columns(name)}
+            legacy = {column: kind for column, kind in encoded.items() if column in columns}
+            if not legacy:
+                continue
+            logging.info(f"Migrating {name}: encoding {', '.join(legacy)}")
+            with engine.begin() as conn:
+                for column in legacy:
+                    if encoded_id_column(column) not in columns:
+                        conn.execute(text(f"ALTER TABLE {name} ADD {encoded_id_column(column)} INTEGER"))
+            for column, kind in legacy.items():
+                _fill_ids(db_adapter, name, column, kind)
+            with engine.begin() as conn:
+                reflected = Table(name, MetaData(), autoload_with=conn)
+                for index in list(reflected.indexes):
+                    if any(column.name in legacy for column in index.columns):
+                        index.drop(conn)
+                for column in legacy:
+                    conn.execute(text(f"ALTER TABLE {name} DROP COLUMN {column}"))
+                for index in target.indexes:
+                    index.create(conn, checkfirst=True)
+
+
+def _fill_ids(db_adapter, table_name, column, kind):
+    id_column = encoded_id_column(column)
+    with db_adapter.engine.connect() as conn:
+        names = conn.execute(text(
+            f"SELECT DISTINCT {column} FROM {table_name} WHERE {column} IS NOT NULL"
+        )).scalars().all()
+    db_adapter.symbols.ids_for(kind, names)
+    with db_adapter.engine.begin() as conn:
+        conn.execute(text(
+            f"UPDATE {table_name} SET {id_column} = (SELECT d.id FROM symbol_dictionary d "
+            f"WHERE d.kind = :kind AND d.name = {table_name}.{column}) "
+            f"WHERE {id_column} IS NULL AND {column} IS NOT NULL"
+        ), {"kind": kind})
+
+
+def _model_classes():
+    return [mapper.class_ for mapper in Base.registry.mappers]
+
+
+def _physical_tables(model_class, table_names):
+    """
+    (table name, Table with the model's indexes) for the model's table and
+    every SQLite date bucket of it (see partitioning.bucket_table).
+    """
+    base = model_class.__tablename__
+    tables = [(base, model_class.__table__)] if base in table_names else []
+    for name in table_names:
+        suffix = name[len(base) + 1:]
+        if not name.startswith(f"{base}_") or len(suffix) not in (4, 6) or not suffix.isdigit():
+            continue
+        granularity = "month" if len(suffix) == 6 else "year"
+        day = date(int(suffix[:4]), int(suffix[4:]) if granularity == "month" else 1, 1)
+        tables.append((name, bucket_table(model_class, day, granularity)))
+    return tables
+
+
+# Schema version -> step bringing the previous versions up to it.
+MIGRATIONS = {
+    3: encode_identifiers,
+}
@@ -1,8 +1,100 @@
-from sqlalchemy import Column, Integer, String, Float, Text
+from sqlalchemy import Column, Date, Index, Integer, String, Float, Text
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
 
+# Rows per executemany batch used by the bulk loader. Models can override it
+# with a ``__batch_size__`` attribute; wide tables use smaller batches so a
+# multi-row INSERT stays well inside the server's packet limits.
+DEFAULT_BATCH_SIZE = 1000
+
+
+def get_batch_size(model_class):
+    """
+    Returns the bulk-insert batch size declared on the model, or the default.
+    """
+    return getattr(model_class, "__batch_size__", DEFAULT_BATCH_SIZE)
+
+
+# Every model declares the columns that identify one row of one trading day
+# in ``__natural_key__``, backed by a unique index. bhav_date is the trading
+# day taken from the file name. Identifier columns are part of the key by
+# their dictionary id; a blank identifier in a key gets the id of "" rather
+# than NULL, and other blank key text is stored as "", so that re-ingesting
+# a file always hits the index.
+def natural_key_index(table_name, *columns):
+    return Index(f"ux_{table_name}_natural_key", *columns, unique=True)
+
+
+def get_natural_key(model_class):
+    return getattr(model_class, "__natural_key__", ())
+
+
+# Identifier text (symbol, series, security, market) is dictionary-encoded:
+# every distinct value of each kind gets a small integer id in the
+# symbol_dictionary table, and the fact tables store only that id, in
+# ``<column>_id``. The parsers still produce the text under ``<column>``; the
+# loader swaps it for the id and the readers swap it back (see
+# symbol_dictionary.py).
+ENCODED_COLUMNS = {
+    "symbol": "symbol",
+    "series": "series",
+    "security": "security",
+    "security_name": "security",
+    "mkt": "market",
+    "market": "market",
+}
+
+
+def encoded_id_column(column):
+    return f"{column}_id"
+
+
+def get_encoded_columns(model_class):
+    """{text column: dictionary kind} for the model's dictionary-encoded columns."""
+    columns = model_class.__table__.columns
+    return {column: kind for column, kind in ENCODED_COLUMNS.items() if encoded_id_column(column) in columns}
+
+
+# The natural-key index leads with bhav_date, so it also serves date-range
+# scans. Per-instrument history ("last N days for X") uses a second index on
+# the dictionary id of the model's ``__lookup_key__`` column (symbol, or
+# security where the file has no symbol) followed by bhav_date.
+def lookup_index(table_name, column):
+    id_column = encoded_id_column(column)
+    return Index(f"ix_{table_name}_{id_column}_date", id_column, "bhav_date")
+
+
+def get_lookup_key(model_class):
+    return getattr(model_class, "__lookup_key__", "symbol")
+
+
+# Bump SCHEMA_VERSION whenever a table is added or changed, with a step in
+# migrations.MIGRATIONS when existing tables change. The loader skips
+# Base.metadata.create_all once the schema_version table records this version.
+SCHEMA_VERSION = 3
+
+
+class SchemaVersion(Base):
+    __tablename__ = 'schema_version'
+    version = Column(Integer, primary_key=True, autoincrement=False)
+
+
+class SymbolEntry(Base):
+    """
+    One dictionary-encoded identifier: (kind, name) -> id, e.g.
+    ("symbol", "RELIANCE") -> 17.
+    """
+    __tablename__ = 'symbol_dictionary'
+    __natural_key__ = ("kind", "name")
+    __table_args__ = (
+        natural_key_index('symbol_dictionary', *__natural_key__),
+    )
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(10), nullable=False)
+    name = Column(String(150), nullable=False)
+
+
 # -----------------------
 # Equity / Dividend Records
 # -----------------------
@@ -12,10 +104,17 @@ class BcRecord(Base):
     Model for 'Bc' files (e.g., Bc040625.csv)
     """
     __tablename__ = 'bc_records'
+    __batch_size__ = 1000
+    __natural_key__ = ("bhav_date", "series_id", "symbol_id", "purpose")
+    __table_args__ = (
+        natural_key_index('bc_records', *__natural_key__),
+        lookup_index('bc_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
-    series = Column(String(10))
-    symbol = Column(String(50))
-    security = Column(String(100))
+    bhav_date = Column(Date, nullable=False)
+    series_id = Column(Integer)
+    symbol_id = Column(Integer)
+    security_id = Column(Integer)
     record_dt = Column(String(20))
     bc_strt_dt = Column(String(20), nullable=True)
     bc_end_dt = Column(String(20), nullable=True)
@@ -30,10 +129,17 @@ class BhRecord(Base):
     Model for 'bh' files (e.g., bh040625.csv)
     """
     __tablename__ = 'bh_records'
+    __batch_size__ = 5000
+    __natural_key__ = ("bhav_date", "series_id", "symbol_id")
+    __table_args__ = (
+        natural_key_index('bh_records', *__natural_key__),
+        lookup_index('bh_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
-    symbol = Column(String(50))
-    series = Column(String(10))
-    security = Column(String(100))
+    bhav_date = Column(Date, nullable=False)
+    symbol_id = Column(Integer)
+    series_id = Column(Integer)
+    security_id = Column(Integer)
     high_low = Column(String(10))
     index_flag = Column(String(10))
 
@@ -43,11 +149,18 @@ class CorpBondRecord(Base):
     Model for 'corpbond' files (e.g., corpbond040625.csv)
     """
     __tablename__ = 'corpbond_records'
+    __batch_size__ = 2000
+    __natural_key__ = ("bhav_date", "series_id", "symbol_id")
+    __table_args__ = (
+        natural_key_index('corpbond_records', *__natural_key__),
+        lookup_index('corpbond_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
-    market = Column(String(10))
-    series = Column(String(10))
-    symbol = Column(String(50))
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    market_id = Column(Integer)
+    series_id = Column(Integer)
+    symbol_id = Column(Integer)
+    security_id = Column(Integer)
     prev_cl_pr = Column(Float, nullable=True)
     open_price = Column(Float, nullable=True)
     high_price = Column(Float, nullable=True)
@@ -66,11 +179,18 @@ class EtfRecord(Base):
     Model for 'etf' files (e.g., etf040625.csv)
     """
     __tablename__ = 'etf_records'
+    __batch_size__ = 2000
+    __natural_key__ = ("bhav_date", "series_id", "symbol_id")
+    __table_args__ = (
+        natural_key_index('etf_records', *__natural_key__),
+        lookup_index('etf_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
-    market = Column(String(10))
-    series = Column(String(10))
-    symbol = Column(String(50))
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    market_id = Column(Integer)
+    series_id = Column(Integer)
+    symbol_id = Column(Integer)
+    security_id = Column(Integer)
     prev_close_price = Column(Float, nullable=True)
     open_price = Column(Float, nullable=True)
     high_price = Column(Float, nullable=True)
@@ -87,17 +207,33 @@ class EtfRecord(Base):
 class GlRecord(Base):
 
     __tablename__ = 'gl_records'
+    __batch_size__ = 5000
+    __natural_key__ = ("bhav_date", "gain_or_loss", "security_id")
+    __lookup_key__ = "security"
+    __table_args__ = (
+        natural_key_index('gl_records', *__natural_key__),
+        lookup_index('gl_records', __lookup_key__),
+    )
     id = Column(Integer, primary_key=True)
+    bhav_date = Column(Date, nullable=False)
     gain_or_loss = Column(String(10))  # "G" (gain) or "L" (loss)
-    security = Column(String(150), index=True)  # Unique key
+    security_id = Column(Integer)
     close_price = Column(Float)  # Mapped from "CLOSE_PRIC"
     prev_close_price = Column(Float)  # Mapped from "PREV_CL_PR"
     percent_change = Column(Float)  # Mapped from "PERCENT_CG"
 
 class HlRecord(Base):
     __tablename__ = 'hl_records'
+    __batch_size__ = 5000
+    __natural_key__ = ("bhav_date", "new_status", "security_id")
+    __lookup_key__ = "security"
+    __table_args__ = (
+        natural_key_index('hl_records', *__natural_key__),
+        lookup_index('hl_records', __lookup_key__),
+    )
     id = Column(Integer, primary_key=True)
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    security_id = Column(Integer)
     new = Column(Float, nullable=True)
     previous = Column(Float, nullable=True)
     new_status = Column(String(10))
@@ -105,11 +241,18 @@ class HlRecord(Base):
 
 class McapRecord(Base):
     __tablename__ = 'mcap_records'
+    __batch_size__ = 2000
+    __natural_key__ = ("bhav_date", "series_id", "symbol_id")
+    __table_args__ = (
+        natural_key_index('mcap_records', *__natural_key__),
+        lookup_index('mcap_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
+    bhav_date = Column(Date, nullable=False)
     trade_date = Column(String(20))
-    symbol = Column(String(50))
-    series = Column(String(10))
-    security_name = Column(String(150))
+    symbol_id = Column(Integer)
+    series_id = Column(Integer)
+    security_name_id = Column(Integer)
     category = Column(String(50))
     last_trade_date = Column(String(20))
     face_value = Column(Float, nullable=True)
@@ -120,11 +263,18 @@ class McapRecord(Base):
 
 class PdRecord(Base):
     __tablename__ = 'pd_records'
+    __batch_size__ = 2000
+    __natural_key__ = ("bhav_date", "mkt_id", "series_id", "symbol_id", "security_id")
+    __table_args__ = (
+        natural_key_index('pd_records', *__natural_key__),
+        lookup_index('pd_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
-    mkt = Column(String(10))
-    series = Column(String(10))
-    symbol = Column(String(50))
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    mkt_id = Column(Integer)
+    series_id = Column(Integer)
+    symbol_id = Column(Integer)
+    security_id = Column(Integer)
     prev_cl_pr = Column(Float, nullable=True)
     open_price = Column(Float, nullable=True)
     high_price = Column(Float, nullable=True)
@@ -141,9 +291,17 @@ class PdRecord(Base):
 
 class PrRecord(Base):
     __tablename__ = 'pr_records'
+    __batch_size__ = 2000
+    __natural_key__ = ("bhav_date", "mkt_id", "security_id")
+    __lookup_key__ = "security"
+    __table_args__ = (
+        natural_key_index('pr_records', *__natural_key__),
+        lookup_index('pr_records', __lookup_key__),
+    )
     id = Column(Integer, primary_key=True)
-    mkt = Column(String(10))
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    mkt_id = Column(Integer)
+    security_id = Column(Integer)
     prev_cl_pr = Column(Float, nullable=True)
     open_price = Column(Float, nullable=True)
     high_price = Column(Float, nullable=True)
@@ -160,11 +318,18 @@ class PrRecord(Base):
 
 class SmeRecord(Base):
     __tablename__ = 'sme_records'
+    __batch_size__ = 2000
+    __natural_key__ = ("bhav_date", "series_id", "symbol_id")
+    __table_args__ = (
+        natural_key_index('sme_records', *__natural_key__),
+        lookup_index('sme_records', "symbol"),
+    )
     id = Column(Integer, primary_key=True)
-    market = Column(String(10))
-    series = Column(String(10))
-    symbol = Column(String(50))
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    market_id = Column(Integer)
+    series_id = Column(Integer)
+    symbol_id = Column(Integer)
+    security_id = Column(Integer)
     prev_cl_pr = Column(Float, nullable=True)
     open_price = Column(Float, nullable=True)
     high_price = Column(Float, nullable=True)
@@ -179,8 +344,16 @@ class SmeRecord(Base):
 
 class TtRecord(Base):
     __tablename__ = 'tt_records'
+    __batch_size__ = 5000
+    __natural_key__ = ("bhav_date", "security_id")
+    __lookup_key__ = "security"
+    __table_args__ = (
+        natural_key_index('tt_records', *__natural_key__),
+        lookup_index('tt_records', __lookup_key__),
+    )
     id = Column(Integer, primary_key=True)
-    security = Column(String(150))
+    bhav_date = Column(Date, nullable=False)
+    security_id = Column(Integer)
     prev_cl_pr = Column(Float, nullable=True)
     close_pric = Column(Float, nullable=True)
     net_trdqty = Column(Integer, nullable=True)
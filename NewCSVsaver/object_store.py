@@ -0,0 +1,104 @@
+"""
+Object storage used by the Lambda handler.
+
+S3ObjectStore talks to S3 through boto3 (imported on first use, so nothing
+else needs it installed). LocalObjectStore keeps the same keys as files
+under a directory, which makes the Lambda flow runnable on a laptop or in
+tests; moto's mocked S3 works with S3ObjectStore as well.
+"""
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+DEFAULT_UPLOAD_WORKERS = 8
+
+
+class ObjectStore:
+    """Minimal key/bytes interface: put, get and list by prefix."""
+    def put(self, key, body):
+        raise NotImplementedError
+
+    def get(self, key):
+        raise NotImplementedError
+
+    def list(self, prefix=""):
+        raise NotImplementedError
+
+
+class S3ObjectStore(ObjectStore):
+    def __init__(self, bucket, client=None):
+        self.bucket = bucket
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("s3")
+        return self._client
+
+    def put(self, key, body):
+        # upload_fileobj switches to a multipart upload for large bodies.
+        self.client.upload_fileobj(io.BytesIO(body), self.bucket, key)
+
+    def get(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def list(self, prefix=""):
+        keys = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []))
+        return keys
+
+
+class LocalObjectStore(ObjectStore):
+    """Objects as files under ``root``; keys map to relative paths."""
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def put(self, key, body):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".part")
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+    def get(self, key):
+        with open(self.root / key, "rb") as f:
+            return f.read()
+
+    def list(self, prefix=""):
+        if not self.root.exists():
+            return []
+        keys = (path.relative_to(self.root).as_posix() for path in self.root.rglob("*") if path.is_file())
+        return sorted(key for key in keys if key.startswith(prefix) and not key.endswith(".part"))
+
+
+def upload_many(store, objects, workers=DEFAULT_UPLOAD_WORKERS, pool=None):
+    """
+    Uploads {key: bytes} concurrently. Returns the futures (one per key)
+    when ``pool`` is given, so the caller can keep working meanwhile;
+    otherwise waits and returns the number of objects uploaded.
+    """
+    if pool is not None:
+        return {key: pool.submit(store.put, key, body) for key, body in objects.items()}
+
+    with ThreadPoolExecutor(max_workers=workers) as own_pool:
+        futures = upload_many(store, objects, pool=own_pool)
+    return wait_uploads(futures)
+
+
+def wait_uploads(futures):
+    """Waits for upload futures; logs failures and returns the number that succeeded."""
+    uploaded = 0
+    for key, future in futures.items():
+        try:
+            future.result()
+            uploaded += 1
+        except Exception as e:
+            logging.error(f"Failed to upload {key}: {e}")
+    return uploaded
@@ -0,0 +1,246 @@
+"""
+Symbol-by-date OHLCV panels built from the stored price tables.
+
+A Panel holds one 2-D float64 array per field (open, high, low, close,
+prev_close, volume, value) with a row per instrument and a column per
+trading day; days an instrument did not trade are NaN. Instruments are
+identified by the model's lookup key (symbol, or security for Pr files).
+
+Panels load from the database (load_panel, reading only the partitions or
+bucket tables in the date range) or from the columnar archive
+(panel_from_columnar), and grow one trading day at a time with append_day.
+The date axis keeps spare capacity, so appending a day is O(symbols).
+"""
+from datetime import date
+
+import numpy as np
+
+from models import get_lookup_key
+
+# Panel field -> the column holding it, by the names the models use.
+FIELD_COLUMNS = {
+    "open": ("open_price",),
+    "high": ("high_price",),
+    "low": ("low_price",),
+    "close": ("close_price",),
+    "prev_close": ("prev_cl_pr", "prev_close_price"),
+    "volume": ("net_trdqty", "net_traded_qty"),
+    "value": ("net_trdval", "net_traded_value"),
+}
+
+# Models with daily OHLCV columns, and the rows a panel keeps by default.
+PANEL_MODELS = ("PdRecord", "PrRecord", "EtfRecord", "SmeRecord")
+DEFAULT_FILTERS = {
+    "PdRecord": {"series": "EQ"},
+}
+
+
+def field_columns(model_class, fields=None):
+    """{panel field: model column} for the fields the model stores."""
+    columns = {}
+    for field, candidates in FIELD_COLUMNS.items():
+        if fields is not None and field not in fields:
+            continue
+        for column in candidates:
+            if column in model_class.__table__.columns:
+                columns[field] = column
+                break
+    return columns
+
+
+def default_filters(model_class):
+    return dict(DEFAULT_FILTERS.get(model_class.__name__, {}))
+
+
+# -----------------------
+# Panel
+# -----------------------
+class Panel:
+    """
+    panel["close"][i, j] is the close of panel.symbols[i] on panel.dates[j].
+    Field arrays are views into buffers with spare date capacity; take a
+    copy before holding on to one across append_day calls.
+    """
+    def __init__(self, symbols, dates, fields, capacity=None):
+        self.symbols = list(symbols)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.length = len(dates)
+        capacity = max(capacity or 0, self.length, 1)
+
+        self._dates = np.zeros(capacity, dtype="datetime64[D]")
+        self._dates[:self.length] = dates
+        self._data = {}
+        for name, values in fields.items():
+            block = np.full((len(self.symbols), capacity), np.nan)
+            block[:, :self.length] = values
+            self._data[name] = block
+
+    @classmethod
+    def from_columns(cls, keys, days, values, capacity=None):
+        """
+        Builds a panel from long-format columns: ``keys`` and ``days`` name
+        the instrument and trading day of each row, ``values`` is
+        {field: array} aligned with them. A repeated (key, day) keeps the last row.
+        """
+        keys = np.asarray(keys, dtype=object)
+        days = np.asarray(days, dtype="datetime64[D]")
+        symbols, rows = np.unique(keys, return_inverse=True) if len(keys) else (np.array([], object), None)
+        dates, cols = np.unique(days, return_inverse=True) if len(days) else (days, None)
+
+        fields = {}
+        for name, column in values.items():
+            block = np.full((len(symbols), len(dates)), np.nan)
+            if rows is not None:
+                block[rows, cols] = np.asarray(column, dtype=float)
+            fields[name] = block
+        return cls(symbols.tolist(), dates, fields, capacity)
+
+    @property
+    def dates(self):
+        return self._dates[:self.length]
+
+    @property
+    def fields(self):
+        return list(self._data)
+
+    @property
+    def shape(self):
+        return len(self.symbols), self.length
+
+    def __getitem__(self, field):
+        return self._data[field][:, :self.length]
+
+    def __contains__(self, field):
+        return field in self._data
+
+    def rows(self, symbols):
+        """Row numbers of ``symbols`` (KeyError for an unknown symbol)."""
+        return np.fromiter((self.symbol_index[symbol] for symbol in symbols), dtype=np.intp, count=len(symbols))
+
+    # --- Appending ---
+    def append_day(self, day, keys, values):
+        """
+        Adds one trading day after the last one. ``keys`` are the
+        instruments traded that day and ``values`` is {field: array}
+        aligned with them; instruments not seen before get a new row that
+        is NaN for the earlier days. Fields missing from ``values`` are NaN.
+        """
+        day = np.datetime64(day, "D")
+        if self.length and day <= self._dates[self.length - 1]:
+            raise ValueError(f"{day} is not after the panel's last day {self._dates[self.length - 1]}")
+
+        new_symbols = [key for key in dict.fromkeys(keys) if key not in self.symbol_index]
+        if new_symbols:
+            self._add_symbols(new_symbols)
+        if self.length == len(self._dates):
+            self._grow(2 * len(self._dates))
+
+        rows = self.rows(list(keys))
+        for name, block in self._data.items():
+            if name in values:
+                block[rows, self.length] = np.asarray(values[name], dtype=float)
+        self._dates[self.length] = day
+        self.length += 1
+        return self.length - 1
+
+    def _add_symbols(self, symbols):
+        for symbol in symbols:
+            self.symbol_index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        for name, block in self._data.items():
+            extra = np.full((len(symbols), block.shape[1]), np.nan)
+            self._data[name] = np.vstack([block, extra])
+
+    def _grow(self, capacity):
+        dates = np.zeros(capacity, dtype="datetime64[D]")
+        dates[:self.length] = self._dates[:self.length]
+        self._dates = dates
+        for name, block in self._data.items():
+            grown = np.full((block.shape[0], capacity), np.nan)
+            grown[:, :self.length] = block[:, :self.length]
+            self._data[name] = grown
+
+
+# -----------------------
+# Loaders
+# -----------------------
+def load_panel(db_adapter, model_class, start=None, end=None, fields=None, filters=None):
+    """
+    Panel of ``model_class`` between start and end (inclusive) from the
+    database behind a SQLAlchemyAdapter. ``filters`` are equality
+    conditions on other columns (default: DEFAULT_FILTERS, e.g. only the
+    EQ series of Pd files).
+    """
+    keys, days, values = _select_columns(db_adapter, model_class, start or date.min, end or date.max,
+                                         fields, filters)
+    return Panel.from_columns(keys, days, values)
+
+
+def load_day(db_adapter, model_class, day, fields=None, filters=None):
+    """(keys, {field: array}) of one trading day, ready for Panel.append_day."""
+    keys, _, values = _select_columns(db_adapter, model_class, day, day, fields, filters)
+    return keys, values
+
+
+def append_from_database(panel, db_adapter, model_class, day, fields=None, filters=None):
+    """Appends one stored trading day to ``panel``; returns its column number."""
+    keys, values = load_day(db_adapter, model_class, day, fields or panel.fields, filters)
+    return panel.append_day(day, keys, values)
+
+
+def _select_columns(db_adapter, model_class, start, end, fields, filters):
+    from sqlalchemy import select, union_all
+    from partitioning import tables_for_range
+    from models import encoded_id_column
+    from symbol_dictionary import id_condition
+
+    columns = field_columns(model_class, fields)
+    key = get_lookup_key(model_class)
+    key_id = encoded_id_column(key)
+    filters = default_filters(model_class) if filters is None else filters
+
+    tables = tables_for_range(db_adapter.engine, model_class, start, end, db_adapter.partitioning)
+    selects = []
+    for table in tables:
+        stmt = (select(table.c[key_id], table.c.bhav_date, *[table.c[column] for column in columns.values()])
+                .where(table.c.bhav_date >= start, table.c.bhav_date <= end))
+        for column, value in filters.items():
+            stmt = stmt.where(id_condition(table, column, value))
+        selects.append(stmt)
+    if not selects:
+        return [], [], {field: [] for field in columns}
+
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+    with db_adapter.engine.connect() as conn:
+        rows = conn.execute(stmt).all()
+
+    by_position = list(zip(*rows)) if rows else [()] * (len(columns) + 2)
+    values = {field: np.array(by_position[i + 2], dtype=float) for i, field in enumerate(columns)}
+    return _decode_keys(db_adapter, by_position[0]), np.array(by_position[1], dtype="datetime64[D]"), values
+
+
+def _decode_keys(db_adapter, key_ids):
+    """Instrument names of the rows' key ids, looking each distinct id up once."""
+    if not key_ids:
+        return []
+    distinct, rows = np.unique(np.array(key_ids, dtype=np.int64), return_inverse=True)
+    names = np.array(db_adapter.symbols.names_for(distinct.tolist()), dtype=object)
+    return names[rows].tolist()
+
+
+def panel_from_columnar(store, prefix, start=None, end=None, fields=None, filters=None):
+    """Panel of one columnar-archive dataset (see columnar.ColumnarStore)."""
+    from columnar import model_for_prefix
+
+    model_class = model_for_prefix(prefix)
+    columns = field_columns(model_class, fields)
+    key = get_lookup_key(model_class)
+    filters = default_filters(model_class) if filters is None else filters
+
+    data = store.read_range(prefix, start=start, end=end,
+                            columns=[key, "bhav_date", *columns.values(), *filters])
+    mask = np.ones(len(data["bhav_date"]), dtype=bool)
+    for column, value in filters.items():
+        mask &= data[column] == value
+    values = {field: data[column][mask] for field, column in columns.items()}
+    return Panel.from_columns(data[key][mask], data["bhav_date"][mask], values)
@@ -0,0 +1,295 @@
+"""
+Date-partitioned storage for the bhavcopy tables.
+
+Enabled with a "partitioning" section in db_config.json:
+
+    "partitioning": {"enabled": true, "granularity": "month"}
+
+granularity is "month" or "year". Each backend gets its native layout:
+
+- MySQL: RANGE COLUMNS(bhav_date) partitions plus a catch-all pmax. New
+  ranges are split out of pmax (or, for older days, out of the lowest
+  partition) before a load, covering the days being loaded.
+- Oracle: interval partitioning on bhav_date; Oracle creates new ranges itself.
+- SQLite: one table per date bucket (pr_records_202506, ...) with the same
+  columns and indexes; the loader writes each file into its bucket.
+
+Date-range reads (select_date_range, last_n_days) only touch the
+partitions or bucket tables that overlap the requested range.
+"""
+import logging
+from datetime import date
+
+from sqlalchemy import Index, MetaData, Table, func, inspect, select, text, union_all
+
+from models import get_lookup_key
+from symbol_dictionary import dictionary_for, id_condition
+
+GRANULARITIES = ("month", "year")
+
+
+# -----------------------
+# Buckets
+# -----------------------
+def bucket_start(day, granularity):
+    return date(day.year, day.month, 1) if granularity == "month" else date(day.year, 1, 1)
+
+
+def next_bucket(start, granularity):
+    if granularity == "year":
+        return date(start.year + 1, 1, 1)
+    return date(start.year + (start.month == 12), start.month % 12 + 1, 1)
+
+
+def bucket_suffix(day, granularity):
+    return day.strftime("%Y%m") if granularity == "month" else day.strftime("%Y")
+
+
+def buckets_between(start, end, granularity):
+    """Start dates of every bucket overlapping [start, end]."""
+    starts = []
+    current = bucket_start(start, granularity)
+    while current <= end:
+        starts.append(current)
+        current = next_bucket(current, granularity)
+    return starts
+
+
+class PartitionConfig:
+    def __init__(self, enabled=False, granularity="month"):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported partition granularity: {granularity}")
+        self.enabled = enabled
+        self.granularity = granularity
+
+    @classmethod
+    def from_dict(cls, config):
+        config = config or {}
+        return cls(config.get("enabled", False), config.get("granularity", "month"))
+
+
+# -----------------------
+# SQLite Bucket Tables
+# -----------------------
+_bucket_metadata = MetaData()
+
+
+def bucket_table(model_class, day, granularity):
+    """
+    The SQLite bucket table holding ``day`` for a model, e.g. pr_records_202506.
+    Index names get the same suffix because SQLite index names are global.
+    """
+    base = model_class.__table__
+    name = f"{base.name}_{bucket_suffix(day, granularity)}"
+    if name in _bucket_metadata.tables:
+        return _bucket_metadata.tables[name]
+
+    table = Table(name, _bucket_metadata, *(column._copy() for column in base.columns))
+    for index in base.indexes:
+        Index(f"{index.name}_{bucket_suffix(day, granularity)}",
+              *(table.c[column.key] for column in index.columns), unique=index.unique)
+    return table
+
+
+def _existing_buckets(engine, model_class, start, end, granularity):
+    """Bucket tables already created for a model that overlap [start, end], oldest first."""
+    prefix = f"{model_class.__tablename__}_"
+    width = 6 if granularity == "month" else 4
+    buckets = []
+    for name in inspect(engine).get_table_names():
+        suffix = name[len(prefix):]
+        if not name.startswith(prefix) or len(suffix) != width or not suffix.isdigit():
+            continue
+        day = date(int(suffix[:4]), int(suffix[4:]) if granularity == "month" else 1, 1)
+        if bucket_start(start, granularity) <= day <= end:
+            buckets.append(day)
+    return [bucket_table(model_class, day, granularity) for day in sorted(buckets)]
+
+
+# -----------------------
+# Preparing Partitions
+# -----------------------
+def ensure_partitions(engine, model_classes, days, config):
+    """
+    Makes sure every table can take rows for ``days`` in its partitioned
+    layout. Called once per run before loading.
+    """
+    if not config.enabled or not days:
+        return
+    dialect = engine.dialect.name
+    for model_class in model_classes:
+        if dialect == "mysql":
+            _ensure_mysql(engine, model_class.__table__.name, min(days), max(days), config.granularity)
+        elif dialect == "oracle":
+            _ensure_oracle(engine, model_class.__table__.name, config.granularity)
+        elif dialect == "sqlite":
+            for day in {bucket_start(d, config.granularity) for d in days}:
+                bucket_table(model_class, day, config.granularity).create(engine, checkfirst=True)
+        else:
+            logging.warning(f"Partitioning is not supported on {dialect}; using plain tables")
+            return
+
+
+def _ensure_mysql(engine, table_name, first_day, last_day, granularity):
+    with engine.begin() as conn:
+        existing = conn.execute(text(
+            "SELECT partition_name FROM information_schema.partitions "
+            "WHERE table_schema = DATABASE() AND table_name = :t AND partition_name IS NOT NULL"
+        ), {"t": table_name}).scalars().all()
+
+        wanted = buckets_between(first_day, last_day, granularity)
+        if not existing:
+            # Every unique key must contain the partitioning column, so the
+            # primary key becomes (id, bhav_date).
+            conn.execute(text(f"ALTER TABLE {table_name} DROP PRIMARY KEY, ADD PRIMARY KEY (id, bhav_date)"))
+            ranges = ", ".join(_mysql_range(day, granularity) for day in wanted)
+            conn.execute(text(
+                f"ALTER TABLE {table_name} PARTITION BY RANGE COLUMNS(bhav_date) "
+                f"({ranges}, PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+            ))
+            logging.info(f"Partitioned {table_name} by {granularity} ({len(wanted)} ranges)")
+            return
+
+        # Days between existing ranges already have a partition; new ranges
+        # are split out of pmax above the highest one and out of the lowest
+        # one (which holds every earlier day) below it.
+        starts = sorted(_mysql_partition_start(name, granularity) for name in existing if name != "pmax")
+        lowest, highest = starts[0], starts[-1]
+        above = buckets_between(next_bucket(highest, granularity), last_day, granularity)
+        if above:
+            ranges = ", ".join(_mysql_range(day, granularity) for day in above)
+            conn.execute(text(
+                f"ALTER TABLE {table_name} REORGANIZE PARTITION pmax INTO "
+                f"({ranges}, PARTITION pmax VALUES LESS THAN (MAXVALUE))"
+            ))
+        below = [day for day in buckets_between(first_day, lowest, granularity) if day < lowest]
+        if below:
+            ranges = ", ".join(_mysql_range(day, granularity) for day in below + [lowest])
+            conn.execute(text(
+                f"ALTER TABLE {table_name} REORGANIZE PARTITION p{bucket_suffix(lowest, granularity)} INTO ({ranges})"
+            ))
+        if above or below:
+            logging.info(f"Added {len(above) + len(below)} partitions to {table_name}")
+
+
+def _mysql_partition_start(name, granularity):
+    """First day of the bucket a partition named p202506 (or p2025) covers."""
+    suffix = name[1:]
+    return date(int(suffix[:4]), int(suffix[4:]) if granularity == "month" else 1, 1)
+
+
+def _mysql_range(day, granularity):
+    upper = next_bucket(bucket_start(day, granularity), granularity)
+    return f"PARTITION p{bucket_suffix(day, granularity)} VALUES LESS THAN ('{upper.isoformat()}')"
+
+
+def _ensure_oracle(engine, table_name, granularity):
+    with engine.begin() as conn:
+        partitioned = conn.execute(text(
+            "SELECT COUNT(*) FROM user_part_tables WHERE table_name = :t"
+        ), {"t": table_name.upper()}).scalar()
+        if partitioned:
+            return
+        interval = "NUMTOYMINTERVAL(1, 'MONTH')" if granularity == "month" else "NUMTOYMINTERVAL(1, 'YEAR')"
+        conn.execute(text(
+            f"ALTER TABLE {table_name} MODIFY PARTITION BY RANGE (bhav_date) INTERVAL ({interval}) "
+            f"(PARTITION p_initial VALUES LESS THAN (DATE '2000-01-01')) ONLINE"
+        ))
+        logging.info(f"Partitioned {table_name} by {granularity} (interval)")
+
+
+# -----------------------
+# Target Tables
+# -----------------------
+def table_for(engine, model_class, day, config):
+    """The table rows for ``day`` are written to."""
+    if config.enabled and day is not None and engine.dialect.name == "sqlite":
+        return bucket_table(model_class, day, config.granularity)
+    return model_class.__table__
+
+
+def tables_for_range(engine, model_class, start, end, config):
+    """Tables holding rows between start and end (bucket tables on SQLite)."""
+    if config.enabled and engine.dialect.name == "sqlite":
+        return _existing_buckets(engine, model_class, start, end, config.granularity)
+    return [model_class.__table__]
+
+
+# -----------------------
+# Date-range Reads
+# -----------------------
+def select_date_range(engine, model_class, start, end, config, **filters):
+    """
+    Rows of ``model_class`` with start <= bhav_date <= end matching the
+    equality ``filters``, oldest first, with identifier ids decoded back to
+    their names. The bhav_date predicate lets MySQL and Oracle prune
+    partitions; on SQLite only the overlapping buckets are read.
+    """
+    tables = tables_for_range(engine, model_class, start, end, config)
+    if not tables:
+        return []
+    selects = []
+    for table in tables:
+        stmt = select(table).where(table.c.bhav_date >= start, table.c.bhav_date <= end)
+        for column, value in filters.items():
+            stmt = stmt.where(id_condition(table, column, value))
+        selects.append(stmt)
+
+    stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+    stmt = stmt.order_by(text("bhav_date"))
+    with engine.connect() as conn:
+        rows = [dict(row._mapping) for row in conn.execute(stmt)]
+    return dictionary_for(engine).decode_rows(model_class, rows)
+
+
+def last_n_days(engine, model_class, value, days, config, end=None):
+    """
+    Rows for one instrument (matched on the model's lookup key: symbol, or
+    security) on its last ``days`` trading days up to ``end``. The days come
+    from the (lookup key, bhav_date) index alone, then one range read
+    fetches the rows.
+    """
+    end = end or date.max
+    lookup_key = get_lookup_key(model_class)
+    tables = tables_for_range(engine, model_class, date.min, end, config)
+    if not tables:
+        return []
+
+    # Newest buckets first: stop once enough distinct days are found.
+    dates = []
+    with engine.connect() as conn:
+        for bucket in reversed(tables):
+            stmt = (select(bucket.c.bhav_date)
+                    .where(id_condition(bucket, lookup_key, value), bucket.c.bhav_date <= end)
+                    .group_by(bucket.c.bhav_date).order_by(bucket.c.bhav_date.desc()).limit(days - len(dates)))
+            dates.extend(conn.execute(stmt).scalars())
+            if len(dates) >= days:
+                break
+    if not dates:
+        return []
+
+    return select_date_range(engine, model_class, min(dates), max(dates), config, **{lookup_key: value})
+
+
+def latest_date(engine, model_class, config):
+    """Most recent bhav_date stored for a model, or None."""
+    for table in reversed(tables_for_range(engine, model_class, date.min, date.max, config)):
+        with engine.connect() as conn:
+            value = conn.execute(select(func.max(table.c.bhav_date))).scalar()
+        if value is not None:
+            return value
+    return None
+
+
+def recent_dates(engine, model_class, days, config, end=None):
+    """The last ``days`` distinct bhav_dates stored for a model up to ``end``, oldest first."""
+    end = end or date.max
+    dates = []
+    with engine.connect() as conn:
+        for table in reversed(tables_for_range(engine, model_class, date.min, end, config)):
+            stmt = (select(table.c.bhav_date).where(table.c.bhav_date <= end)
+                    .group_by(table.c.bhav_date).order_by(table.c.bhav_date.desc()).limit(days - len(dates)))
+            dates.extend(conn.execute(stmt).scalars())
+            if len(dates) >= days:
+                break
+    return sorted(dates)
@@ -1,12 +1,20 @@
 import os
+import io
 import re
 import csv
+import mmap
+import zipfile
+import contextlib
+import itertools
+import time
 import logging
-from models import (
-    Base, BcRecord, BhRecord, CorpBondRecord, EtfRecord, GlRecord, HlRecord,
-    McapRecord, PdRecord, PrRecord, SmeRecord, TtRecord
-)
-from db_adapter import get_connection_string, SQLAlchemyAdapter
+from datetime import datetime
+
+import metrics
+
+# SQLAlchemy, the models and the database adapter are imported on first use
+# (see get_model_mapping and _open_adapter): they dominate start-up time and
+# are not needed to import this module, e.g. for the parsers alone.
 
 # -----------------------
 # Logging Setup
@@ -17,6 +25,7 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 # File Type Configuration
 # -----------------------
 # (You can optionally remove the "unique_keys" since they're no longer used.)
+# "parser" may also be "numpy" or "arrow" (see vectorized.py) for large loads.
 FILE_TYPE_CONFIG = [
     {"prefix": "Bc", "parser": "csv", "delimiter": ",", "model": "BcRecord"},
     {"prefix": "bh", "parser": "csv", "delimiter": ",", "model": "BhRecord",
@@ -51,43 +60,90 @@ FILE_TYPE_CONFIG = [
 # -----------------------
 # Model Mapping
 # -----------------------
-MODEL_MAPPING = {
-    "BcRecord": BcRecord,
-    "BhRecord": BhRecord,
-    "CorpBondRecord": CorpBondRecord,
-    "EtfRecord": EtfRecord,
-    "GlRecord": GlRecord,
-    "HlRecord": HlRecord,
-    "McapRecord": McapRecord,
-    "PdRecord": PdRecord,
-    "PrRecord": PrRecord,
-    "SmeRecord": SmeRecord,
-    "TtRecord": TtRecord
-}
+_model_mapping = {}
+
+
+def get_model_mapping():
+    """{model name: model class} for every FILE_TYPE_CONFIG entry, importing the models once."""
+    if not _model_mapping:
+        import models
+        _model_mapping.update({file_def["model"]: getattr(models, file_def["model"])
+                               for file_def in FILE_TYPE_CONFIG})
+    return _model_mapping
+
+
+def __getattr__(name):
+    # `from processor import MODEL_MAPPING` still works, loading the models then.
+    if name == "MODEL_MAPPING":
+        return get_model_mapping()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # -----------------------
 # Parser Classes
 # -----------------------
+PARSE_CHUNK_SIZE = 1000
+
+
 class BaseParser:
-    def parse(self, file_path, file_def):
+    def iter_chunks(self, source, file_def, chunk_size):
+        """
+        Yields the rows of ``source`` in lists of at most ``chunk_size`` rows.
+        ``source`` is a file path or an already-open text stream. Rows are
+        dicts keyed by model column with values already converted.
+        """
         raise NotImplementedError
 
+    def parse(self, source, file_def):
+        """Returns every row at once. Prefer iter_chunks for large files."""
+        rows = []
+        for chunk in self.iter_chunks(source, file_def, PARSE_CHUNK_SIZE):
+            rows.extend(chunk)
+        return rows
+
 
 class CsvParser(BaseParser):
-    def parse(self, file_path, file_def):
-        results = []
+    def iter_chunks(self, source, file_def, chunk_size):
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "r", newline="", encoding="utf-8") as csvfile:
+                yield from self.iter_chunks(csvfile, file_def, chunk_size)
+            return
+
         delimiter = file_def.get("delimiter", ",")
-        with open(file_path, "r", newline="", encoding="utf-8") as csvfile:
-            reader = csv.DictReader(csvfile, delimiter=delimiter)
-            for row in reader:
-                results.append(row)
-        return results
+        reader = csv.reader(source, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            return
+        plan = compile_plan(header, file_def)
+        convert = plan.convert
+        labels = span_labels(file_def)
+        # csv.reader yields [] for blank lines; DictReader used to skip them.
+        rows = (values for values in reader if values)
+        while True:
+            with metrics.span("parse", **labels):
+                block = list(itertools.islice(rows, chunk_size))
+            if not block:
+                return
+            with metrics.span("transform", **labels):
+                chunk = [convert(values) for values in block]
+            yield chunk
+
+
+def span_labels(file_def):
+    """The file and model labels metrics spans are recorded under."""
+    return {"file": file_def.get("file_name"), "model": file_def.get("model")}
 
 
 def get_parser(parser_type):
     if parser_type == "csv":
         return CsvParser()
+    elif parser_type == "numpy":
+        # Vectorized backends are optional: only import them when configured.
+        from vectorized import NumpyParser
+        return NumpyParser()
+    elif parser_type == "arrow":
+        from vectorized import ArrowParser
+        return ArrowParser()
     else:
         raise ValueError(f"Unknown parser type: {parser_type}")
 
@@ -109,9 +165,7 @@ def process_row_keys(row, file_def):
     for k, v in row.items():
         if k is None:
             continue
-        key = str(k).strip().lower().replace(" ", "_").replace("/", "_")
-        if key in column_map:
-            key = column_map[key]
+        key = normalise_header(k, column_map)
         if isinstance(v, str):
             v = v.strip()
             if v == "":
@@ -129,6 +183,136 @@ def process_row_keys(row, file_def):
     return cleaned
 
 
+def normalise_header(key, column_map):
+    """Header text -> model column name, e.g. "HIGH/LOW" -> "high_low"."""
+    key = str(key).strip().lower().replace(" ", "_").replace("/", "_")
+    return column_map.get(key, key)
+
+
+# -----------------------
+# Per-file Row Plan
+# -----------------------
+def _to_str(value):
+    value = value.strip()
+    return value or None
+
+
+def _to_key(value):
+    # Natural-key text columns keep "" for blanks (see models.natural_key_index).
+    return value.strip()
+
+
+def _to_float(value):
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _to_int(value):
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return int(float(value))
+        except ValueError:
+            return None
+
+
+CONVERTERS = {
+    "int": _to_int,
+    "float": _to_float,
+    "str": _to_str,
+    "key": _to_key,
+}
+
+
+def column_kind(column, natural_key=()):
+    """
+    "int", "float", "str" or "key" (text that is part of the natural key):
+    how values for this model column are converted.
+    """
+    from sqlalchemy import Float, Integer
+
+    if isinstance(column.type, Integer):
+        return "int"
+    if isinstance(column.type, Float):
+        return "float"
+    if column.key in natural_key:
+        return "key"
+    return "str"
+
+
+class RowPlan:
+    """
+    Header-to-column mapping compiled once per file: for every model column
+    found in the header, its position and a typed converter. Rows are then
+    converted by position with no per-row header work.
+    """
+    def __init__(self, fields, kinds, dropped, constants=None):
+        self.fields = fields        # [(column_name, index, converter)]
+        self.kinds = kinds          # {column_name: "int" | "float" | "str" | "key"}
+        self.dropped = dropped      # header names with no model column
+        self.constants = constants or {}    # per-file values, e.g. bhav_date
+        self.columns = [name for name, _, _ in fields] + list(self.constants)
+        self.width = max((i for _, i, _ in fields), default=-1) + 1
+
+    def convert(self, values):
+        if len(values) >= self.width:
+            row = {name: convert(values[i]) for name, i, convert in self.fields}
+        else:
+            # Short row: missing trailing fields become None, as with csv.DictReader.
+            size = len(values)
+            row = {name: convert(values[i]) if i < size else None for name, i, convert in self.fields}
+        if self.constants:
+            row.update(self.constants)
+        return row
+
+
+def compile_plan(header, file_def, model_class=None):
+    """
+    Builds the RowPlan for one file from its header row, the FILE_TYPE_CONFIG
+    entry and the target model's columns.
+    """
+    from models import encoded_id_column, get_encoded_columns, get_natural_key
+
+    model_class = model_class or get_model_mapping()[file_def["model"]]
+    column_map = file_def.get("column_map", {})
+    natural_key = get_natural_key(model_class)
+    constants = {"bhav_date": file_def["bhav_date"]} if file_def.get("bhav_date") else {}
+    encoded = get_encoded_columns(model_class)
+    column_kinds = {c.key: column_kind(c, natural_key) for c in model_class.__table__.columns
+                    if not c.primary_key and c.key not in constants}
+    # Identifier text is parsed under its own name; the loader swaps it for
+    # the dictionary id (see SymbolDictionary.encode).
+    for column in encoded:
+        column_kinds.pop(encoded_id_column(column), None)
+        column_kinds[column] = "key" if encoded_id_column(column) in natural_key else "str"
+
+    by_name = {}
+    kinds = {}
+    dropped = []
+    for index, raw_name in enumerate(header):
+        name = normalise_header(raw_name, column_map)
+        kind = column_kinds.get(name)
+        if kind is None:
+            dropped.append(name)
+            continue
+        # A repeated header keeps the last occurrence, like csv.DictReader.
+        kinds[name] = kind
+        by_name[name] = (name, index, CONVERTERS[kinds[name]])
+
+    if dropped:
+        logging.warning(f"Ignoring columns not present on {file_def['model']}: {', '.join(dropped)}")
+    return RowPlan(list(by_name.values()), kinds, dropped, constants)
+
+
 # -----------------------
 # File Matching Helper
 # -----------------------
@@ -145,57 +329,540 @@ def match_file(file_name, file_types):
     return None
 
 
+def file_trade_date(file_name):
+    """
+    Trading day encoded in a bhavcopy file name: ddmmyy (Pd040625.csv) or
+    ddmmyyyy (MCAP04062025.csv). Returns None when there is no valid date.
+    """
+    match = re.match(r"^[A-Za-z]+(\d{8}|\d{6})", file_name)
+    if not match:
+        return None
+    digits = match.group(1)
+    try:
+        return datetime.strptime(digits, "%d%m%Y" if len(digits) == 8 else "%d%m%y").date()
+    except ValueError:
+        return None
+
+
+# -----------------------
+# Load Helpers
+# -----------------------
+def _load_orm(db_adapter, model_class, raw_data, file_def):
+    """
+    Builds one model instance per row and adds it to the session.
+    Returns the number of rows staged for commit.
+    """
+    model_name = file_def["model"]
+    staged = 0
+    for row in raw_data:
+        try:
+            instance = model_class(**row)
+            db_adapter.session.add(instance)
+            staged += 1
+        except Exception as row_e:
+            logging.error(f"Error creating {model_name} instance: {row_e} -- Row data: {row}")
+    return staged
+
+
+def _load_upsert(db_adapter, model_class, raw_data, file_def):
+    """
+    Inserts or updates the parsed rows on the model's natural key with the
+    dialect's native upsert, in executemany batches. Re-ingesting a file
+    replaces its rows instead of duplicating them. Returns the number of
+    distinct keys written; rows repeating a key earlier in the same chunk
+    are counted as duplicate_rows.
+    """
+    from models import get_batch_size, get_natural_key
+
+    rows = list(raw_data)
+    key = get_natural_key(model_class)
+    # One statement must not hit the same key twice (PostgreSQL rejects it);
+    # keep the last occurrence, as sequential upserts would.
+    unique_rows = list({tuple(row.get(k) for k in key): row for row in rows}.values())
+    duplicates = len(rows) - len(unique_rows)
+    if duplicates:
+        metrics.count("duplicate_rows", duplicates, **span_labels(file_def))
+        logging.warning(f"Dropped {duplicates} rows of {file_def.get('file_name')} repeating a natural key")
+    db_adapter.upsert_rows(model_class, unique_rows, key, get_batch_size(model_class),
+                           table=db_adapter.table_for(model_class, file_def.get("bhav_date")))
+    return len(unique_rows)
+
+
+def _load_bulk(db_adapter, model_class, raw_data, file_def):
+    """
+    Inserts the parsed rows in executemany batches sized by the model
+    (see models.get_batch_size). Column batches from the vectorized parsers
+    are handed over as column lists. Returns the number of rows inserted
+    into the open transaction.
+    """
+    from models import get_batch_size
+
+    table = db_adapter.table_for(model_class, file_def.get("bhav_date"))
+    if hasattr(raw_data, "column_lists"):
+        return db_adapter.bulk_insert_columns(model_class, raw_data.column_lists(), get_batch_size(model_class), table)
+    return db_adapter.bulk_insert_rows(model_class, raw_data, get_batch_size(model_class), table)
+
+
+LOADERS = {
+    "orm": _load_orm,
+    "bulk": _load_bulk,
+    "upsert": _load_upsert,
+}
+
+
 # -----------------------
 # Process Files Routine without Duplicate Check
 # -----------------------
-def process_files(directory, db_config_path="db_config.json"):
-    connection_string = get_connection_string(db_config_path)
-    db_adapter = SQLAlchemyAdapter(connection_string)
+def process_files(directory, db_config_path="db_config.json", mode="bulk", chunk_size=None, workers=1):
+    """
+    Loads every recognised bhavcopy file in ``directory`` into the database.
 
-    # Ensure required tables exist before processing.
-    Base.metadata.create_all(db_adapter.engine)
+    ``mode`` selects the load path: "bulk" (default) inserts column dicts with
+    executemany batches, "upsert" does the same through the dialect's native
+    upsert on each model's natural key (safe to re-run for the same day),
+    "orm" builds one model instance per row (always into the base tables,
+    ignoring SQLite date buckets). Files are
+    read and committed ``chunk_size`` rows at a time (default: the model's
+    batch size), so memory use does not grow with the file. With
+    ``workers`` > 1 files are processed in parallel (see _run_parallel).
+    """
+    return _run(directory_sources(directory), db_config_path, mode, chunk_size, workers)
 
-    for file_name in os.listdir(directory):
-        if file_name.startswith("."):
-            continue
 
-        file_def = match_file(file_name, FILE_TYPE_CONFIG)
-        if not file_def:
-            logging.info(f"Skipping file {file_name}: no matching configuration")
-            continue
+def process_archive(zip_source, db_config_path="db_config.json", mode="bulk", chunk_size=None, workers=1):
+    """
+    Loads a bhavcopy ZIP without extracting it to disk.
+
+    ``zip_source`` is either the downloaded bytes or a path to the archive;
+    a path is memory-mapped. Each CSV member is streamed from
+    ``ZipFile.open()`` straight into the parser.
+
+    Returns the per-table stats {table: [rows, seconds, failed chunks]};
+    see failed_chunks().
+    """
+    return _run(archive_sources(zip_source), db_config_path, mode, chunk_size, workers)
+
+
+def directory_sources(directory):
+    """(file_name, source spec) for every file in a directory (see _open_source)."""
+    return [(file_name, ("path", os.path.join(directory, file_name))) for file_name in os.listdir(directory)]
+
+
+def archive_sources(zip_source):
+    """(file_name, source spec) for every member of a bhavcopy ZIP."""
+    with _open_zip(zip_source) as z:
+        members = [info.filename for info in z.infolist() if not info.is_dir()]
+    return [(os.path.basename(member), ("zip", zip_source, member)) for member in members]
+
+
+@contextlib.contextmanager
+def _open_zip(zip_source):
+    if isinstance(zip_source, (bytes, bytearray, memoryview)):
+        with zipfile.ZipFile(io.BytesIO(zip_source)) as z:
+            yield z
+        return
+
+    with open(zip_source, "rb") as f, _MappedFile(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with zipfile.ZipFile(mapped) as z:
+            yield z
+
+
+class _MappedFile(mmap.mmap):
+    """mmap with the file-object methods ZipFile expects (mmap lacks seekable() before 3.13)."""
+    def seekable(self):
+        return True
+
+
+@contextlib.contextmanager
+def _open_source(spec):
+    """
+    Opens a source spec: ("path", file_path) yields the path itself,
+    ("zip", zip_source, member) yields a text stream over the ZIP member.
+    Specs are plain tuples so they can be sent to worker processes; a pool
+    worker gets ("zip", None, member) for the archive it opened once in
+    _init_worker.
+    """
+    if spec[0] == "path":
+        metrics.count("bytes", os.path.getsize(spec[1]), file=os.path.basename(spec[1]))
+        yield spec[1]
+        return
+
+    _, zip_source, member = spec
+    file_name = os.path.basename(member)
+    with contextlib.ExitStack() as stack:
+        with metrics.span("zip_open", file=file_name):
+            z = _worker_state["zip"] if zip_source is None else stack.enter_context(_open_zip(zip_source))
+            info = z.getinfo(member)
+            stream = stack.enter_context(io.TextIOWrapper(z.open(info), encoding="utf-8", newline=""))
+        metrics.count("bytes", info.file_size, file=file_name)
+        yield stream
 
-        parser = get_parser(file_def["parser"])
-        file_path = os.path.join(directory, file_name)
-        logging.info(f"Processing file {file_name} using parser {file_def['parser']}")
 
+def _get_loader(mode):
+    loader = LOADERS.get(mode)
+    if loader is None:
+        raise ValueError(f"Unknown load mode: {mode}")
+    return loader
+
+
+# Open adapters by config file, reused by later calls in the same process
+# (e.g. warm Lambda invocations) so the engine and its pool are built once.
+_adapters = {}
+
+
+def _open_adapter(db_config_path):
+    from db_adapter import SQLAlchemyAdapter
+    from migrations import MIGRATIONS
+    from models import Base, SCHEMA_VERSION, SchemaVersion
+
+    cache_key = (os.path.abspath(db_config_path), os.path.getmtime(db_config_path))
+    db_adapter = _adapters.get(cache_key)
+    if db_adapter is not None:
+        return db_adapter
+
+    db_adapter = SQLAlchemyAdapter.from_config(db_config_path)
+
+    # Ensure required tables exist before processing (skipped once the schema marker is current).
+    db_adapter.ensure_schema(Base.metadata, SchemaVersion.__table__, SCHEMA_VERSION, MIGRATIONS)
+    _adapters[cache_key] = db_adapter
+    return db_adapter
+
+
+def _run(sources, db_config_path, mode, chunk_size, workers):
+    loader = _get_loader(mode)
+    db_adapter = _open_adapter(db_config_path)
+    _prepare_partitions(db_adapter, sources)
+
+    # Per-table totals for the rows/sec summary: {table: [rows, seconds, failed chunks]}
+    table_stats = {}
+
+    if workers and workers > 1:
+        _run_parallel(db_adapter, loader, sources, db_config_path, mode, chunk_size, workers, table_stats)
+    else:
+        for file_name, spec in sources:
+            _process_file(db_adapter, loader, file_name, spec, table_stats, chunk_size)
+
+    _log_table_stats(table_stats)
+    _notify_load_listeners(table_stats, sources)
+    return table_stats
+
+
+def failed_chunks(table_stats):
+    """
+    Chunks (or whole files) of a load that were rolled back, from the stats
+    process_files/process_archive return. 0 means every row was stored.
+    """
+    return sum(stats[2] for stats in table_stats.values())
+
+
+# -----------------------
+# Load Listeners
+# -----------------------
+# Callbacks run after every process_files/process_archive call with the
+# per-table stats and the trading days in the sources, e.g. to refresh
+# caches built from the tables (see corporate_actions.CorporateActions.watch).
+_load_listeners = []
+
+
+def add_load_listener(callback):
+    """Registers ``callback(table_stats, days)`` to run after each load."""
+    if callback not in _load_listeners:
+        _load_listeners.append(callback)
+
+
+def remove_load_listener(callback):
+    if callback in _load_listeners:
+        _load_listeners.remove(callback)
+
+
+def _notify_load_listeners(table_stats, sources):
+    if not _load_listeners:
+        return
+    days = sorted({day for day in (file_trade_date(file_name) for file_name, _ in sources) if day})
+    for callback in list(_load_listeners):
         try:
-            raw_data = parser.parse(file_path, file_def)
-            model_name = file_def["model"]
-            model_class = MODEL_MAPPING.get(model_name)
-            if not model_class:
-                logging.error(f"No model found for '{model_name}'")
-                continue
+            callback(table_stats, days)
+        except Exception as e:
+            logging.error(f"Load listener {callback!r} failed: {e}")
 
-            instances = []
-            for row in raw_data:
-                try:
-                    row_cleaned = process_row_keys(row, file_def)
-                    instance = model_class(**row_cleaned)
-                    db_adapter.session.add(instance)
-                    instances.append(instance)
-                except Exception as row_e:
-                    logging.error(f"Error creating {model_name} instance: {row_e} -- Row data: {row}")
-
-            if instances:
+
+def _prepare_partitions(db_adapter, sources):
+    """Creates the partitions or bucket tables for the trading days being loaded."""
+    if not db_adapter.partitioning.enabled:
+        return
+    days, models = set(), set()
+    for file_name, _ in sources:
+        file_def = _file_def_for(file_name)
+        if file_def and file_def["bhav_date"] and file_def["model"] in get_model_mapping():
+            days.add(file_def["bhav_date"])
+            models.add(get_model_mapping()[file_def["model"]])
+    from partitioning import ensure_partitions
+
+    ensure_partitions(db_adapter.engine, models, days, db_adapter.partitioning)
+
+
+def _file_def_for(file_name):
+    """The FILE_TYPE_CONFIG entry for a file, plus the trading day from its name."""
+    file_def = match_file(file_name, FILE_TYPE_CONFIG)
+    if not file_def:
+        return None
+    return dict(file_def, bhav_date=file_trade_date(file_name), file_name=file_name)
+
+
+def _resolve_file(file_name):
+    """Returns (file_def, model_class) for a bhavcopy file, or None to skip it."""
+    if file_name.startswith("."):
+        return None
+
+    file_def = _file_def_for(file_name)
+    if not file_def:
+        logging.info(f"Skipping file {file_name}: no matching configuration")
+        return None
+
+    model_name = file_def["model"]
+    model_class = get_model_mapping().get(model_name)
+    if not model_class:
+        logging.error(f"No model found for '{model_name}'")
+        return None
+    return file_def, model_class
+
+
+def _iter_source_chunks(spec, file_def, chunk_size):
+    with _open_source(spec) as source:
+        yield from get_parser(file_def["parser"]).iter_chunks(source, file_def, chunk_size)
+
+
+def _process_file(db_adapter, loader, file_name, spec, table_stats, chunk_size=None):
+    """
+    Parses and loads one bhavcopy file chunk by chunk, committing after each
+    chunk. ``spec`` says where to read it from (see _open_source).
+    """
+    from models import get_batch_size
+
+    target = _resolve_file(file_name)
+    if target is None:
+        return
+    file_def, model_class = target
+    chunk_size = chunk_size or get_batch_size(model_class)
+    logging.info(f"Processing file {file_name} using parser {file_def['parser']}")
+
+    chunks = _iter_source_chunks(spec, file_def, chunk_size)
+    _load_chunks(db_adapter, loader, file_name, file_def, model_class, chunks, chunk_size, table_stats)
+
+
+def _load_chunks(db_adapter, loader, file_name, file_def, model_class, chunks, chunk_size, table_stats):
+    """
+    Loads and commits each chunk on its own. A chunk that fails is rolled
+    back and reported; chunks committed before it are kept.
+    """
+    model_name = file_def["model"]
+    labels = span_labels(file_def)
+    count = 0
+    failed_rows = 0
+    failed_chunks = 0
+    started = time.perf_counter()
+    try:
+        for chunk_no, chunk in enumerate(chunks, 1):
+            try:
+                with metrics.span("insert", **labels):
+                    chunk = db_adapter.symbols.encode(model_class, chunk)
+                    loaded = loader(db_adapter, model_class, chunk, file_def)
+                if loaded:
+                    with metrics.span("commit", **labels):
+                        db_adapter.session.commit()
+                count += loaded
+            except Exception as chunk_e:
+                db_adapter.session.rollback()
+                failed_chunks += 1
+                failed_rows += len(chunk)
+                first_row = (chunk_no - 1) * chunk_size + 1
+                logging.error(
+                    f"Chunk {chunk_no} of {file_name} (rows {first_row}-{first_row + len(chunk) - 1}) "
+                    f"rolled back: {chunk_e}"
+                )
+    except Exception as e:
+        logging.error(f"Error processing file {file_name}: {e}")
+        db_adapter.session.rollback()
+        failed_chunks += 1
+
+    elapsed = time.perf_counter() - started
+    metrics.count("rows", count, **labels)
+    if failed_rows:
+        metrics.count("rejected_rows", failed_rows, **labels)
+    if failed_chunks:
+        metrics.count("failed_chunks", failed_chunks, **labels)
+    if count or failed_chunks:
+        _add_stats(table_stats, {model_class.__tablename__: [count, elapsed, failed_chunks]})
+    if count:
+        logging.info(
+            f"Inserted {count} new {model_name} records from file {file_name} "
+            f"in {elapsed:.2f}s ({_rate(count, elapsed)} rows/sec)"
+        )
+    elif not failed_rows:
+        logging.info(f"No valid data found in {file_name} to insert.")
+    if failed_rows:
+        logging.error(f"{failed_rows} rows of {file_name} in {failed_chunks} failed chunks were not inserted")
+
+
+def _add_stats(table_stats, other):
+    for table_name, (rows, seconds, failed) in other.items():
+        stats = table_stats.setdefault(table_name, [0, 0.0, 0])
+        stats[0] += rows
+        stats[1] += seconds
+        stats[2] += failed
+
+
+def _log_table_stats(table_stats):
+    for table_name, (rows, seconds, failed) in sorted(table_stats.items()):
+        logging.info(f"{table_name}: {rows} rows in {seconds:.2f}s ({_rate(rows, seconds)} rows/sec)"
+                     + (f", {failed} failed chunks" if failed else ""))
+
+
+def _rate(rows, seconds):
+    return f"{rows / seconds:,.0f}" if seconds > 0 else "n/a"
+
+
+# -----------------------
+# Parallel Processing
+# -----------------------
+# State of a pool worker process, set up once by _init_worker.
+_worker_state = {}
+
+# Parsed chunks a SQLite worker may queue per file ahead of the writer.
+QUEUED_CHUNKS = 4
+
+
+def _run_parallel(db_adapter, loader, sources, db_config_path, mode, chunk_size, workers, table_stats):
+    """
+    Processes files across a pool of worker processes.
+
+    The bhavcopy files go to independent tables, so on server databases
+    (MySQL/Oracle) every worker parses, transforms and inserts its files
+    through its own engine and connection. SQLite allows only one writer,
+    so there the workers only parse and transform, and this process
+    inserts their chunks as the single serialized writer. Each file's
+    chunks stream back through its own bounded queue while the worker is
+    still parsing, so neither side holds a whole file.
+
+    An archive is opened once per worker (see _init_worker); tasks only
+    name the member. Files are inserted (for SQLite) and reported in input
+    order, so the error messages and the returned stats are the same as
+    the serial path's.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    from models import get_batch_size
+
+    serial_writer = db_adapter.engine.dialect.name == "sqlite"
+    archive = sources[0][1][1] if sources and sources[0][1][0] == "zip" else None
+    tasks = [(file_name, ("zip", None, spec[2]) if archive is not None else spec) for file_name, spec in sources]
+    initargs = (db_config_path, mode, serial_writer, archive)
+
+    with contextlib.ExitStack() as stack:
+        pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                       initargs=initargs))
+        if not serial_writer:
+            futures = [(file_name, pool.submit(_process_in_worker, file_name, spec, chunk_size))
+                       for file_name, spec in tasks]
+            for file_name, future in futures:
                 try:
-                    db_adapter.session.commit()
-                    logging.info(f"Inserted {len(instances)} new {model_name} records from file {file_name}")
-                except Exception as bulk_e:
-                    logging.error(f"Bulk insert error for file {file_name}: {bulk_e}")
-                    db_adapter.session.rollback()
-                    # Optionally, you can add a fallback mechanism here for individual inserts.
-            else:
-                logging.info(f"No valid data found in {file_name} to insert.")
-        except Exception as e:
-            logging.error(f"Error processing file {file_name}: {e}")
-            db_adapter.session.rollback()
+                    worker_stats, snapshot = future.result()
+                except Exception as e:
+                    logging.error(f"Error processing file {file_name}: {e}")
+                    target = _resolve_file(file_name)
+                    if target is not None:
+                        _add_stats(table_stats, {target[1].__tablename__: [0, 0.0, 1]})
+                    continue
+                _add_stats(table_stats, worker_stats)
+                metrics.current().merge(snapshot)
+            return
+
+        manager = stack.enter_context(multiprocessing.Manager())
+        # Submitted in input order, so the file being inserted is always
+        # running or done, never queued behind files waiting on full queues.
+        files = []
+        for file_name, spec in tasks:
+            target = _resolve_file(file_name)
+            if target is None:
+                continue
+            file_def, model_class = target
+            used_chunk_size = chunk_size or get_batch_size(model_class)
+            chunks = manager.Queue(QUEUED_CHUNKS)
+            future = pool.submit(_parse_in_worker, file_name, spec, used_chunk_size, chunks)
+            files.append((file_name, file_def, model_class, used_chunk_size, chunks, future))
+
+        for file_name, file_def, model_class, used_chunk_size, chunks, future in files:
+            _load_chunks(db_adapter, loader, file_name, file_def, model_class,
+                         _queued_chunks(chunks, future), used_chunk_size, table_stats)
+
+
+def _queued_chunks(chunks, future):
+    """
+    Yields the chunks a worker puts on ``chunks`` until its end marker,
+    then re-raises the error that stopped it, if any.
+    """
+    from queue import Empty
+
+    while True:
+        try:
+            chunk = chunks.get(timeout=1)
+        except Empty:
+            if future.done():
+                # The worker died before its end marker; result() raises why.
+                future.result()
+                raise RuntimeError("Worker stopped without finishing the file")
+            continue
+        if chunk is None:
+            break
+        yield chunk
+
+    error, snapshot = future.result()
+    metrics.current().merge(snapshot)
+    if error:
+        raise RuntimeError(error)
+
+
+def _init_worker(db_config_path, mode, parse_only, archive=None):
+    from db_adapter import SQLAlchemyAdapter
+
+    # Pooled connections inherited from the parent through fork belong to it.
+    for db_adapter in _adapters.values():
+        db_adapter.engine.dispose(close=False)
+    _adapters.clear()
+    # Spans are sent back to the parent with each result (see Metrics.drain).
+    metrics.start_run()
+
+    _worker_state["loader"] = _get_loader(mode)
+    if archive is not None:
+        # Kept open for the life of the worker; every task reads a member of it.
+        _worker_state["zip_stack"] = contextlib.ExitStack()
+        _worker_state["zip"] = _worker_state["zip_stack"].enter_context(_open_zip(archive))
+    if not parse_only:
+        # Tables were created by the parent; each worker only needs its own connection.
+        _worker_state["adapter"] = SQLAlchemyAdapter.from_config(db_config_path)
+
+
+def _process_in_worker(file_name, spec, chunk_size):
+    table_stats = {}
+    _process_file(_worker_state["adapter"], _worker_state["loader"], file_name, spec, table_stats, chunk_size)
+    return table_stats, metrics.current().drain()
+
+
+def _parse_in_worker(file_name, spec, chunk_size, chunks):
+    """
+    Parses and transforms one file for the parent to insert, putting each
+    chunk on the ``chunks`` queue (blocking while it is full) and then None
+    as the end marker. Returns (error message or None, metrics snapshot).
+    """
+    file_def, _ = _resolve_file(file_name)
+    logging.info(f"Processing file {file_name} using parser {file_def['parser']}")
+
+    error = None
+    try:
+        for chunk in _iter_source_chunks(spec, file_def, chunk_size):
+            chunks.put(chunk)
+    except Exception as e:
+        error = str(e)
+    finally:
+        chunks.put(None)
+    return error, metrics.current().drain()
@@ -0,0 +1,230 @@
+"""
+Read API for strategy code: batched latest-value lookups behind an LRU/TTL cache.
+
+    api = ReadAPI(SQLAlchemyAdapter.from_config("db_config.json"))
+    api.watch()                                     # invalidate after each load
+    api.latest_close(["RELIANCE", "TCS", ...])      # {symbol: (bhav_date, close)}
+    api.market_cap(universe)                        # {symbol: (bhav_date, market cap)}
+
+Every lookup takes many keys at once. Keys already cached are answered
+from memory; the rest are fetched in one query per LOOKUP_BATCH_SIZE keys
+(an IN list on the symbol dictionary ids, see symbol_dictionary.py),
+newest partition or bucket table first, stopping once every key is found.
+A key with no row is cached as missing too, so it is not queried again.
+
+Entries expire after ``ttl`` seconds and the least recently used ones are
+dropped beyond ``max_entries``. watch() drops a model's entries whenever
+the processor loads its table. stats() reports the hit rate and latency
+percentiles of recent lookups.
+"""
+import argparse
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import date
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 100_000
+DEFAULT_TTL = 300.0
+LOOKUP_BATCH_SIZE = 500
+LATENCY_SAMPLES = 10_000
+
+_MISSING = object()
+
+
+class ReadAPI:
+    def __init__(self, db_adapter, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.db_adapter = db_adapter
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache = OrderedDict()     # {(model, column, filters, as_of, key): (expires, value)}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "queries": 0, "expired": 0, "evicted": 0, "invalidated": 0}
+        self.latencies = {}             # {lookup name: deque of seconds}
+
+    # --- Lookups ---
+    def latest_close(self, keys, model_class=None, as_of=None):
+        """
+        {key: (bhav_date, close)} of the last trading day up to ``as_of``
+        (default: the latest stored). Keys are the model's lookup key:
+        security for PrRecord (the default), symbol for PdRecord (EQ series).
+        """
+        from models import PrRecord
+
+        return self.latest(keys, model_class or PrRecord, "close_price", as_of, name="latest_close")
+
+    def market_cap(self, symbols, as_of=None, series="EQ"):
+        """{symbol: (bhav_date, market cap)} from the MCAP files."""
+        from models import McapRecord
+
+        return self.latest(symbols, McapRecord, "market_cap", as_of, {"series": series} if series else {},
+                           name="market_cap")
+
+    def latest(self, keys, model_class, column, as_of=None, filters=None, name="latest"):
+        """
+        {key: (bhav_date, value)} of ``column`` on each key's last stored day
+        up to ``as_of``. Keys without a row are left out.
+        """
+        from panel import default_filters
+
+        started = time.perf_counter()
+        filters = default_filters(model_class) if filters is None else filters
+        prefix = (model_class.__name__, column, tuple(sorted(filters.items())), as_of)
+        keys = list(dict.fromkeys(keys))
+
+        results, missing = self._lookup(prefix, keys)
+        if missing:
+            found = self._fetch(model_class, column, missing, as_of, filters)
+            self._store(prefix, missing, found)
+            results.update(found)
+        self._record(name, time.perf_counter() - started)
+        return results
+
+    # --- Cache ---
+    def _lookup(self, prefix, keys):
+        results = {}
+        missing = []
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                cache_key = prefix + (key,)
+                entry = self._cache.get(cache_key)
+                if entry is not None and entry[0] < now:
+                    del self._cache[cache_key]
+                    self.counters["expired"] += 1
+                    entry = None
+                if entry is None:
+                    missing.append(key)
+                    continue
+                self._cache.move_to_end(cache_key)
+                if entry[1] is not _MISSING:
+                    results[key] = entry[1]
+            self.counters["hits"] += len(keys) - len(missing)
+            self.counters["misses"] += len(missing)
+        return results, missing
+
+    def _store(self, prefix, keys, found):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key in keys:
+                self._cache[prefix + (key,)] = (expires, found.get(key, _MISSING))
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.counters["evicted"] += 1
+
+    def invalidate(self, model_names=None):
+        """Drops the cached entries of the given models (default: all)."""
+        with self._lock:
+            if model_names is None:
+                dropped = len(self._cache)
+                self._cache.clear()
+            else:
+                stale = [cache_key for cache_key in self._cache if cache_key[0] in model_names]
+                for cache_key in stale:
+                    del self._cache[cache_key]
+                dropped = len(stale)
+            self.counters["invalidated"] += dropped
+        return dropped
+
+    def watch(self):
+        """Invalidates a model's entries after every processor run that loads its table."""
+        from processor import add_load_listener
+
+        add_load_listener(self._on_load)
+
+    def _on_load(self, table_stats, days):
+        from processor import get_model_mapping
+
+        loaded = {name for name, model_class in get_model_mapping().items()
+                  if model_class.__tablename__ in table_stats}
+        if loaded:
+            self.invalidate(loaded)
+
+    # --- Queries ---
+    def _fetch(self, model_class, column, keys, as_of, filters):
+        from models import ENCODED_COLUMNS, get_lookup_key
+        from partitioning import tables_for_range
+
+        as_of = as_of or date.max
+        tables = tables_for_range(self.db_adapter.engine, model_class, date.min, as_of,
+                                  self.db_adapter.partitioning)
+        # Keys are matched on their dictionary ids; names never stored have no rows.
+        key_ids = self.db_adapter.symbols.lookup(ENCODED_COLUMNS[get_lookup_key(model_class)], keys)
+        keys_by_id = {key_id: key for key, key_id in key_ids.items()}
+        found = {}
+        remaining = list(key_ids.values())
+        with self.db_adapter.engine.connect() as conn:
+            # Newest buckets first: most keys trade on the latest day.
+            for table in reversed(tables):
+                for start in range(0, len(remaining), LOOKUP_BATCH_SIZE):
+                    batch = remaining[start:start + LOOKUP_BATCH_SIZE]
+                    stmt = _latest_rows(table, model_class, column, batch, as_of, filters)
+                    for key_id, day, value in conn.execute(stmt):
+                        found[keys_by_id[key_id]] = (day, value)
+                    self.counters["queries"] += 1
+                remaining = [key_id for key_id in remaining if keys_by_id[key_id] not in found]
+                if not remaining:
+                    break
+        return found
+
+    # --- Stats ---
+    def _record(self, name, seconds):
+        samples = self.latencies.get(name)
+        if samples is None:
+            samples = self.latencies[name] = deque(maxlen=LATENCY_SAMPLES)
+        samples.append(seconds)
+
+    def stats(self):
+        """Counters, the hit rate and p50/p90/p99 latency (ms) per lookup."""
+        with self._lock:
+            stats = dict(self.counters, entries=len(self._cache))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["latency_ms"] = {}
+        for name, samples in self.latencies.items():
+            p50, p90, p99 = np.percentile(np.array(samples) * 1000, [50, 90, 99])
+            stats["latency_ms"][name] = {"count": len(samples), "p50": p50, "p90": p90, "p99": p99}
+        return stats
+
+
+def _latest_rows(table, model_class, column, key_ids, as_of, filters):
+    """
+    (key id, bhav_date, value) of each key's last row up to ``as_of`` in one
+    table: a GROUP BY on the (key id, bhav_date) index joined back for the value.
+    """
+    from sqlalchemy import and_, func, select
+    from models import encoded_id_column, get_lookup_key
+    from symbol_dictionary import id_condition
+
+    match = table.c[encoded_id_column(get_lookup_key(model_class))]
+    conditions = [match.in_(key_ids), table.c.bhav_date <= as_of]
+    conditions += [id_condition(table, name, value) for name, value in filters.items()]
+
+    latest = (select(match.label("match"), func.max(table.c.bhav_date).label("bhav_date"))
+              .where(*conditions).group_by(match).subquery())
+    joined = table.join(latest, and_(match == latest.c.match, table.c.bhav_date == latest.c.bhav_date))
+    return (select(match, table.c.bhav_date, table.c[column]).select_from(joined)
+            .where(*conditions[2:]))
+
+
+if __name__ == "__main__":
+    from db_adapter import SQLAlchemyAdapter
+    from processor import get_model_mapping
+
+    arg_parser = argparse.ArgumentParser(description="Latest stored values for a list of symbols or securities.")
+    arg_parser.add_argument("lookup", choices=["close", "mcap"])
+    arg_parser.add_argument("keys", nargs="+")
+    arg_parser.add_argument("--model", default="PrRecord", help="Model for close lookups, e.g. PdRecord")
+    arg_parser.add_argument("--as-of", type=date.fromisoformat, default=None, help="YYYY-MM-DD")
+    arg_parser.add_argument("--db-config", default="db_config.json")
+    args = arg_parser.parse_args()
+
+    api = ReadAPI(SQLAlchemyAdapter.from_config(args.db_config))
+    if args.lookup == "close":
+        values = api.latest_close(args.keys, get_model_mapping()[args.model], args.as_of)
+    else:
+        values = api.market_cap(args.keys, args.as_of)
+    for key in args.keys:
+        day, value = values.get(key, (None, None))
+        print(f"{key:<30} {day} {value}")
@@ -0,0 +1,353 @@
+"""
+End-of-day screener kept as running per-symbol state.
+
+ScreenerState holds, for every symbol, fixed-width ring buffers and
+running aggregates in NumPy arrays indexed by a symbol dictionary:
+
+    year_high / year_low   rolling 52-week (252 trading days) high and low
+    return_<n>             n-day close-to-close returns (default 1, 5, 20)
+    volume_z               today's volume against the trailing 20-day
+                           mean and standard deviation
+    gain_pct, hl_status,   the latest day's Gl (gainers/losers), HL (new
+    band                   highs/lows) and bh (52-week band) flags
+
+update_day() folds one trading day in with a constant number of array
+operations over all symbols; a rolling high or low is only rescanned for
+the symbols whose extreme just left the window. Screens (top(), screen())
+read the arrays directly instead of scanning the tables.
+
+The state is saved to a .npz file after each update, so a restart loads
+it instead of replaying history. Screener.watch() feeds it every trading
+day the processor loads.
+
+    python screener.py --sort return_20 --min volume_z=2 --limit 20
+"""
+import argparse
+import json
+import logging
+import os
+from datetime import date
+
+import numpy as np
+
+YEAR_WINDOW = 252
+RETURN_WINDOWS = (1, 5, 20)
+VOLUME_WINDOW = 20
+DEFAULT_STATE_PATH = "screener_state.npz"
+
+HL_CODES = {"H": 1, "L": -1}
+
+
+class ScreenerState:
+    def __init__(self, year_window=YEAR_WINDOW, return_windows=RETURN_WINDOWS, volume_window=VOLUME_WINDOW):
+        self.year_window = year_window
+        self.return_windows = tuple(return_windows)
+        self.volume_window = volume_window
+        self.symbols = []
+        self.symbol_index = {}
+        self.days = 0
+        self.last_day = None
+
+        # Ring buffers: column (days % width) holds the latest day.
+        self.highs = self._empty(year_window)
+        self.lows = self._empty(year_window)
+        self.closes = self._empty(max(self.return_windows) + 1)
+        self.volumes = self._empty(volume_window)
+        # Per-symbol values, one entry per symbol.
+        self.values = {name: np.zeros(0) for name in self._value_names()}
+
+    def _value_names(self):
+        return (["close", "high", "low", "volume", "year_high", "year_low", "volume_sum", "volume_sq", "volume_count",
+                 "volume_z", "gain_pct", "hl_status", "band"]
+                + [f"return_{window}" for window in self.return_windows])
+
+    @staticmethod
+    def _empty(width, rows=0):
+        return np.full((rows, width), np.nan)
+
+    # --- Symbols ---
+    def rows_for(self, symbols):
+        """Row numbers of ``symbols``, adding rows for symbols not seen before."""
+        new_symbols = [symbol for symbol in dict.fromkeys(symbols) if symbol not in self.symbol_index]
+        if new_symbols:
+            for symbol in new_symbols:
+                self.symbol_index[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+            extra = len(new_symbols)
+            for name in ("highs", "lows", "closes", "volumes"):
+                ring = getattr(self, name)
+                setattr(self, name, np.vstack([ring, self._empty(ring.shape[1], extra)]))
+            for name, values in self.values.items():
+                fill = 0.0 if name in ("volume_sum", "volume_sq", "volume_count") else np.nan
+                self.values[name] = np.concatenate([values, np.full(extra, fill)])
+        return np.fromiter((self.symbol_index[symbol] for symbol in symbols), dtype=np.intp, count=len(symbols))
+
+    def _column(self, rows, values):
+        column = np.full(len(self.symbols), np.nan)
+        if values is not None:
+            column[rows] = np.asarray(values, dtype=float)
+        return column
+
+    # --- Updating ---
+    def update_day(self, day, symbols, close, high=None, low=None, volume=None, flags=None):
+        """
+        Folds one trading day into the state. ``symbols`` and the price
+        arrays are aligned; ``flags`` is {"gain_pct" | "hl_status" | "band":
+        (symbols, values)} from that day's Gl, HL and bh files.
+        """
+        if self.last_day is not None and day <= self.last_day:
+            raise ValueError(f"{day} is not after the last screened day {self.last_day}")
+        rows = self.rows_for(list(symbols))
+        close = self._column(rows, close)
+        high = self._column(rows, high) if high is not None else close
+        low = self._column(rows, low) if low is not None else close
+        volume = self._column(rows, volume)
+        values = self.values
+
+        # Returns read the ring before today's close overwrites its slot.
+        width = self.closes.shape[1]
+        for window in self.return_windows:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values[f"return_{window}"] = close / self.closes[:, (self.days - window) % width] - 1.0
+        self.closes[:, self.days % width] = close
+
+        values["year_high"] = self._roll_extreme(self.highs, high, values["year_high"], np.fmax)
+        values["year_low"] = self._roll_extreme(self.lows, low, values["year_low"], np.fmin)
+        self._update_volume(volume)
+
+        values["close"] = close
+        values["high"] = high
+        values["low"] = low
+        values["volume"] = volume
+        for name in ("gain_pct", "hl_status", "band"):
+            values[name] = np.full(len(self.symbols), np.nan)
+        for name, (flag_symbols, flag_values) in (flags or {}).items():
+            rows = self.rows_for(list(flag_symbols))
+            values[name][rows] = np.asarray(flag_values, dtype=float)
+
+        self.days += 1
+        self.last_day = day
+
+    def _roll_extreme(self, ring, new, extreme, pick):
+        """Rolling max (pick=np.fmax) or min (np.fmin) over the ring after adding today's values."""
+        slot = self.days % ring.shape[1]
+        leaving = ring[:, slot].copy()
+        ring[:, slot] = new
+        updated = pick(extreme, new)
+        # Only symbols whose extreme just left the window, without today
+        # replacing it, need a rescan.
+        rescan = np.flatnonzero((leaving == extreme) & (pick(new, leaving) != new))
+        if len(rescan):
+            updated[rescan] = pick.reduce(ring[rescan], axis=1)
+        return updated
+
+    def _update_volume(self, volume):
+        values = self.values
+        ring = self.volumes
+        slot = self.days % ring.shape[1]
+
+        count = values["volume_count"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = values["volume_sum"] / count
+            std = np.sqrt(np.maximum(values["volume_sq"] / count - mean * mean, 0.0))
+            values["volume_z"] = np.where((count >= 2) & (std > 0), (volume - mean) / std, np.nan)
+
+        leaving = ring[:, slot]
+        left = ~np.isnan(leaving)
+        added = ~np.isnan(volume)
+        values["volume_sum"] = values["volume_sum"] - np.where(left, leaving, 0.0) + np.where(added, volume, 0.0)
+        values["volume_sq"] = values["volume_sq"] - np.where(left, leaving ** 2, 0.0) + np.where(added, volume ** 2, 0.0)
+        values["volume_count"] = count - left + added
+        ring[:, slot] = volume
+        if slot == ring.shape[1] - 1:
+            # Re-add from the window once per cycle so the running sums do not drift.
+            values["volume_sum"] = np.nansum(ring, axis=1)
+            values["volume_sq"] = np.nansum(ring * ring, axis=1)
+
+    # --- Screens ---
+    def metrics(self):
+        """{name: array aligned with symbols}, including distances from the 52-week range."""
+        values = dict(self.values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            values["from_year_high"] = values["close"] / values["year_high"] - 1.0
+            values["from_year_low"] = values["close"] / values["year_low"] - 1.0
+            values["new_year_high"] = (values["high"] >= values["year_high"]).astype(float)
+            values["new_year_low"] = (values["low"] <= values["year_low"]).astype(float)
+        for name in ("volume_sum", "volume_sq", "volume_count"):
+            del values[name]
+        return values
+
+    def screen(self, sort_by="return_1", limit=50, ascending=False, minimum=None, maximum=None):
+        """
+        Symbols passing every {metric: bound} in ``minimum``/``maximum``,
+        sorted by ``sort_by``. Returns [(symbol, {metric: value})].
+        """
+        metrics = self.metrics()
+        selected = ~np.isnan(metrics[sort_by])
+        with np.errstate(invalid="ignore"):
+            for name, bound in (minimum or {}).items():
+                selected &= metrics[name] >= bound
+            for name, bound in (maximum or {}).items():
+                selected &= metrics[name] <= bound
+        rows = np.flatnonzero(selected)
+        keys = metrics[sort_by][rows]
+        if limit and len(rows) > limit:
+            part = np.argpartition(keys if ascending else -keys, limit - 1)[:limit]
+            rows, keys = rows[part], keys[part]
+        order = np.argsort(keys if ascending else -keys, kind="stable")
+        return [(self.symbols[row], {name: float(values[row]) for name, values in metrics.items()})
+                for row in rows[order]]
+
+    def top(self, metric, n=20, ascending=False):
+        return self.screen(metric, n, ascending)
+
+    def new_year_highs(self):
+        """Symbols that set a 52-week high on the last day, nearest the close first."""
+        return self.screen("from_year_high", limit=None, minimum={"new_year_high": 1.0})
+
+    def new_year_lows(self):
+        return self.screen("from_year_low", limit=None, ascending=True, minimum={"new_year_low": 1.0})
+
+    # --- Persistence ---
+    def save(self, path=DEFAULT_STATE_PATH):
+        meta = {
+            "year_window": self.year_window,
+            "return_windows": list(self.return_windows),
+            "volume_window": self.volume_window,
+            "days": self.days,
+            "last_day": self.last_day.isoformat() if self.last_day else None,
+        }
+        arrays = {f"value_{name}": values for name, values in self.values.items()}
+        tmp_path = f"{path}.part.npz"
+        np.savez(tmp_path, meta=np.array(json.dumps(meta)), symbols=np.array(self.symbols, dtype=str),
+                 highs=self.highs, lows=self.lows, closes=self.closes, volumes=self.volumes, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_STATE_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            state = cls(meta["year_window"], meta["return_windows"], meta["volume_window"])
+            state.symbols = data["symbols"].tolist()
+            state.symbol_index = {symbol: i for i, symbol in enumerate(state.symbols)}
+            state.days = meta["days"]
+            state.last_day = date.fromisoformat(meta["last_day"]) if meta["last_day"] else None
+            for name in ("highs", "lows", "closes", "volumes"):
+                setattr(state, name, data[name])
+            state.values = {name: data[f"value_{name}"] for name in state._value_names()}
+        return state
+
+
+# -----------------------
+# Feeding from the Database
+# -----------------------
+def read_day(db_adapter, day):
+    """
+    One trading day from the tables, as update_day arguments: EQ prices
+    from Pd, plus the Gl/HL/bh flags mapped from security to symbol.
+    """
+    from models import BhRecord, GlRecord, HlRecord, PdRecord
+    from partitioning import select_date_range
+
+    def rows(model_class, **filters):
+        return select_date_range(db_adapter.engine, model_class, day, day, db_adapter.partitioning, **filters)
+
+    prices = rows(PdRecord, series="EQ")
+    symbols = [row["symbol"] for row in prices]
+    by_security = {row["security"]: row["symbol"] for row in prices if row["security"]}
+
+    def column(name):
+        return np.array([row[name] for row in prices], dtype=float)
+
+    flags = {}
+    gainers = [(by_security[row["security"]], row["percent_change"]) for row in rows(GlRecord)
+               if row["security"] in by_security]
+    highs_lows = [(by_security[row["security"]], HL_CODES.get(row["new_status"], np.nan)) for row in rows(HlRecord)
+                  if row["security"] in by_security]
+    bands = [(row["symbol"], HL_CODES.get(row["high_low"], np.nan)) for row in rows(BhRecord, series="EQ")]
+    for name, pairs in (("gain_pct", gainers), ("hl_status", highs_lows), ("band", bands)):
+        if pairs:
+            flag_symbols, flag_values = zip(*pairs)
+            flags[name] = (flag_symbols, np.array(flag_values, dtype=float))
+    return symbols, column("close_price"), column("high_price"), column("low_price"), column("net_trdqty"), flags
+
+
+def stored_days(db_adapter, start=None, end=None):
+    """Trading days with Pd rows between start and end."""
+    from sqlalchemy import select, union_all
+    from models import PdRecord
+    from partitioning import tables_for_range
+
+    start, end = start or date.min, end or date.max
+    tables = tables_for_range(db_adapter.engine, PdRecord, start, end, db_adapter.partitioning)
+    if not tables:
+        return []
+    selects = [select(table.c.bhav_date).where(table.c.bhav_date >= start, table.c.bhav_date <= end).distinct()
+               for table in tables]
+    with db_adapter.engine.connect() as conn:
+        return sorted({row[0] for row in conn.execute(selects[0] if len(selects) == 1 else union_all(*selects))})
+
+
+class Screener:
+    """ScreenerState kept in step with the database and saved to ``path``."""
+    def __init__(self, db_adapter, path=DEFAULT_STATE_PATH, state=None):
+        self.db_adapter = db_adapter
+        self.path = path
+        self.state = state
+
+    def open(self):
+        """Loads the saved state, then catches up on days stored since it was saved."""
+        if self.state is None:
+            self.state = ScreenerState.load(self.path) if os.path.exists(self.path) else ScreenerState()
+        self.catch_up()
+        return self.state
+
+    def catch_up(self, end=None):
+        """Feeds every stored day after the state's last day; returns how many were added."""
+        last_day = self.state.last_day
+        days = [day for day in stored_days(self.db_adapter, end=end) if last_day is None or day > last_day]
+        for day in days:
+            self.state.update_day(day, *read_day(self.db_adapter, day))
+        if days:
+            self.state.save(self.path)
+            logging.info(f"Screener state updated to {self.state.last_day} ({len(days)} new days)")
+        return len(days)
+
+    def watch(self):
+        """Updates and saves the state after every processor run."""
+        from processor import add_load_listener
+
+        add_load_listener(self._on_load)
+
+    def _on_load(self, table_stats, days):
+        if days and (self.state.last_day is None or max(days) > self.state.last_day):
+            self.catch_up()
+
+
+def _parse_bounds(items):
+    bounds = {}
+    for item in items or []:
+        name, _, value = item.partition("=")
+        bounds[name] = float(value)
+    return bounds
+
+
+if __name__ == "__main__":
+    from db_adapter import SQLAlchemyAdapter
+
+    arg_parser = argparse.ArgumentParser(description="Screen symbols from the saved end-of-day state.")
+    arg_parser.add_argument("--sort", default="return_1", help="Metric to sort by, e.g. return_20 or volume_z")
+    arg_parser.add_argument("--ascending", action="store_true")
+    arg_parser.add_argument("--limit", type=int, default=20)
+    arg_parser.add_argument("--min", nargs="*", metavar="METRIC=VALUE", help="Lower bounds, e.g. volume_z=2")
+    arg_parser.add_argument("--max", nargs="*", metavar="METRIC=VALUE", help="Upper bounds")
+    arg_parser.add_argument("--state", default=DEFAULT_STATE_PATH)
+    arg_parser.add_argument("--db-config", default="db_config.json")
+    args = arg_parser.parse_args()
+
+    state = Screener(SQLAlchemyAdapter.from_config(args.db_config), args.state).open()
+    print(f"{len(state.symbols)} symbols, last day {state.last_day}")
+    for symbol, metrics in state.screen(args.sort, args.limit, args.ascending,
+                                        _parse_bounds(args.min), _parse_bounds(args.max)):
+        print(f"{symbol:<20} {args.sort}={metrics[args.sort]:.4f} close={metrics['close']:.2f} "
+              f"52w={metrics['year_low']:.2f}-{metrics['year_high']:.2f} volume_z={metrics['volume_z']:.2f}")
@@ -0,0 +1,377 @@
+"""
+Symbol-by-date price panels shared between processes without copying.
+
+One process builds the panel (from the database or a Panel) and publishes
+it in a ``multiprocessing.shared_memory`` block, or a memory-mapped file
+when given a path; other processes attach to it read-only and index the
+same physical pages:
+
+    shared = publish_from_database(db_adapter, PdRecord, "bhavcopy_pd", start=date(2015, 1, 1))
+    ...
+    panel = SharedPanel.attach("bhavcopy_pd")           # in a worker
+    run_backtest(panel, sma_crossover)
+
+SharedPanel has the Panel interface the indicator engine and backtester
+use (symbols, dates, fields, shape, panel["close"], rows(), ...).
+
+Block layout: a 4 KiB header (a fixed struct followed by JSON metadata)
+then, each 64-byte aligned, the dates (datetime64[D] x day capacity), the
+symbol names (fixed-width unicode x symbol capacity) and one float64
+array (symbol capacity x day capacity) per field. Both capacities are set
+when publishing, so append_day writes one new column (and rows for new
+symbols) in place and bumps the day count in the header last; readers
+see the new day on their next access. Outgrowing a capacity means
+publishing again under a new name.
+
+The publisher owns the block: it stays available while the publisher
+runs, and unlink() removes it.
+
+    python shared_panel.py --name bhavcopy_pd --model PdRecord --start 2015-01-01
+"""
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+from datetime import date
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = b"BHAVPNL1"
+# magic, symbol width, symbol capacity, day capacity, symbols, days, generation, metadata length
+HEADER = struct.Struct("<8sQQQQQQQ")
+HEADER_SIZE = 4096
+ALIGNMENT = 64
+SYMBOL_WIDTH = 32
+DEFAULT_EXTRA_DAYS = 260
+DEFAULT_FIELDS = ("open", "high", "low", "close", "volume", "value")
+
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _layout(fields, symbol_width, symbol_capacity, day_capacity):
+    """({array name: offset}, total size) of a block."""
+    offsets = {}
+    offset = HEADER_SIZE
+    sizes = [("dates", day_capacity * 8), ("symbols", symbol_capacity * symbol_width * 4)]
+    sizes += [(field, symbol_capacity * day_capacity * 8) for field in fields]
+    for name, size in sizes:
+        offsets[name] = offset
+        offset = _aligned(offset + size)
+    return offsets, offset
+
+
+# -----------------------
+# Segments
+# -----------------------
+# Blocks created by this process: the resource tracker already knows them.
+_created = set()
+
+
+class _SharedMemorySegment:
+    def __init__(self, name, size=None, readonly=False):
+        if size is not None:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            _created.add(self._shm.name)
+        else:
+            self._shm = _attach_untracked(name)
+        self.buf = self._shm.buf.toreadonly() if readonly else self._shm.buf
+
+    def close(self):
+        self.buf.release()
+        self._shm.close()
+
+    def unlink(self):
+        self._shm.unlink()
+        _created.discard(self._shm.name)
+
+
+def _attach_untracked(name):
+    """
+    Attaches to an existing block without registering it with this
+    process's resource tracker, which would otherwise unlink it when an
+    attached reader exits (Python < 3.13).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name=name)
+        if shm.name not in _created:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class _FileSegment:
+    def __init__(self, path, size=None, readonly=False):
+        if size is not None:
+            mode = "w+b"
+        else:
+            mode = "rb" if readonly else "r+b"
+        with open(path, mode) as f:
+            if size is not None:
+                f.truncate(size)
+            access = mmap.ACCESS_READ if readonly else mmap.ACCESS_WRITE
+            self._mmap = mmap.mmap(f.fileno(), 0, access=access)
+        self.path = path
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+    def unlink(self):
+        os.unlink(self.path)
+
+
+# -----------------------
+# Shared Panel
+# -----------------------
+class SharedPanel:
+    """
+    A panel in a shared block. Create one with create()/publish() (the
+    writable publisher) or attach() (a read-only view).
+    """
+    def __init__(self, segment, writable):
+        self._segment = segment
+        self.writable = writable
+        buf = segment.buf
+        magic, width, symbol_capacity, day_capacity, _, _, _, meta_length = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a shared panel block")
+        meta = json.loads(bytes(buf[HEADER.size:HEADER.size + meta_length]))
+        self.model = meta.get("model")
+        self.symbol_width = width
+        self.symbol_capacity = symbol_capacity
+        self.day_capacity = day_capacity
+        offsets, _ = _layout(meta["fields"], width, symbol_capacity, day_capacity)
+
+        self._dates = np.ndarray((day_capacity,), dtype="datetime64[D]", buffer=buf, offset=offsets["dates"])
+        self._names = np.ndarray((symbol_capacity,), dtype=f"<U{width}", buffer=buf, offset=offsets["symbols"])
+        self._data = {field: np.ndarray((symbol_capacity, day_capacity), dtype=np.float64, buffer=buf,
+                                        offset=offsets[field])
+                      for field in meta["fields"]}
+        self._symbols = []
+        self.symbol_index = {}
+
+    @classmethod
+    def create(cls, name, fields=DEFAULT_FIELDS, symbol_capacity=5000, day_capacity=3000, path=None,
+               model=None, symbol_width=SYMBOL_WIDTH):
+        """A new, empty block named ``name`` (or the file at ``path``)."""
+        fields = list(fields)
+        meta = json.dumps({"fields": fields, "model": model}).encode()
+        if HEADER.size + len(meta) > HEADER_SIZE:
+            raise ValueError("Too many fields for the shared panel header")
+        _, size = _layout(fields, symbol_width, symbol_capacity, day_capacity)
+        segment = _FileSegment(path, size) if path else _SharedMemorySegment(name, size)
+        HEADER.pack_into(segment.buf, 0, MAGIC, symbol_width, symbol_capacity, day_capacity, 0, 0, 0, len(meta))
+        segment.buf[HEADER.size:HEADER.size + len(meta)] = meta
+        return cls(segment, writable=True)
+
+    @classmethod
+    def publish(cls, panel, name, extra_days=DEFAULT_EXTRA_DAYS, extra_symbols=None, path=None, model=None):
+        """
+        Copies a Panel into a new block with room for ``extra_days`` more
+        days and ``extra_symbols`` more symbols (default: a quarter more).
+        """
+        symbols = len(panel.symbols)
+        extra_symbols = max(symbols // 4, 100) if extra_symbols is None else extra_symbols
+        width = max([SYMBOL_WIDTH] + [len(symbol) for symbol in panel.symbols])
+        shared = cls.create(name, panel.fields, symbols + extra_symbols, panel.length + extra_days, path, model,
+                            width)
+        length = panel.length
+        shared._names[:symbols] = panel.symbols
+        shared._dates[:length] = panel.dates
+        for field in panel.fields:
+            shared._data[field][:symbols, :length] = panel[field]
+        shared._set_counts(symbols, length)
+        return shared
+
+    @classmethod
+    def attach(cls, name, path=None):
+        """Read-only view of a published block; nothing is copied."""
+        segment = _FileSegment(path, readonly=True) if path else _SharedMemorySegment(name, readonly=True)
+        return cls(segment, writable=False)
+
+    # --- Header ---
+    def _counts(self):
+        """(symbols, days, generation) from the header."""
+        return HEADER.unpack_from(self._segment.buf, 0)[4:7]
+
+    def _set_counts(self, symbols, length):
+        generation = self.generation + 1
+        # Readers only look up to these counts, so they are written after the data.
+        struct.pack_into("<QQQ", self._segment.buf, 8 + 3 * 8, symbols, length, generation)
+
+    @property
+    def length(self):
+        return self._counts()[1]
+
+    @property
+    def generation(self):
+        """Incremented by every append; a reader can poll it for new days."""
+        return self._counts()[2]
+
+    # --- Panel interface ---
+    @property
+    def symbols(self):
+        return self._sync_symbols()
+
+    def _sync_symbols(self):
+        """Picks up symbols the publisher added since the last call."""
+        count = self._counts()[0]
+        if count != len(self._symbols):
+            for symbol in self._names[len(self._symbols):count].tolist():
+                self.symbol_index[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+        return self._symbols
+
+    @property
+    def dates(self):
+        return self._dates[:self.length]
+
+    @property
+    def fields(self):
+        return list(self._data)
+
+    @property
+    def shape(self):
+        symbols, length, _ = self._counts()
+        return symbols, length
+
+    def __getitem__(self, field):
+        symbols, length, _ = self._counts()
+        return self._data[field][:symbols, :length]
+
+    def __contains__(self, field):
+        return field in self._data
+
+    def rows(self, symbols):
+        """Row numbers of ``symbols`` (KeyError for an unknown symbol)."""
+        self._sync_symbols()
+        return np.fromiter((self.symbol_index[symbol] for symbol in symbols), dtype=np.intp, count=len(symbols))
+
+    # --- Appending ---
+    def append_day(self, day, keys, values):
+        """Adds one trading day in place (see Panel.append_day); publisher only."""
+        if not self.writable:
+            raise ValueError("Shared panel is attached read-only")
+        day = np.datetime64(day, "D")
+        count, length, _ = self._counts()
+        if length and day <= self._dates[length - 1]:
+            raise ValueError(f"{day} is not after the panel's last day {self._dates[length - 1]}")
+        if length == self.day_capacity:
+            raise ValueError(f"Shared panel is full ({self.day_capacity} days); publish it again with more room")
+
+        self._sync_symbols()
+        new_symbols = [key for key in dict.fromkeys(keys) if key not in self.symbol_index]
+        if count + len(new_symbols) > self.symbol_capacity:
+            raise ValueError(f"Shared panel is full ({self.symbol_capacity} symbols); publish it again with more room")
+        for symbol in new_symbols:
+            if len(symbol) > self.symbol_width:
+                raise ValueError(f"Symbol {symbol!r} is longer than {self.symbol_width} characters")
+        if new_symbols:
+            added = slice(count, count + len(new_symbols))
+            self._names[added] = new_symbols
+            for block in self._data.values():
+                block[added, :length] = np.nan
+            count += len(new_symbols)
+            self._symbols.extend(new_symbols)
+            self.symbol_index.update((symbol, added.start + i) for i, symbol in enumerate(new_symbols))
+
+        rows = self.rows(list(keys))
+        for name, block in self._data.items():
+            block[:count, length] = np.nan
+            if name in values:
+                block[rows, length] = np.asarray(values[name], dtype=float)
+        self._dates[length] = day
+        self._set_counts(count, length + 1)
+        return length
+
+    # --- Lifetime ---
+    def close(self):
+        self._dates = self._names = self._data = None
+        self._segment.close()
+
+    def unlink(self):
+        """Removes the block; attached readers keep their mapping until they close it."""
+        self._segment.unlink()
+
+
+# -----------------------
+# Database
+# -----------------------
+def publish_from_database(db_adapter, model_class, name, start=None, end=None, fields=DEFAULT_FIELDS,
+                          extra_days=DEFAULT_EXTRA_DAYS, path=None):
+    """Loads a model's panel once (see panel.load_panel) and publishes it."""
+    from panel import load_panel
+
+    panel = load_panel(db_adapter, model_class, start, end, fields)
+    shared = SharedPanel.publish(panel, name, extra_days, path=path, model=model_class.__name__)
+    logging.info(f"Published {model_class.__name__} as {path or name}: "
+                 f"{len(panel.symbols)} instruments x {panel.length} days")
+    return shared
+
+
+def append_new_days(shared, db_adapter, model_class, max_days=DEFAULT_EXTRA_DAYS):
+    """Appends the days stored after the shared panel's last day (at most ``max_days``); returns how many."""
+    from panel import append_from_database
+    from partitioning import recent_dates
+
+    last_day = shared.dates[-1].astype(object) if shared.length else date.min
+    days = [day for day in recent_dates(db_adapter.engine, model_class, max_days, db_adapter.partitioning)
+            if day > last_day]
+    for day in days:
+        append_from_database(shared, db_adapter, model_class, day)
+    if days:
+        logging.info(f"Appended {len(days)} days to the shared {model_class.__name__} panel")
+    return len(days)
+
+
+def watch(shared, db_adapter, model_class):
+    """Appends each newly loaded day of the model after every processor run in this process."""
+    from processor import add_load_listener
+
+    def on_load(table_stats, days):
+        if model_class.__tablename__ in table_stats:
+            append_new_days(shared, db_adapter, model_class)
+
+    add_load_listener(on_load)
+    return on_load
+
+
+if __name__ == "__main__":
+    from db_adapter import SQLAlchemyAdapter
+    from panel import PANEL_MODELS
+    from processor import get_model_mapping
+
+    arg_parser = argparse.ArgumentParser(description="Publish a price panel in shared memory and keep it current.")
+    arg_parser.add_argument("--name", default="bhavcopy_pd", help="Shared memory block name")
+    arg_parser.add_argument("--path", default=None, help="Memory-mapped file to use instead of shared memory")
+    arg_parser.add_argument("--model", choices=PANEL_MODELS, default="PdRecord")
+    arg_parser.add_argument("--start", type=date.fromisoformat, default=None, help="First date, YYYY-MM-DD")
+    arg_parser.add_argument("--extra-days", type=int, default=DEFAULT_EXTRA_DAYS)
+    arg_parser.add_argument("--poll", type=float, default=60.0, help="Seconds between checks for new days")
+    arg_parser.add_argument("--db-config", default="db_config.json")
+    args = arg_parser.parse_args()
+
+    db_adapter = SQLAlchemyAdapter.from_config(args.db_config)
+    model_class = get_model_mapping()[args.model]
+    shared = publish_from_database(db_adapter, model_class, args.name, args.start, extra_days=args.extra_days,
+                                   path=args.path)
+    try:
+        while True:
+            time.sleep(args.poll)
+            append_new_days(shared, db_adapter, model_class)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shared.close()
+        if not args.path:
+            shared.unlink()
@@ -0,0 +1,181 @@
+"""
+In-memory cache of the symbol_dictionary table (see models.SymbolEntry).
+
+The fact tables store identifiers (symbol, series, security, market) only
+as ``<column>_id``. The loader swaps the parsed text of every chunk for
+its ids before inserting it (encode); readers swap the ids of the rows
+they fetch back for the names (decode_rows, names_for). The whole
+dictionary is read once per engine (i.e. once per run, or once per warm
+Lambda container); ids for names not seen before are created in one bulk
+insert per chunk and kind, then read back. Ids another process added since
+are read on first sight.
+
+Readers filter on the ids through id_condition(), which resolves the name
+inside the query, or through lookup() when they hold many names.
+"""
+import logging
+
+from sqlalchemy import exc, select
+
+from models import ENCODED_COLUMNS, SymbolEntry, encoded_id_column, get_encoded_columns
+
+# Names (or ids) per IN (...) when reading entries back.
+LOOKUP_BATCH_SIZE = 500
+
+# One dictionary per engine, shared by its adapter and the readers.
+_dictionaries = {}
+
+
+def dictionary_for(engine):
+    """The SymbolDictionary cache of ``engine``."""
+    dictionary = _dictionaries.get(engine)
+    if dictionary is None:
+        dictionary = _dictionaries[engine] = SymbolDictionary(engine)
+    return dictionary
+
+
+class SymbolDictionary:
+    def __init__(self, engine):
+        self.engine = engine
+        self.ids = None     # {(kind, name): id}, loaded on first use
+        self.names = {}     # {id: name}
+
+    def load(self):
+        table = SymbolEntry.__table__
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(table.c.kind, table.c.name, table.c.id)).all()
+        self.ids = {}
+        self.names = {}
+        self._remember(rows)
+        logging.info(f"Loaded {len(self.ids)} symbol dictionary entries")
+
+    def _remember(self, rows):
+        for kind, name, entry_id in rows:
+            self.ids[(kind, name)] = entry_id
+            self.names[entry_id] = name
+
+    # --- Encoding ---
+    def ids_for(self, kind, names):
+        """
+        Ids of ``names`` (in order), adding the new ones. None stays None;
+        "" (a blank identifier in a natural key) gets an id like any name.
+        """
+        if self.ids is None:
+            self.load()
+        ids = self.ids
+        missing = {name for name in names if name is not None and (kind, name) not in ids}
+        if missing:
+            self._add(kind, sorted(missing))
+        return [None if name is None else ids[(kind, name)] for name in names]
+
+    def encode(self, model_class, chunk):
+        """
+        Replaces the identifier text of a parsed chunk (row dicts or a
+        vectorized ColumnBatch) with the ``<column>_id`` values, for every
+        encoded column it has; returns the chunk.
+        """
+        encoded = get_encoded_columns(model_class)
+        if hasattr(chunk, "columns"):
+            for column, kind in encoded.items():
+                if column in chunk.columns:
+                    chunk.columns[encoded_id_column(column)] = self.ids_for(kind, chunk.columns.pop(column))
+            return chunk
+
+        if not chunk:
+            return chunk
+        for column, kind in encoded.items():
+            if column not in chunk[0]:
+                continue
+            id_column = encoded_id_column(column)
+            for row, entry_id in zip(chunk, self.ids_for(kind, [row.pop(column, None) for row in chunk])):
+                row[id_column] = entry_id
+        return chunk
+
+    # --- Decoding ---
+    def lookup(self, kind, names):
+        """{name: id} for the ``names`` already in the dictionary; nothing is added."""
+        if self.ids is None:
+            self.load()
+        unknown = [name for name in dict.fromkeys(names) if (kind, name) not in self.ids]
+        if unknown:
+            self._read_names(kind, unknown)
+        return {name: self.ids[(kind, name)] for name in names if (kind, name) in self.ids}
+
+    def names_for(self, ids):
+        """Names of dictionary ``ids`` (in order); None stays None."""
+        if self.ids is None:
+            self.load()
+        names = self.names
+        unknown = [entry_id for entry_id in set(ids) if entry_id is not None and entry_id not in names]
+        if unknown:
+            self._read_ids(unknown)
+        return [names.get(entry_id) for entry_id in ids]
+
+    def name(self, entry_id):
+        return self.names_for([entry_id])[0]
+
+    def decode_rows(self, model_class, rows):
+        """Replaces the ``<column>_id`` values of fact-table row dicts with the names, in place."""
+        for column in get_encoded_columns(model_class):
+            id_column = encoded_id_column(column)
+            if not rows or id_column not in rows[0]:
+                continue
+            for row, name in zip(rows, self.names_for([row.pop(id_column) for row in rows])):
+                row[column] = name
+        return rows
+
+    # --- Table Access ---
+    def _add(self, kind, names):
+        """
+        Inserts new names in their own transaction, so the ids survive a
+        chunk that is rolled back. Another process may add some of the
+        same names first; those rows are skipped and read back like the rest.
+        """
+        table = SymbolEntry.__table__
+        rows = [{"kind": kind, "name": name} for name in names]
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(table.insert(), rows)
+        except exc.IntegrityError:
+            for row in rows:
+                try:
+                    with self.engine.begin() as conn:
+                        conn.execute(table.insert(), row)
+                except exc.IntegrityError:
+                    pass
+
+        self._read_names(kind, names)
+        logging.info(f"Added {len(names)} {kind} names to the symbol dictionary")
+
+    def _read_names(self, kind, names):
+        table = SymbolEntry.__table__
+        with self.engine.connect() as conn:
+            for start in range(0, len(names), LOOKUP_BATCH_SIZE):
+                batch = names[start:start + LOOKUP_BATCH_SIZE]
+                stmt = (select(table.c.kind, table.c.name, table.c.id)
+                        .where(table.c.kind == kind, table.c.name.in_(batch)))
+                self._remember(conn.execute(stmt).all())
+
+    def _read_ids(self, ids):
+        table = SymbolEntry.__table__
+        with self.engine.connect() as conn:
+            for start in range(0, len(ids), LOOKUP_BATCH_SIZE):
+                stmt = (select(table.c.kind, table.c.name, table.c.id)
+                        .where(table.c.id.in_(ids[start:start + LOOKUP_BATCH_SIZE])))
+                self._remember(conn.execute(stmt).all())
+
+
+def id_condition(table, column, value):
+    """
+    ``table.column == value`` for a fact table, compared on the column's
+    dictionary id when it is encoded (an integer index lookup instead of a
+    string comparison).
+    """
+    kind = ENCODED_COLUMNS.get(column)
+    id_column = encoded_id_column(column)
+    if kind is None or id_column not in table.c:
+        return table.c[column] == value
+    entries = SymbolEntry.__table__
+    entry_id = select(entries.c.id).where(entries.c.kind == kind, entries.c.name == value).scalar_subquery()
+    return table.c[id_column] == entry_id
+
@@ -0,0 +1,86 @@
+"""
+Smoke test of the Lambda entry point (../../LambdaBhavcopy) against the
+current process_archive stats: the download is stubbed with a synthetic
+archive and S3 is replaced by LocalObjectStore, so no network or AWS
+account is needed.
+
+    python -m pytest NewCSVsaver/tests
+"""
+import importlib.machinery
+import importlib.util
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+LAMBDA_FILE = PACKAGE_DIR.parent / "LambdaBhavcopy"
+sys.path[:0] = [str(PACKAGE_DIR), str(PACKAGE_DIR / "benchmarks")]
+
+import processor  # noqa: E402
+from object_store import LocalObjectStore  # noqa: E402
+from synthetic import PREFIXES, make_archive  # noqa: E402
+
+ROWS = 20
+
+
+def load_handler_module():
+    loader = importlib.machinery.SourceFileLoader("lambda_bhavcopy", str(LAMBDA_FILE))
+    spec = importlib.util.spec_from_loader("lambda_bhavcopy", loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+class StubResponse:
+    def __init__(self, status_code, content=b""):
+        self.status_code = status_code
+        self.content = content
+
+
+@pytest.fixture
+def handler(tmp_path, monkeypatch):
+    """The handler module, run from a directory holding a fresh SQLite db_config.json."""
+    with open(tmp_path / "db_config.json", "w") as f:
+        json.dump({"db_type": "sqlite", "sqlite": {"db_path": str(tmp_path / "bhav.db")}}, f)
+    monkeypatch.chdir(tmp_path)
+    module = load_handler_module()
+    content = make_archive(ROWS)
+    monkeypatch.setattr(module.requests, "get", lambda *args, **kwargs: StubResponse(200, content))
+    return module
+
+
+def test_handler_loads_and_uploads(handler, tmp_path):
+    store = LocalObjectStore(tmp_path / "store")
+    result = handler.lambda_handler({}, None, store=store)
+
+    assert result["status"] == "ok"
+    assert "failed_chunks" not in result
+    # The archive plus one object per member.
+    assert result["uploaded"] == len(PREFIXES) + 1 == len(store.list())
+    assert len(result["rows"]) == len(PREFIXES)
+    assert all(rows == ROWS for rows in result["rows"].values())
+
+
+def test_handler_reports_failed_chunks(handler, tmp_path, monkeypatch):
+    upsert = processor.LOADERS["upsert"]
+
+    def failing_pd(db_adapter, model_class, chunk, file_def):
+        if model_class.__tablename__ == "pd_records":
+            raise ValueError("rejected")
+        return upsert(db_adapter, model_class, chunk, file_def)
+
+    monkeypatch.setitem(processor.LOADERS, "upsert", failing_pd)
+    result = handler.lambda_handler({}, None, store=LocalObjectStore(tmp_path / "store"))
+
+    assert result["status"] == "partial"
+    assert result["failed_chunks"] == {"pd_records": 1}
+
+
+def test_handler_download_failure(handler, tmp_path, monkeypatch):
+    monkeypatch.setattr(handler.requests, "get", lambda *args, **kwargs: StubResponse(404))
+    store = LocalObjectStore(tmp_path / "store")
+
+    assert handler.lambda_handler({}, None, store=store) == {"status": "download_failed"}
+    assert store.list() == []
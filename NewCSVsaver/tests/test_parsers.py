@@ -0,0 +1,53 @@
+"""
+The csv, numpy and arrow parser backends must produce the same rows from
+the same text stream, including blank, unparseable and literal "nan" values.
+
+    python -m pytest NewCSVsaver/tests
+"""
+import io
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from processor import FILE_TYPE_CONFIG, get_parser  # noqa: E402
+
+PD_FILE_DEF = dict(next(file_def for file_def in FILE_TYPE_CONFIG if file_def["prefix"] == "Pd"),
+                   bhav_date=None, file_name="Pd040625.csv")
+PD_TEXT = (
+    "MKT,SERIES,SYMBOL,SECURITY,PREV_CL_PR,OPEN_PRICE,CLOSE_PRICE,NET_TRDQTY\r\n"
+    "N,EQ,ABC,ABC LTD,nan, ,101.5,10\r\n"
+    "N,EQ,XYZ,XYZ LTD,2,x,NaN,\r\n"
+)
+
+
+def read_rows(backend):
+    chunks = get_parser(backend).iter_chunks(io.StringIO(PD_TEXT, newline=""), PD_FILE_DEF, 10)
+    return [row for chunk in chunks for row in chunk]
+
+
+def same_value(left, right):
+    if isinstance(left, float) and isinstance(right, float) and math.isnan(left):
+        return math.isnan(right)
+    return left == right and type(left) is type(right)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "arrow"])
+def test_vectorized_rows_match_csv(backend):
+    if backend == "arrow":
+        pytest.importorskip("pyarrow")
+    expected = read_rows("csv")
+    actual = read_rows(backend)
+
+    assert [row.keys() for row in actual] == [row.keys() for row in expected]
+    for expected_row, actual_row in zip(expected, actual):
+        assert all(same_value(value, actual_row[key]) for key, value in expected_row.items()), actual_row
+
+
+def test_literal_nan_is_a_float():
+    first, second = read_rows("csv")
+    assert math.isnan(first["prev_cl_pr"]) and first["open_price"] is None
+    assert math.isnan(second["close_price"]) and second["net_trdqty"] is None
@@ -0,0 +1,115 @@
+"""
+NSE trading calendar shared by the downloaders.
+
+Holidays are read from nse_holidays.json ({year: {date: name}}): every
+weekday NSE held no session, from 1996 (the first year with a published
+list) on, ad hoc closures included. Muhurat trading days publish a
+bhavcopy, so they are not holidays. Add a year there when NSE publishes
+its list. Every trading day (a weekday that is not a holiday) between
+FIRST_YEAR and the year after next is precomputed into a sorted array of
+date ordinals, so every lookup is a bisection instead of a day-by-day walk.
+
+A year missing from the holiday file is an error for any date up to today,
+since its holidays would be requested as trading days. Future years only
+log a warning the first time they are used.
+"""
+import json
+import logging
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nse_holidays.json")
+FIRST_YEAR = 1996
+
+
+class TradingCalendar:
+    def __init__(self, holidays, first_year=FIRST_YEAR, last_year=None, covered_years=None):
+        """
+        ``holidays`` is an iterable of dates. ``covered_years`` are the years
+        the holiday list is known to be complete for.
+        """
+        last_year = last_year or date.today().year + 2
+        self.first_day = date(first_year, 1, 1)
+        self.last_day = date(last_year, 12, 31)
+        self.holidays = {day.toordinal() for day in holidays}
+        self.covered_years = set(covered_years) if covered_years is not None else {d.year for d in holidays}
+        self._warned_years = set()
+
+        first, last = self.first_day.toordinal(), self.last_day.toordinal()
+        # date.fromordinal(1) is a Monday, so (ordinal - 1) % 7 is the weekday.
+        self._days = [o for o in range(first, last + 1) if (o - 1) % 7 < 5 and o not in self.holidays]
+
+    @classmethod
+    def from_file(cls, path=HOLIDAYS_FILE, first_year=FIRST_YEAR, last_year=None):
+        with open(path, "r") as f:
+            data = json.load(f)
+        holidays = [datetime.strptime(day, "%Y-%m-%d").date() for year in data.values() for day in year]
+        return cls(holidays, first_year, last_year, covered_years=[int(year) for year in data])
+
+    # --- Queries ---
+    def is_trading_day(self, day):
+        ordinal = self._ordinal(day)
+        index = bisect_left(self._days, ordinal)
+        return index < len(self._days) and self._days[index] == ordinal
+
+    def previous_trading_day(self, day=None):
+        """The last trading day strictly before ``day`` (default: today)."""
+        return self.nth_trading_day_back(1, day)
+
+    def next_trading_day(self, day):
+        """The first trading day strictly after ``day``."""
+        index = bisect_right(self._days, self._ordinal(day))
+        if index >= len(self._days):
+            raise ValueError(f"{day} is past the end of the trading calendar ({self.last_day})")
+        return self._date(index)
+
+    def nth_trading_day_back(self, n, day=None):
+        """The ``n``-th trading day before ``day`` (n=1 is the previous trading day)."""
+        index = bisect_left(self._days, self._ordinal(day or date.today())) - n
+        if index < 0:
+            raise ValueError(f"Fewer than {n} trading days before {day} in the trading calendar")
+        return self._date(index)
+
+    def trading_days(self, start, end):
+        """All trading days between start and end, inclusive."""
+        lo = bisect_left(self._days, self._ordinal(start))
+        hi = bisect_right(self._days, self._ordinal(end))
+        self._check_coverage(start, end)
+        return [date.fromordinal(o) for o in self._days[lo:hi]]
+
+    # --- Helpers ---
+    def _ordinal(self, day):
+        if not self.first_day <= day <= self.last_day:
+            raise ValueError(f"{day} is outside the trading calendar ({self.first_day} - {self.last_day})")
+        self._check_coverage(day, day)
+        return day.toordinal()
+
+    def _date(self, index):
+        day = date.fromordinal(self._days[index])
+        self._check_coverage(day, day)
+        return day
+
+    def _check_coverage(self, start, end):
+        today = date.today()
+        for year in range(start.year, end.year + 1):
+            if year in self.covered_years:
+                continue
+            if start <= today and year <= min(end, today).year:
+                raise ValueError(f"No NSE holiday list for {year} in {os.path.basename(HOLIDAYS_FILE)}; "
+                                 f"add it before using trading days up to {today}")
+            if year not in self._warned_years:
+                self._warned_years.add(year)
+                logging.warning(f"No NSE holiday list for {year} in {os.path.basename(HOLIDAYS_FILE)}; "
+                                f"treating every weekday as a trading day")
+
+
+_calendar = None
+
+
+def get_calendar():
+    """The shared calendar built from nse_holidays.json (loaded once per process)."""
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar.from_file()
+    return _calendar
@@ -0,0 +1,227 @@
+"""
+Vectorized parser backends for large bhavcopy loads.
+
+Selected per file type with "parser": "numpy" or "parser": "arrow" in
+processor.FILE_TYPE_CONFIG. Both read the file into typed columns, apply the
+column_map renames and numeric coercion as column operations, and yield
+ColumnBatch objects that the bulk loader inserts column-wise. The rows they
+produce are identical to CsvParser's.
+
+numpy is required for both backends; the arrow backend also needs pyarrow
+(`pip install pyarrow`).
+"""
+import csv
+import io
+import itertools
+import os
+
+import numpy as np
+
+import metrics
+from processor import BaseParser, CONVERTERS, compile_plan, span_labels
+
+
+# -----------------------
+# Column Batch
+# -----------------------
+class ColumnBatch:
+    """
+    A chunk of rows stored by column. Float columns are float64 arrays with
+    NaN where a value is missing; ``missing`` marks those positions, so a
+    literal "nan" in the file stays NaN like it does with CsvParser. Int and
+    str columns hold Python values and None.
+    """
+    def __init__(self, columns, length, missing=None):
+        self.columns = columns          # {column_name: ndarray or list}
+        self.length = length
+        self.missing = missing or {}    # {float column: bool ndarray}, only where values are missing
+
+    def __len__(self):
+        return self.length
+
+    def column_lists(self):
+        """{column: list of Python values}, with None for missing values."""
+        lists = {}
+        for name, values in self.columns.items():
+            if isinstance(values, np.ndarray):
+                missing = self.missing.get(name)
+                if values.dtype.kind == "f" and missing is not None and missing.any():
+                    values = values.astype(object)
+                    values[missing] = None
+                values = values.tolist()
+            lists[name] = values
+        return lists
+
+    def __iter__(self):
+        lists = self.column_lists()
+        names = list(lists)
+        for row in zip(*lists.values()):
+            yield dict(zip(names, row))
+
+
+# -----------------------
+# Column Conversion
+# -----------------------
+NUMERIC_DTYPES = {"float": np.float64, "int": np.int64}
+
+
+def _convert_column(kind, raw):
+    """
+    Converts one column of raw strings. Numeric columns are cast as a whole
+    by np.array, which parses each value like float()/int(); a column with
+    a blank or unparseable value, and every text column, goes through the
+    converter CsvParser uses, so values that do not parse become missing in
+    exactly the same way.
+
+    Returns (values, missing). Float columns come back as float64 arrays
+    and ``missing`` marks their values that were blank or did not parse; it
+    is None for other kinds and when nothing is missing.
+    """
+    dtype = NUMERIC_DTYPES.get(kind)
+    if dtype is not None:
+        try:
+            values = np.array(raw, dtype=dtype)
+            return (values if kind == "float" else values.tolist()), None
+        except (ValueError, OverflowError):
+            pass    # Blank or unparseable values: convert one by one below.
+    values = list(map(CONVERTERS[kind], raw))
+    if kind == "float":
+        return np.array(values, dtype=np.float64), np.array([value is None for value in values])
+    return values, None
+
+
+def _columns_from_rows(plan, rows):
+    """
+    Transposes a block of csv rows and converts each planned column; returns
+    the ColumnBatch.
+    """
+    width = plan.width
+    # Pad short rows so every planned index exists (missing fields -> "").
+    padded = [row if len(row) >= width else row + [""] * (width - len(row)) for row in rows]
+    columns = list(zip(*padded))
+    converted, missing = {}, {}
+    for name, index, _ in plan.fields:
+        converted[name], missing[name] = _convert_column(plan.kinds[name], columns[index])
+    return ColumnBatch(_with_constants(plan, converted, len(rows)), len(rows),
+                       {name: mask for name, mask in missing.items() if mask is not None})
+
+
+def _with_constants(plan, columns, length):
+    """Adds the plan's per-file constant columns (e.g. bhav_date)."""
+    for name, value in plan.constants.items():
+        columns[name] = [value] * length
+    return columns
+
+
+# -----------------------
+# Parsers
+# -----------------------
+class NumpyParser(BaseParser):
+    """
+    Reads blocks of ``chunk_size`` rows with csv.reader, transposes each
+    block and converts it one column at a time, without building a dict
+    per row.
+    """
+    def iter_chunks(self, source, file_def, chunk_size):
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "r", newline="", encoding="utf-8") as csvfile:
+                yield from self.iter_chunks(csvfile, file_def, chunk_size)
+            return
+
+        reader = csv.reader(source, delimiter=file_def.get("delimiter", ","))
+        header = next(reader, None)
+        if header is None:
+            return
+        plan = compile_plan(header, file_def)
+        labels = span_labels(file_def)
+        rows = (values for values in reader if values)
+        while True:
+            with metrics.span("parse", **labels):
+                block = list(itertools.islice(rows, chunk_size))
+            if not block:
+                return
+            with metrics.span("transform", **labels):
+                batch = _columns_from_rows(plan, block)
+            yield batch
+
+
+class ArrowParser(BaseParser):
+    """
+    Reads the file with pyarrow's multithreaded CSV reader (every column as
+    text, so numeric coercion follows the same rules as the other parsers)
+    and converts each column with Arrow compute kernels.
+    """
+    def iter_chunks(self, source, file_def, chunk_size):
+        import pyarrow as pa
+        from pyarrow import csv as pa_csv
+
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, "rb") as f:
+                yield from self.iter_chunks(f, file_def, chunk_size)
+            return
+
+        # Text streams (e.g. ZIP members wrapped for CsvParser) are read back
+        # as bytes; ones without a byte buffer (io.StringIO) are encoded.
+        data = (source.buffer if hasattr(source, "buffer") else source).read()
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        delimiter = file_def.get("delimiter", ",")
+        header_end = data.find(b"\n")
+        header_line = (data if header_end < 0 else data[:header_end]).rstrip(b"\r")
+        header = next(csv.reader([header_line.decode("utf-8")], delimiter=delimiter), None)
+        if not header:
+            return
+        plan = compile_plan(header, file_def)
+        labels = span_labels(file_def)
+
+        try:
+            with metrics.span("parse", **labels):
+                table = pa_csv.read_csv(
+                    pa.BufferReader(data),
+                    read_options=pa_csv.ReadOptions(column_names=[f"c{i}" for i in range(len(header))],
+                                                    skip_rows=1),
+                    parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+                    convert_options=pa_csv.ConvertOptions(
+                        column_types={f"c{i}": pa.string() for i in range(len(header))},
+                        strings_can_be_null=False,
+                    ),
+                )
+        except pa.ArrowInvalid:
+            # Ragged rows: csv.reader pads them where Arrow refuses, so hand
+            # the file to the NumPy backend to keep the output identical.
+            yield from NumpyParser().iter_chunks(io.StringIO(data.decode("utf-8"), newline=""),
+                                                 file_def, chunk_size)
+            return
+
+        for start in range(0, table.num_rows, chunk_size):
+            block = table.slice(start, chunk_size)
+            with metrics.span("transform", **labels):
+                columns, missing = {}, {}
+                for name, index, _ in plan.fields:
+                    columns[name], missing[name] = self._convert(plan.kinds[name], block.column(f"c{index}"))
+                batch = ColumnBatch(_with_constants(plan, columns, block.num_rows), block.num_rows,
+                                    {name: mask for name, mask in missing.items() if mask is not None})
+            yield batch
+
+    @staticmethod
+    def _convert(kind, column):
+        """(values, missing) for one column, as _convert_column returns them."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        stripped = pc.utf8_trim_whitespace(column)
+        if kind == "key":
+            return stripped.to_numpy(zero_copy_only=False), None
+        empty = pc.equal(stripped, "")
+        if kind == "str":
+            return pc.if_else(empty, pa.scalar(None, pa.string()), stripped).to_numpy(zero_copy_only=False), None
+
+        nulled = pc.if_else(empty, pa.scalar(None, pa.string()), stripped)
+        try:
+            if kind == "float":
+                values = pc.cast(nulled, pa.float64())
+                return values.to_numpy(zero_copy_only=False), pc.is_null(values).to_numpy(zero_copy_only=False)
+            return np.array(pc.cast(nulled, pa.int64()).to_pylist(), dtype=object), None
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # Some value does not parse; convert this column like CsvParser would.
+            return _convert_column(kind, column.to_pylist())
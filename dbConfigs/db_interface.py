@@ -8,3 +8,10 @@ class DatabaseInterface(ABC):
     @abstractmethod
     def save_data(self, data):
         pass
+
+    def save_many(self, records, batch_size=1000):
+        # Backends should override this with one transaction per batch;
+        # the fallback saves records one at a time.
+        for data in records:
+            self.save_data(data)
+        return len(records)
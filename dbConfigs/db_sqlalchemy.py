@@ -1,23 +1,40 @@
-from sqlalchemy import create_engine
+from functools import partial
+from sqlalchemy import create_engine, event, insert
 from sqlalchemy.orm import sessionmaker
 from models import Base, User
 from db_interface import DatabaseInterface
 
 class SQLAlchemyDatabase(DatabaseInterface):
-    def __init__(self, connection_string):
+    def __init__(self, connection_string, engine_options=None, sqlite_pragmas=None):
         self.connection_string = connection_string
+        self.engine_options = engine_options or {}
+        self.sqlite_pragmas = sqlite_pragmas or {}
 
     def connect(self):
-        self.engine = create_engine(self.connection_string)
+        self.engine = create_engine(self.connection_string, **self.engine_options)
+        if self.sqlite_pragmas and self.engine.dialect.name == "sqlite":
+            event.listen(self.engine, "connect", partial(_apply_pragmas, self.sqlite_pragmas))
         Base.metadata.create_all(self.engine)
         self.Session = sessionmaker(bind=self.engine)
 
     def save_data(self, data):
-        session = self.Session()
-        user = User(**data)
-        session.add(user)
-        session.commit()
-        session.close()
+        self.save_many([data])
+
+    def save_many(self, records, batch_size=1000):
+        # One executemany INSERT per batch and a single commit for all of them.
+        records = list(records)
+        with self.Session() as session:
+            for start in range(0, len(records), batch_size):
+                session.execute(insert(User), records[start:start + batch_size])
+            session.commit()
+        return len(records)
+
+
+def _apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
 
 
 
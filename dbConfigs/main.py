@@ -6,3 +6,6 @@ data = {"name": "Gokul", "email": "shindegokul@gmail.com"}
 db = get_database()
 db.connect()
 db.save_data(data)
+
+# Many records: one transaction instead of one per record
+db.save_many([data, {"name": "Example", "email": "example@example.com"}])
@@ -4,15 +4,19 @@ from db_config import load_config
 def get_database():
     config = load_config()
     db_type = config["db_type"]
+    # Pool and executemany settings, passed straight to create_engine
+    engine_options = config.get("engine", {})
 
     if db_type == "sqlite":
         path = config["sqlite"]["db_path"]
-        return SQLAlchemyDatabase(f"sqlite:///{path}")
+        return SQLAlchemyDatabase(f"sqlite:///{path}", engine_options, config["sqlite"].get("pragmas"))
     elif db_type == "mysql":
         mysql = config["mysql"]
-        return SQLAlchemyDatabase(f"mysql+pymysql://{mysql['user']}:{mysql['password']}@{mysql['host']}:{mysql['port']}/{mysql['database']}")
+        return SQLAlchemyDatabase(f"mysql+pymysql://{mysql['user']}:{mysql['password']}@{mysql['host']}:{mysql['port']}/{mysql['database']}", engine_options)
     elif db_type == "oracle":
         oracle = config["oracle"]
-        return SQLAlchemyDatabase(f"oracle+cx_oracle://{oracle['user']}:{oracle['password']}@{oracle['dsn']}")
+        if "arraysize" in oracle:
+            engine_options = dict(engine_options, arraysize=oracle["arraysize"])
+        return SQLAlchemyDatabase(f"oracle+cx_oracle://{oracle['user']}:{oracle['password']}@{oracle['dsn']}", engine_options)
     else:
         raise ValueError("Unsupported DB type")